@@ -0,0 +1,153 @@
+from django.db import transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+
+from business.models import ExpenseRollup, WalletTransaction
+
+ANALYTICS_FILTERS = {
+    "an_month": "month",
+    "an_wallet": "wallet_id",
+    "an_project": "project_id",
+    "an_category": "category",
+}
+
+
+def rebuild_expense_rollups(organization=None):
+    """Przelicza agregaty wydatków od zera na podstawie transakcji.
+
+    Służy do zasilenia tabeli danymi historycznymi i do naprawy rozbieżności;
+    na co dzień agregaty aktualizuje zapis transakcji. Zwraca liczbę wierszy.
+    """
+    transactions = WalletTransaction.objects.all()
+    rollups = ExpenseRollup.objects.all()
+    if organization is not None:
+        transactions = transactions.filter(organization=organization)
+        rollups = rollups.filter(organization=organization)
+
+    rows = (
+        transactions.annotate(
+            year=ExtractYear("date"),
+            month=ExtractMonth("date"),
+            category_key=Coalesce("category", Value("")),
+        )
+        .order_by()
+        .values(
+            "organization_id",
+            "year",
+            "month",
+            "wallet_id",
+            "project_id",
+            "category_key",
+            "type",
+        )
+        .annotate(total=Sum("amount"), count=Count("id"))
+    )
+    new_rollups = [
+        ExpenseRollup(
+            organization_id=row["organization_id"],
+            year=row["year"],
+            month=row["month"],
+            wallet_id=row["wallet_id"],
+            project_id=row["project_id"],
+            category=row["category_key"],
+            type=row["type"],
+            total=row["total"],
+            count=row["count"],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        rollups.delete()
+        ExpenseRollup.objects.bulk_create(new_rollups, batch_size=1000)
+    return len(new_rollups)
+
+
+def _ranked(rows, key, label):
+    """Sortuje grupy malejąco i dodaje udział względem największej (do słupków)."""
+    rows = sorted(rows, key=lambda row: row["total"], reverse=True)
+    top = rows[0]["total"] if rows else 0
+    return [
+        {
+            **row,
+            "key": row[key] if row[key] is not None else "",
+            "label": label(row),
+            "percent": int(row["total"] * 100 / top) if top else 0,
+        }
+        for row in rows
+        if row["total"]
+    ]
+
+
+def _foreman_label(row):
+    if row["wallet_id"] is None:
+        return "Firmowe"
+    name = f"{row['wallet__user__first_name']} {row['wallet__user__last_name']}".strip()
+    return name or row["wallet__user__username"]
+
+
+def get_expense_analytics(organization, year, filters=None):
+    """Zwraca wydatki roku wg miesięcy, kategorii, projektów i brygadzistów.
+
+    Czyta wyłącznie agregaty ExpenseRollup. Filtry ``an_*`` zawężają wszystkie
+    zestawienia (drill-down); wykres miesięczny pomija tylko filtr miesiąca.
+    """
+    filters = filters or {}
+    lookups = {
+        lookup: filters[name]
+        for name, lookup in ANALYTICS_FILTERS.items()
+        if filters.get(name) not in (None, "")
+    }
+    for name in ("month", "wallet_id", "project_id"):
+        if name in lookups and not str(lookups[name]).isdigit():
+            del lookups[name]
+
+    rollups = ExpenseRollup.objects.filter(
+        organization=organization, year=year, type=WalletTransaction.Type.EXPENSE
+    )
+    month = lookups.pop("month", None)
+    rollups = rollups.filter(**lookups)
+
+    monthly = dict(
+        rollups.values("month")
+        .annotate(month_total=Sum("total"))
+        .values_list("month", "month_total")
+    )
+    top_month = max(monthly.values(), default=0)
+    by_month = [
+        {
+            "month": m,
+            "total": monthly.get(m, 0),
+            "percent": int(monthly.get(m, 0) * 100 / top_month) if top_month else 0,
+        }
+        for m in range(1, 13)
+    ]
+
+    if month:
+        rollups = rollups.filter(month=month)
+    categories = dict(WalletTransaction.Category.choices)
+
+    return {
+        "month": int(month) if month else None,
+        "by_month": by_month,
+        "total": monthly.get(int(month), 0) if month else sum(monthly.values()),
+        "by_category": _ranked(
+            rollups.values("category").annotate(total=Sum("total")),
+            "category",
+            lambda row: categories.get(row["category"], "Bez kategorii"),
+        ),
+        "by_project": _ranked(
+            rollups.values("project_id", "project__name").annotate(total=Sum("total")),
+            "project_id",
+            lambda row: row["project__name"] or "Bez projektu",
+        ),
+        "by_foreman": _ranked(
+            rollups.values(
+                "wallet_id",
+                "wallet__user__first_name",
+                "wallet__user__last_name",
+                "wallet__user__username",
+            ).annotate(total=Sum("total")),
+            "wallet_id",
+            _foreman_label,
+        ),
+    }
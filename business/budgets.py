@@ -0,0 +1,124 @@
+import math
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from business.models import ProjectDailyCost
+
+BURN_WINDOW_DAYS = 28
+
+
+def _window_days(project, today):
+    """Długość okna tempa: 28 dni lub krócej, gdy projekt trwa krócej."""
+    if project.start_date and project.start_date <= today:
+        return max(1, min(BURN_WINDOW_DAYS, (today - project.start_date).days + 1))
+    return BURN_WINDOW_DAYS
+
+
+def get_burn_rates(projects, today=None):
+    """Zwraca dzienne tempo ``(godziny, wydatki)`` projektów z ostatnich 28 dni.
+
+    Czyta wyłącznie dzienny szereg kosztów, jednym zapytaniem grupującym
+    dla wszystkich projektów.
+    """
+    today = today or timezone.now().date()
+    rows = (
+        ProjectDailyCost.objects.filter(
+            project__in=[project.pk for project in projects],
+            date__gt=today - timedelta(days=BURN_WINDOW_DAYS),
+            date__lte=today,
+        )
+        .values("project_id")
+        .annotate(hours=Sum("hours"), expenses=Sum("expenses"))
+    )
+    totals = {row["project_id"]: row for row in rows}
+    rates = {}
+    for project in projects:
+        row = totals.get(project.pk)
+        if row is None:
+            rates[project.pk] = (Decimal(0), Decimal(0))
+            continue
+        days = _window_days(project, today)
+        rates[project.pk] = (row["hours"] / days, row["expenses"] / days)
+    return rates
+
+
+def forecast_budget(project, hours_rate, expenses_rate, today=None):
+    """Prognoza wykonania budżetu projektu przez liniową ekstrapolację tempa.
+
+    Koszt godziny to średni koszt robocizny projektu z wypłat (robocizna bez
+    wygenerowanych wypłat nie jest jeszcze wliczana). Budżet jest zagrożony,
+    gdy przy obecnym tempie wyczerpie się przed datą zakończenia, a w
+    projektach bez daty zakończenia - gdy w ogóle jest wydawany. Zwraca
+    słownik ze stanem, prognozą, dniem wyczerpania budżetu i statusem
+    ``ok``/``at_risk``/``over`` lub None, gdy projekt nie ma budżetu.
+    """
+    if project.budget_hours is None and project.budget_amount is None:
+        return None
+
+    today = today or timezone.now().date()
+    remaining_days = 0
+    if project.end_date and project.end_date > today:
+        remaining_days = (project.end_date - today).days
+
+    hour_cost = Decimal(0)
+    if project.labour_cost_total and project.hours_total:
+        hour_cost = project.labour_cost_total / project.hours_total
+    spent_amount = project.expenses_total + project.labour_cost_total
+    amount_rate = expenses_rate + hours_rate * hour_cost
+
+    forecast = {
+        "spent_hours": project.hours_total,
+        "spent_amount": spent_amount,
+        "hours_rate": hours_rate,
+        "amount_rate": amount_rate,
+        "remaining_days": remaining_days,
+        "forecast_hours": project.hours_total + hours_rate * remaining_days,
+        "forecast_amount": spent_amount + amount_rate * remaining_days,
+        "hours_percent": None,
+        "amount_percent": None,
+        "hours_exhausted_on": None,
+        "amount_exhausted_on": None,
+        "status": "ok",
+    }
+    for kind, budget in (
+        ("hours", project.budget_hours),
+        ("amount", project.budget_amount),
+    ):
+        if budget is None:
+            continue
+        spent = forecast[f"spent_{kind}"]
+        rate = forecast[f"{kind}_rate"]
+        if budget:
+            forecast[f"{kind}_percent"] = min(int(spent * 100 / budget), 100)
+        if spent > budget:
+            forecast["status"] = "over"
+            continue
+        if rate <= 0:
+            continue
+        days_left = (budget - spent) / rate
+        if days_left <= (date.max - today).days:
+            forecast[f"{kind}_exhausted_on"] = today + timedelta(
+                days=math.ceil(days_left)
+            )
+        at_risk = project.end_date is None or days_left < remaining_days
+        if at_risk and forecast["status"] == "ok":
+            forecast["status"] = "at_risk"
+    return forecast
+
+
+def attach_budget_forecasts(projects, today=None):
+    """Dołącza do projektów atrybut ``budget`` (prognoza lub None)."""
+    today = today or timezone.now().date()
+    budgeted = [
+        project
+        for project in projects
+        if project.budget_hours is not None or project.budget_amount is not None
+    ]
+    rates = get_burn_rates(budgeted, today) if budgeted else {}
+    for project in projects:
+        hours_rate, expenses_rate = rates.get(project.pk, (Decimal(0), Decimal(0)))
+        project.budget = forecast_budget(project, hours_rate, expenses_rate, today)
+    return projects
@@ -0,0 +1,97 @@
+import calendar
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from django.core.cache import cache
+
+from business.models import Worker
+
+EMPLOYMENT_INDEX_TIMEOUT = 60 * 60
+
+
+class EmploymentIndex:
+    """Okresy zatrudnienia organizacji posortowane po początku i końcu.
+
+    Pracownicy zatrudnieni w przedziale [od, do] to okresy rozpoczęte
+    najpóźniej ``do`` (prefiks listy początków) bez tych zakończonych przed
+    ``od`` (prefiks listy końców), więc zapytanie to dwa wyszukiwania
+    binarne i przejście po pasujących prefiksach.
+    """
+
+    def __init__(self, periods):
+        periods = [
+            (worker_id, start, end or date.max) for worker_id, start, end in periods
+        ]
+        by_start = sorted(range(len(periods)), key=lambda i: periods[i][1])
+        by_end = sorted(range(len(periods)), key=lambda i: periods[i][2])
+        self._workers = [worker_id for worker_id, _, _ in periods]
+        self._starts = [periods[i][1] for i in by_start]
+        self._start_order = by_start
+        self._ends = [periods[i][2] for i in by_end]
+        self._end_order = by_end
+        self._by_worker = {}
+        for worker_id, start, end in periods:
+            self._by_worker.setdefault(worker_id, []).append((start, end))
+
+    def __len__(self):
+        return len(self._workers)
+
+    def employed_between(self, start, end):
+        """Id pracowników zatrudnionych choćby jeden dzień w przedziale."""
+        started = self._start_order[: bisect_right(self._starts, end)]
+        ended = set(self._end_order[: bisect_left(self._ends, start)])
+        return {self._workers[i] for i in started if i not in ended}
+
+    def employed_on(self, day):
+        return self.employed_between(day, day)
+
+    def employed_in_month(self, year, month):
+        _, last_day = calendar.monthrange(year, month)
+        return self.employed_between(date(year, month, 1), date(year, month, last_day))
+
+    def is_employed(self, worker_id, start, end=None):
+        end = end or start
+        return any(
+            period_start <= end and period_end >= start
+            for period_start, period_end in self._by_worker.get(worker_id, ())
+        )
+
+
+def _index_key(organization_id):
+    return f"business:employment-index:{organization_id}"
+
+
+def build_employment_index(organization):
+    """Buduje indeks jednym zapytaniem (złączenie pracowników z okresami).
+
+    Pracownik bez żadnego okresu (dane sprzed ich wprowadzenia) jest
+    traktowany jak zatrudniony od ``hired_at``, a nieaktywny tylko w tym dniu,
+    tak jak okres tworzony przez ``Worker.save``.
+    """
+    periods = []
+    rows = Worker.objects.filter(organization=organization).values_list(
+        "pk",
+        "is_active",
+        "hired_at",
+        "employment_periods__start_date",
+        "employment_periods__end_date",
+    )
+    for worker_id, is_active, hired_at, start, end in rows:
+        if start is None:
+            start, end = hired_at, None if is_active else hired_at
+        periods.append((worker_id, start, end))
+    return EmploymentIndex(periods)
+
+
+def get_employment_index(organization):
+    """Indeks zatrudnienia z cache; unieważniany przez ``invalidate_employment_index``."""
+    key = _index_key(organization.pk)
+    index = cache.get(key)
+    if index is None:
+        index = build_employment_index(organization)
+        cache.set(key, index, EMPLOYMENT_INDEX_TIMEOUT)
+    return index
+
+
+def invalidate_employment_index(organization_id):
+    cache.delete(_index_key(organization_id))
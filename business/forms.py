@@ -4,7 +4,8 @@ from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
-from .models import Project, Vacation, WalletTransaction, Worker
+from .models import Project, Vacation, Wallet, WalletTransaction, Worker
+from .projects import get_project_catalog
 
 User = get_user_model()
 
@@ -37,6 +38,7 @@ class ExpenseForm(forms.ModelForm):
         }
 
     def __init__(self, *args, **kwargs):
+        organization = kwargs.pop("organization", None)
         super().__init__(*args, **kwargs)
         self.fields["category"].required = True
         if not self.instance.pk:
@@ -44,6 +46,16 @@ class ExpenseForm(forms.ModelForm):
         elif self.instance.date:
             self.initial["date"] = self.instance.date.strftime("%Y-%m-%d")
 
+        if organization:
+            # Opcje z katalogu projektów (cache); queryset służy tylko walidacji.
+            self.fields["project"].queryset = Project.objects.filter(
+                organization=organization
+            )
+            self.fields["project"].choices = [("", "---------")] + [
+                (project["id"], project["name"])
+                for project in get_project_catalog(organization)
+            ]
+
         for name, field in self.fields.items():
             if name in ["category", "date", "description", "receipt_image"]:
                 continue
@@ -237,6 +249,8 @@ class ProjectForm(forms.ModelForm):
             "start_date",
             "end_date",
             "status",
+            "budget_hours",
+            "budget_amount",
         ]
         widgets = {
             "address": forms.Textarea(
@@ -310,3 +324,73 @@ class VacationForm(forms.ModelForm):
                 continue
             if "class" not in field.widget.attrs:
                 field.widget.attrs["class"] = "input input-bordered w-full"
+
+
+class StatementImportForm(forms.Form):
+    """Formularz importu wyciągu bankowego CSV i mapowania jego kolumn."""
+
+    file = forms.FileField(
+        label="Plik CSV",
+        widget=forms.FileInput(
+            attrs={"class": "file-input file-input-bordered w-full", "accept": ".csv"}
+        ),
+    )
+    wallet = forms.ModelChoiceField(
+        label="Portfel",
+        queryset=Wallet.objects.none(),
+        required=False,
+        empty_label="Firmowe (bez portfela)",
+        help_text="Zasilenia (kwoty dodatnie) wymagają wskazania portfela.",
+        widget=forms.Select(attrs={"class": "select select-bordered w-full"}),
+    )
+    date_column = forms.CharField(label="Kolumna daty", initial="data")
+    amount_column = forms.CharField(label="Kolumna kwoty", initial="kwota")
+    description_column = forms.CharField(label="Kolumna opisu", initial="opis")
+    category_column = forms.CharField(
+        label="Kolumna kategorii",
+        required=False,
+        help_text="Kod lub nazwa kategorii; pozostałe wydatki otrzymają domyślną.",
+    )
+    default_category = forms.ChoiceField(
+        label="Domyślna kategoria",
+        choices=WalletTransaction.Category.choices,
+        initial=WalletTransaction.Category.OTHER,
+        widget=forms.Select(attrs={"class": "select select-bordered w-full"}),
+    )
+
+    def __init__(self, *args, organization=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["wallet"].queryset = Wallet.objects.filter(
+            organization=organization
+        ).select_related("user__worker_profile")
+
+        for field in self.fields.values():
+            if "class" not in field.widget.attrs:
+                field.widget.attrs["class"] = "input input-bordered w-full"
+
+    def get_mapping(self):
+        return {
+            name: self.cleaned_data[name]
+            for name in (
+                "date_column",
+                "amount_column",
+                "description_column",
+                "category_column",
+                "default_category",
+            )
+        }
+
+
+class WorkerImportForm(forms.Form):
+    """Formularz importu listy pracowników z pliku CSV."""
+
+    file = forms.FileField(
+        label="Plik CSV",
+        help_text=(
+            "Kolumny: imię, nazwisko, stawka oraz opcjonalnie data zatrudnienia, "
+            "telefon, adres, notatki."
+        ),
+        widget=forms.FileInput(
+            attrs={"class": "file-input file-input-bordered w-full", "accept": ".csv"}
+        ),
+    )
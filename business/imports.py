@@ -0,0 +1,176 @@
+import csv
+import io
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from business.models import WalletTransaction
+
+IMPORT_BATCH_SIZE = 500
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d-%m-%Y", "%d/%m/%Y")
+
+
+def read_statement(file):
+    """Czyta plik CSV (wyciąg, lista pracowników) wiersz po wierszu.
+
+    Separator jest wykrywany z początku pliku. Zwraca generator krotek
+    (numer linii, słownik kolumn z nagłówkami zapisanymi małymi literami).
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    header = [column.strip().lower() for column in next(reader, [])]
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield reader.line_num, dict(zip(header, (cell.strip() for cell in row)))
+
+
+def parse_amount(value):
+    """Zamienia kwotę z wyciągu ("-1 234,56", "1.234,56 PLN") na Decimal.
+
+    Separatorem dziesiętnym jest ostatni z ``,`` i ``.``; wcześniejsze (oraz
+    spacje) to separatory tysięcy. Powtórzony ostatni znak ("1.234.567")
+    też oznacza tysiące.
+    """
+    value = re.sub(r"[^\d,.\-]", "", value or "")
+    point = max(value.rfind(","), value.rfind("."))
+    if point >= 0 and value.count(value[point]) > 1:
+        value = re.sub(r"[,.]", "", value)
+    elif point >= 0:
+        value = re.sub(r"[,.]", "", value[:point]) + "." + value[point + 1 :]
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Nieprawidłowa kwota: {value or '—'}")
+
+
+def parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value), date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Nieprawidłowa data: {value or '—'}")
+
+
+def duplicate_key(date, amount, description):
+    return (
+        date,
+        abs(amount).quantize(Decimal("0.01")),
+        " ".join((description or "").casefold().split()),
+    )
+
+
+class StatementImporter:
+    """Importuje zasilenia (kwoty dodatnie) i wydatki (ujemne) z wyciągu CSV.
+
+    Wiersze są walidowane w partiach. Duplikaty (data, kwota, opis) wykrywa
+    indeks w pamięci, uzupełniany z bazy tylko o daty pojawiające się
+    w kolejnych partiach, oraz o wiersze wcześniej przetworzone z tego pliku.
+    """
+
+    def __init__(self, organization, mapping, wallet=None):
+        self.organization = organization
+        self.wallet = wallet
+        self.mapping = mapping
+        self.categories = {}
+        for value, label in WalletTransaction.Category.choices:
+            self.categories[value.casefold()] = value
+            self.categories[str(label).casefold()] = value
+        self._index = set()
+        self._loaded_dates = set()
+
+    def _column(self, row, name):
+        column = self.mapping.get(name)
+        return row.get(column.strip().lower(), "") if column else ""
+
+    def _load_existing(self, dates):
+        dates = set(dates) - self._loaded_dates
+        if not dates:
+            return
+        existing = WalletTransaction.objects.filter(
+            organization=self.organization, date__in=dates
+        ).values_list("date", "amount", "description")
+        self._index.update(duplicate_key(*row) for row in existing)
+        self._loaded_dates |= dates
+
+    def _parse_row(self, line, row):
+        date = parse_date(self._column(row, "date_column"))
+        amount = parse_amount(self._column(row, "amount_column"))
+        if not amount:
+            raise ValueError("Kwota równa zero.")
+        description = self._column(row, "description_column")[:500]
+
+        if amount > 0:
+            if self.wallet is None:
+                raise ValueError("Zasilenie wymaga wskazania portfela.")
+            type, category = WalletTransaction.Type.REFILL, None
+        else:
+            type = WalletTransaction.Type.EXPENSE
+            category = self.categories.get(
+                self._column(row, "category_column").casefold(),
+                self.mapping.get("default_category")
+                or WalletTransaction.Category.OTHER,
+            )
+
+        return WalletTransaction(
+            organization=self.organization,
+            wallet=self.wallet,
+            type=type,
+            category=category,
+            amount=abs(amount),
+            date=date,
+            description=description,
+        )
+
+    def _validate(self, batch):
+        parsed = []
+        for line, row in batch:
+            try:
+                parsed.append((line, self._parse_row(line, row), None))
+            except ValueError as error:
+                parsed.append((line, None, str(error)))
+        self._load_existing(t.date for _, t, _ in parsed if t)
+
+        results = []
+        for line, t, error in parsed:
+            status = "error"
+            if t is not None:
+                key = duplicate_key(t.date, t.amount, t.description)
+                status = "duplicate" if key in self._index else "new"
+                self._index.add(key)
+            results.append(
+                {"line": line, "transaction": t, "status": status, "error": error}
+            )
+        return results
+
+    def batches(self, rows):
+        """Zwraca kolejne partie zweryfikowanych wierszy (podgląd importu)."""
+        batch = []
+        for line, row in rows:
+            batch.append((line, row))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                yield self._validate(batch)
+                batch = []
+        if batch:
+            yield self._validate(batch)
+
+    def commit(self, rows):
+        """Zapisuje nowe wiersze partiami przez ``bulk_create``.
+
+        Zwraca kolejne partie z wynikami, tak jak ``batches``.
+        """
+        for results in self.batches(rows):
+            new = [r["transaction"] for r in results if r["status"] == "new"]
+            with transaction.atomic():
+                WalletTransaction.objects.bulk_create(new)
+                WalletTransaction.apply_bulk_ledger(new)
+            yield results
@@ -0,0 +1,155 @@
+import csv
+import tempfile
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from business.models import WalletTransaction
+
+JOURNAL_CHUNK_SIZE = 2000
+XLSX_STREAM_CHUNK_SIZE = 64 * 1024
+# Arkusze traktują komórki zaczynające się od tych znaków jak formuły.
+FORMULA_PREFIXES = ("=", "+", "-", "@")
+# Kolumny z tekstem wpisanym przez użytkowników (portfel, pracownik, projekt, opis).
+TEXT_COLUMNS = (5, 6, 7, 8)
+JOURNAL_HEADERS = [
+    "ID",
+    "Data",
+    "Typ",
+    "Kategoria",
+    "Kwota",
+    "Portfel (właściciel)",
+    "Pracownik",
+    "Projekt",
+    "Opis",
+]
+JOURNAL_FIELDS = (
+    "pk",
+    "date",
+    "type",
+    "category",
+    "amount",
+    "wallet_id",
+    "wallet__user__username",
+    "wallet__user__first_name",
+    "wallet__user__last_name",
+    "wallet__user__worker_profile__first_name",
+    "wallet__user__worker_profile__last_name",
+    "worker__first_name",
+    "worker__last_name",
+    "project__name",
+    "description",
+)
+
+
+def _full_name(*parts):
+    return " ".join(part for part in parts if part)
+
+
+def _is_formula(value):
+    return isinstance(value, str) and value.startswith(FORMULA_PREFIXES)
+
+
+def journal_rows(queryset):
+    """Zwraca kolejne wiersze dziennika transakcji (od najstarszych).
+
+    Relacje są dołączane w jednym zapytaniu, a wyniki pobierane porcjami
+    przez kursor bazy (``iterator``), bez ładowania obiektów modeli, więc
+    pamięć nie rośnie wraz z długością okresu.
+    """
+    types = dict(WalletTransaction.Type.choices)
+    categories = dict(WalletTransaction.Category.choices)
+    rows = (
+        queryset.order_by("date", "pk")
+        .values(*JOURNAL_FIELDS)
+        .iterator(chunk_size=JOURNAL_CHUNK_SIZE)
+    )
+    for row in rows:
+        if row["wallet_id"] is None:
+            owner = "Firmowy"
+        else:
+            owner = (
+                _full_name(
+                    row["wallet__user__worker_profile__first_name"],
+                    row["wallet__user__worker_profile__last_name"],
+                )
+                or _full_name(
+                    row["wallet__user__first_name"], row["wallet__user__last_name"]
+                )
+                or row["wallet__user__username"]
+            )
+        yield [
+            row["pk"],
+            row["date"],
+            str(types.get(row["type"], row["type"])),
+            str(categories.get(row["category"], "")),
+            row["amount"],
+            owner,
+            _full_name(row["worker__first_name"], row["worker__last_name"]),
+            row["project__name"] or "",
+            row["description"],
+        ]
+
+
+class _Echo:
+    """Bufor dla csv.writer zwracający zapisaną linię zamiast ją przechowywać."""
+
+    def write(self, value):
+        return value
+
+
+def stream_journal_csv(rows):
+    """Generator linii CSV (separator ``;`` i BOM, żeby Excel otworzył polskie znaki).
+
+    Tekst zaczynający się od znaku formuły dostaje apostrof, żeby arkusz
+    wyświetlił go zamiast wykonać.
+    """
+    writer = csv.writer(_Echo(), delimiter=";")
+    yield "\ufeff" + writer.writerow(JOURNAL_HEADERS)
+    for row in rows:
+        row[1] = row[1].isoformat()
+        row[4] = str(row[4]).replace(".", ",")
+        for column in TEXT_COLUMNS:
+            if _is_formula(row[column]):
+                row[column] = "'" + row[column]
+        yield writer.writerow(row)
+
+
+def stream_journal_xlsx(rows):
+    """Generator bajtów pliku XLSX z dziennikiem.
+
+    Skoroszyt w trybie ``write_only`` zrzuca wiersze na dysk na bieżąco, ale
+    archiwum ZIP powstaje dopiero przy zapisie, więc plik jest składany
+    w pliku tymczasowym i dopiero potem wysyłany porcjami. Pamięć nie zależy
+    od liczby transakcji, a plik znika po zakończeniu odpowiedzi.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Dziennik")
+    sheet.column_dimensions["B"].width = 12
+    sheet.column_dimensions["F"].width = 24
+    sheet.column_dimensions["G"].width = 24
+    sheet.column_dimensions["H"].width = 24
+    sheet.column_dimensions["I"].width = 48
+
+    header = []
+    for title in JOURNAL_HEADERS:
+        cell = WriteOnlyCell(sheet, value=title)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    for row in rows:
+        for column in TEXT_COLUMNS:
+            if _is_formula(row[column]):
+                # Komórka tekstowa z prefiksem cudzysłowu: ta sama treść, bez formuły.
+                cell = WriteOnlyCell(sheet, value=row[column])
+                cell.data_type = "s"
+                cell.quotePrefix = True
+                row[column] = cell
+        sheet.append(row)
+
+    with tempfile.TemporaryFile(suffix=".xlsx") as file:
+        workbook.save(file)
+        file.seek(0)
+        while chunk := file.read(XLSX_STREAM_CHUNK_SIZE):
+            yield chunk
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from business.models import WalletTransaction
+from business.receipts import compute_receipt_hash, hash_receipt
+
+
+class Command(BaseCommand):
+    help = "Liczy skróty percepcyjne paragonów bez skrótu i oznacza możliwe duplikaty"
+
+    def handle(self, *args, **options):
+        receipts = (
+            WalletTransaction.objects.filter(
+                type=WalletTransaction.Type.EXPENSE, receipt_hash=""
+            )
+            .exclude(receipt_image="")
+            .exclude(receipt_image__isnull=True)
+            .order_by("pk")
+        )
+        hashed = duplicates = 0
+        for receipt in receipts.iterator():
+            try:
+                with receipt.receipt_image.open("rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            if hash_receipt(receipt, compute_receipt_hash(data)):
+                duplicates += 1
+            hashed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Policzono skróty paragonów: {hashed}, możliwe duplikaty: {duplicates}."
+            )
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from business.imports import read_statement
+from business.workers import onboard_workers
+from core.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Dodaje pracowników z listy CSV (imię, nazwisko, stawka, ...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Ścieżka do pliku CSV.")
+        parser.add_argument(
+            "--organization",
+            type=int,
+            required=True,
+            help="ID organizacji.",
+        )
+
+    def handle(self, *args, **options):
+        organization = Organization.objects.filter(pk=options["organization"]).first()
+        if organization is None:
+            raise CommandError("Organizacja nie istnieje.")
+
+        try:
+            with open(options["path"], "rb") as file:
+                result = onboard_workers(organization, read_statement(file))
+        except OSError as error:
+            raise CommandError(f"Nie można odczytać pliku: {error}")
+
+        if result["errors"]:
+            for line, message in result["errors"]:
+                self.stderr.write(f"Linia {line}: {message}")
+            raise CommandError("Plik zawiera błędy, nie dodano pracowników.")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Dodano pracowników: {len(result['created'])} "
+                f"(pominięci, już zatrudnieni: {result['duplicates']})."
+            )
+        )
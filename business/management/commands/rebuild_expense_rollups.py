@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from business.analytics import rebuild_expense_rollups
+from core.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Przelicza od zera agregaty wydatków (ExpenseRollup) z transakcji portfeli"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization",
+            type=int,
+            help="ID organizacji (domyślnie wszystkie).",
+        )
+
+    def handle(self, *args, **options):
+        organization = None
+        if options["organization"]:
+            organization = Organization.objects.filter(
+                pk=options["organization"]
+            ).first()
+            if organization is None:
+                raise CommandError("Organizacja nie istnieje.")
+
+        count = rebuild_expense_rollups(organization)
+        self.stdout.write(self.style.SUCCESS(f"Zapisano agregaty wydatków: {count}."))
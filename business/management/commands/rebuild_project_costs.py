@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from business.projects import rebuild_project_costs
+from core.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Przelicza od zera koszty projektów (sumy i zestawienia miesięczne)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization",
+            type=int,
+            help="ID organizacji (domyślnie wszystkie).",
+        )
+
+    def handle(self, *args, **options):
+        organization = None
+        if options["organization"]:
+            organization = Organization.objects.filter(
+                pk=options["organization"]
+            ).first()
+            if organization is None:
+                raise CommandError("Organizacja nie istnieje.")
+
+        count = rebuild_project_costs(organization)
+        self.stdout.write(
+            self.style.SUCCESS(f"Zapisano miesięczne koszty projektów: {count}.")
+        )
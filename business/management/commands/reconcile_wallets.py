@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from business.models import Wallet
+
+LEDGER_COLUMNS = ("balance", "refills_total", "expenses_total", "advances_total")
+
+
+class Command(BaseCommand):
+    help = "Porównuje zapisane salda portfeli z sumami transakcji (opcjonalnie je naprawia)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Nadpisuje rozbieżne kolumny wartościami wyliczonymi z transakcji.",
+        )
+
+    def handle(self, *args, **options):
+        mismatched = 0
+        for wallet in Wallet.objects.select_related("user").order_by("pk"):
+            expected = wallet.calculate_ledger_totals()
+            diffs = {
+                column: (getattr(wallet, column), expected[column])
+                for column in LEDGER_COLUMNS
+                if getattr(wallet, column) != expected[column]
+            }
+            if not diffs:
+                continue
+
+            mismatched += 1
+            details = ", ".join(
+                f"{column}: {stored} != {actual}"
+                for column, (stored, actual) in diffs.items()
+            )
+            self.stdout.write(f"Portfel #{wallet.pk} ({wallet.user}): {details}")
+            if options["fix"]:
+                Wallet.objects.filter(pk=wallet.pk).update(**expected)
+
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS("Wszystkie salda portfeli są zgodne."))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Naprawiono portfele: {mismatched}."))
+        else:
+            raise CommandError(
+                f"Rozbieżne salda portfeli: {mismatched}. Uruchom z --fix, aby naprawić."
+            )
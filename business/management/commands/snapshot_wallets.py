@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from business.models import Wallet
+from business.wallets import previous_month, write_wallet_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Zapisuje miesięczne zestawienia portfeli (domyślnie do poprzedniego miesiąca)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--year", type=int, help="Rok ostatniego zamykanego miesiąca."
+        )
+        parser.add_argument(
+            "--month", type=int, help="Ostatni zamykany miesiąc (1-12)."
+        )
+
+    def handle(self, *args, **options):
+        year, month = previous_month(date.today().year, date.today().month)
+        year = options["year"] or year
+        month = options["month"] or month
+
+        written = sum(
+            write_wallet_snapshots(wallet, year, month)
+            for wallet in Wallet.objects.order_by("pk")
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Zapisano zestawienia portfeli do {month:02d}/{year}: {written}."
+            )
+        )
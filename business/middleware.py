@@ -0,0 +1,15 @@
+from business.payrolls import PayrollDirtySet
+
+
+class PayrollRecalcMiddleware:
+    """Przelicza wypłaty DRAFT oznaczone jako nieaktualne w trakcie żądania."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.dirty_payrolls = PayrollDirtySet()
+        response = self.get_response(request)
+        if request.dirty_payrolls:
+            request.dirty_payrolls.flush()
+        return response
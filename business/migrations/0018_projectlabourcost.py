@@ -0,0 +1,78 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0017_payroll_bonuses"),
+        ("core", "0003_user_first_name_user_last_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectLabourCost",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.PositiveSmallIntegerField(verbose_name="Miesiąc")),
+                ("year", models.PositiveSmallIntegerField(verbose_name="Rok")),
+                (
+                    "hours",
+                    models.DecimalField(
+                        decimal_places=1,
+                        default=0,
+                        max_digits=8,
+                        verbose_name="Suma godzin",
+                    ),
+                ),
+                (
+                    "labour_cost",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Koszt robocizny",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Data aktualizacji"
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="project_labour_costs",
+                        to="core.organization",
+                        verbose_name="Organizacja",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="labour_costs",
+                        to="business.project",
+                        verbose_name="Projekt",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Koszt robocizny projektu",
+                "verbose_name_plural": "Koszty robocizny projektów",
+                "ordering": ["-year", "-month", "project"],
+                "unique_together": {("project", "year", "month")},
+            },
+        ),
+    ]
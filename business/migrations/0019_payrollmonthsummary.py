@@ -0,0 +1,100 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0018_projectlabourcost"),
+        ("core", "0003_user_first_name_user_last_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayrollMonthSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.PositiveSmallIntegerField(verbose_name="Miesiąc")),
+                ("year", models.PositiveSmallIntegerField(verbose_name="Rok")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("EMPTY", "Nie wygenerowano"),
+                            ("DRAFT", "W toku"),
+                            ("CLOSED", "Zamknięty"),
+                        ],
+                        default="EMPTY",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "total_earned",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Wypracowano (Brutto)",
+                    ),
+                ),
+                (
+                    "total_bonuses",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Bonusy",
+                    ),
+                ),
+                (
+                    "total_advances",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Potrącone zaliczki",
+                    ),
+                ),
+                (
+                    "total_payout",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Do wypłaty (Netto)",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Data aktualizacji"
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payroll_summaries",
+                        to="core.organization",
+                        verbose_name="Organizacja",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Podsumowanie wypłat",
+                "verbose_name_plural": "Podsumowania wypłat",
+                "ordering": ["-year", "-month"],
+                "unique_together": {("organization", "year", "month")},
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:23
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def backfill_wallet_ledger(apps, schema_editor):
+    Wallet = apps.get_model("business", "Wallet")
+
+    for wallet in Wallet.objects.all():
+        totals = wallet.transactions.aggregate(
+            refills=Sum("amount", filter=Q(type="REFILL")),
+            expenses=Sum("amount", filter=Q(type="EXPENSE")),
+            advances=Sum("amount", filter=Q(type="ADVANCE")),
+        )
+        wallet.refills_total = totals["refills"] or 0
+        wallet.expenses_total = totals["expenses"] or 0
+        wallet.advances_total = totals["advances"] or 0
+        wallet.balance = (
+            wallet.refills_total - wallet.expenses_total - wallet.advances_total
+        )
+        wallet.save(
+            update_fields=[
+                "balance",
+                "refills_total",
+                "expenses_total",
+                "advances_total",
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0019_payrollmonthsummary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wallet",
+            name="advances_total",
+            field=models.DecimalField(
+                decimal_places=2, default=0, max_digits=12, verbose_name="Suma zaliczek"
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallet",
+            name="balance",
+            field=models.DecimalField(
+                decimal_places=2, default=0, max_digits=12, verbose_name="Saldo"
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallet",
+            name="expenses_total",
+            field=models.DecimalField(
+                decimal_places=2, default=0, max_digits=12, verbose_name="Suma wydatków"
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallet",
+            name="refills_total",
+            field=models.DecimalField(
+                decimal_places=2, default=0, max_digits=12, verbose_name="Suma zasileń"
+            ),
+        ),
+        migrations.RunPython(backfill_wallet_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0020_wallet_ledger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WalletMonthSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.PositiveSmallIntegerField(verbose_name="Miesiąc")),
+                ("year", models.PositiveSmallIntegerField(verbose_name="Rok")),
+                (
+                    "opening_balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Saldo otwarcia",
+                    ),
+                ),
+                (
+                    "refills",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Zasilenia",
+                    ),
+                ),
+                (
+                    "expenses",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Wydatki",
+                    ),
+                ),
+                (
+                    "advances",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Zaliczki",
+                    ),
+                ),
+                (
+                    "closing_balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Saldo zamknięcia",
+                    ),
+                ),
+                (
+                    "expenses_by_category",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Wydatki wg kategorii"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Data utworzenia"
+                    ),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="month_snapshots",
+                        to="business.wallet",
+                        verbose_name="Portfel",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Miesięczne zestawienie portfela",
+                "verbose_name_plural": "Miesięczne zestawienia portfeli",
+                "ordering": ["-year", "-month"],
+                "unique_together": {("wallet", "year", "month")},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0021_walletmonthsnapshot"),
+        ("core", "0003_user_first_name_user_last_name"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["wallet", "-date", "-id"], name="wallet_tx_feed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["wallet", "type", "-date", "-id"],
+                name="wallet_tx_type_feed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["organization", "-date", "-id"], name="org_tx_feed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["organization", "type", "-date", "-id"],
+                name="org_tx_type_feed_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0022_wallet_transaction_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wallettransaction",
+            name="receipt_height",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Wysokość paragonu"
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallettransaction",
+            name="receipt_preview",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to="receipts/previews/%Y/%m/%d/",
+                verbose_name="Podgląd paragonu",
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallettransaction",
+            name="receipt_thumbnail",
+            field=models.ImageField(
+                blank=True,
+                null=True,
+                upload_to="receipts/thumbnails/%Y/%m/%d/",
+                verbose_name="Miniatura paragonu",
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallettransaction",
+            name="receipt_width",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Szerokość paragonu"
+            ),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0023_receipt_derivatives"),
+        ("core", "0003_user_first_name_user_last_name"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExpenseRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.PositiveSmallIntegerField(verbose_name="Miesiąc")),
+                ("year", models.PositiveSmallIntegerField(verbose_name="Rok")),
+                (
+                    "category",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("FUEL", "Paliwo"),
+                            ("MATERIAL", "Materiały"),
+                            ("EQUIPMENT", "Narzędzia / Sprzęt"),
+                            ("FOOD", "Posiłki"),
+                            ("OTHER", "Inne"),
+                        ],
+                        max_length=20,
+                        verbose_name="Kategoria",
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[
+                            ("REFILL", "Zasilenie"),
+                            ("EXPENSE", "Wydatek"),
+                            ("ADVANCE", "Zaliczka"),
+                        ],
+                        max_length=20,
+                        verbose_name="Typ",
+                    ),
+                ),
+                (
+                    "total",
+                    models.DecimalField(
+                        decimal_places=2, default=0, max_digits=12, verbose_name="Suma"
+                    ),
+                ),
+                (
+                    "count",
+                    models.IntegerField(default=0, verbose_name="Liczba transakcji"),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="expense_rollups",
+                        to="core.organization",
+                        verbose_name="Organizacja",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="expense_rollups",
+                        to="business.project",
+                        verbose_name="Projekt",
+                    ),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="expense_rollups",
+                        to="business.wallet",
+                        verbose_name="Portfel",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Agregat wydatków",
+                "verbose_name_plural": "Agregaty wydatków",
+                "ordering": ["-year", "-month"],
+                "unique_together": {
+                    (
+                        "organization",
+                        "year",
+                        "month",
+                        "wallet",
+                        "project",
+                        "category",
+                        "type",
+                    )
+                },
+            },
+        ),
+    ]
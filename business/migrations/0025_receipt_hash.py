@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0024_expenserollup"),
+        ("core", "0003_user_first_name_user_last_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wallettransaction",
+            name="receipt_duplicate_of",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="business.wallettransaction",
+                verbose_name="Możliwy duplikat wydatku",
+            ),
+        ),
+        migrations.AddField(
+            model_name="wallettransaction",
+            name="receipt_hash",
+            field=models.CharField(
+                blank=True, max_length=16, verbose_name="Skrót percepcyjny paragonu"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["organization", "receipt_hash"], name="org_receipt_hash_idx"
+            ),
+        ),
+    ]
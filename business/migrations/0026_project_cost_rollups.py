@@ -0,0 +1,136 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def backfill_project_costs(apps, schema_editor):
+    Project = apps.get_model("business", "Project")
+    ProjectCostRollup = apps.get_model("business", "ProjectCostRollup")
+
+    for project in Project.objects.all():
+        rows = {}
+
+        def add(queryset, field, target, rows=rows):
+            monthly = (
+                queryset.annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+                .order_by()
+                .values_list("year", "month")
+                .annotate(total=Sum(field))
+            )
+            for year, month, total in monthly:
+                rows.setdefault((year, month), {})[target] = total
+
+        add(project.work_logs.all(), "hours", "hours")
+        add(project.expenses.filter(type="EXPENSE"), "amount", "expenses")
+        for year, month, cost in project.labour_costs.values_list(
+            "year", "month", "labour_cost"
+        ):
+            rows.setdefault((year, month), {})["labour_cost"] = cost
+
+        ProjectCostRollup.objects.bulk_create(
+            [
+                ProjectCostRollup(project=project, year=year, month=month, **totals)
+                for (year, month), totals in rows.items()
+            ]
+        )
+        project.hours_total = sum(r.get("hours", 0) for r in rows.values())
+        project.expenses_total = sum(r.get("expenses", 0) for r in rows.values())
+        project.labour_cost_total = sum(r.get("labour_cost", 0) for r in rows.values())
+        project.save(
+            update_fields=["hours_total", "expenses_total", "labour_cost_total"]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0025_receipt_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="expenses_total",
+            field=models.DecimalField(
+                decimal_places=2, default=0, max_digits=12, verbose_name="Suma wydatków"
+            ),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="hours_total",
+            field=models.DecimalField(
+                decimal_places=1, default=0, max_digits=10, verbose_name="Suma godzin"
+            ),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="labour_cost_total",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                max_digits=12,
+                verbose_name="Suma kosztów robocizny",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ProjectCostRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("month", models.PositiveSmallIntegerField(verbose_name="Miesiąc")),
+                ("year", models.PositiveSmallIntegerField(verbose_name="Rok")),
+                (
+                    "hours",
+                    models.DecimalField(
+                        decimal_places=1,
+                        default=0,
+                        max_digits=8,
+                        verbose_name="Suma godzin",
+                    ),
+                ),
+                (
+                    "expenses",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Suma wydatków",
+                    ),
+                ),
+                (
+                    "labour_cost",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Koszt robocizny",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cost_rollups",
+                        to="business.project",
+                        verbose_name="Projekt",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Koszty projektu w miesiącu",
+                "verbose_name_plural": "Koszty projektów w miesiącach",
+                "ordering": ["-year", "-month", "project"],
+                "unique_together": {("project", "year", "month")},
+            },
+        ),
+        migrations.RunPython(backfill_project_costs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-19 04:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0026_project_cost_rollups"),
+        ("core", "0003_user_first_name_user_last_name"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["project", "-date", "-id"], name="project_tx_feed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="worklog",
+            index=models.Index(
+                fields=["project", "-date", "-id"], name="worklog_project_feed_idx"
+            ),
+        ),
+    ]
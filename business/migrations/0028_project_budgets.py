@@ -0,0 +1,115 @@
+# Generated by Django 6.0.2 on 2026-10-19 05:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_daily_costs(apps, schema_editor):
+    WorkLog = apps.get_model("business", "WorkLog")
+    WalletTransaction = apps.get_model("business", "WalletTransaction")
+    ProjectDailyCost = apps.get_model("business", "ProjectDailyCost")
+
+    rows = {}
+    for project_id, day, total in (
+        WorkLog.objects.filter(project__isnull=False)
+        .order_by()
+        .values_list("project_id", "date")
+        .annotate(total=Sum("hours"))
+    ):
+        rows.setdefault((project_id, day), {})["hours"] = total
+    for project_id, day, total in (
+        WalletTransaction.objects.filter(project__isnull=False, type="EXPENSE")
+        .order_by()
+        .values_list("project_id", "date")
+        .annotate(total=Sum("amount"))
+    ):
+        rows.setdefault((project_id, day), {})["expenses"] = total
+
+    ProjectDailyCost.objects.bulk_create(
+        [
+            ProjectDailyCost(project_id=project_id, date=day, **totals)
+            for (project_id, day), totals in rows.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0027_project_entry_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="budget_amount",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                max_digits=12,
+                null=True,
+                verbose_name="Budżet kosztów (PLN)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="budget_hours",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=1,
+                max_digits=10,
+                null=True,
+                verbose_name="Budżet roboczogodzin",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ProjectDailyCost",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Data")),
+                (
+                    "hours",
+                    models.DecimalField(
+                        decimal_places=1,
+                        default=0,
+                        max_digits=8,
+                        verbose_name="Suma godzin",
+                    ),
+                ),
+                (
+                    "expenses",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Suma wydatków",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_costs",
+                        to="business.project",
+                        verbose_name="Projekt",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Koszty projektu w dniu",
+                "verbose_name_plural": "Koszty projektów w dniach",
+                "ordering": ["-date", "project"],
+                "unique_together": {("project", "date")},
+            },
+        ),
+        migrations.RunPython(backfill_daily_costs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 6.0.2 on 2026-10-19 05:07
+
+import re
+
+from django.db import migrations
+
+# Tokenizer unicode61 zdejmuje znaki diakrytyczne rozkładalne w Unicode
+# (ą, ę, ó, ś, ć, ń, ż, ź); "ł" nie ma rozkładu, więc zamieniamy je ręcznie.
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def fold(expression):
+    return f"replace(replace(coalesce({expression}, ''), 'ł', 'l'), 'Ł', 'L')"
+
+
+# tabela FTS: (tabela źródłowa, kolumny indeksowane, kolumny pomocnicze)
+INDEXES = {
+    "business_project_fts": (
+        "business_project",
+        {"name": "{row}.name", "address": "{row}.address"},
+        ["organization_id"],
+    ),
+    "business_worker_fts": (
+        "business_worker",
+        {
+            "name": "{row}.first_name || ' ' || {row}.last_name",
+            "address": "{row}.address",
+            "notes": "{row}.notes",
+        },
+        ["organization_id"],
+    ),
+    "business_transaction_fts": (
+        "business_wallettransaction",
+        {"description": "{row}.description"},
+        ["organization_id", "wallet_id"],
+    ),
+}
+
+
+def create_sql(fts, source, indexed, extra):
+    columns = [*indexed, *(f"{column} UNINDEXED" for column in extra)]
+    names = ", ".join(["rowid", *indexed, *extra])
+
+    def values(row):
+        return ", ".join(
+            [
+                f"{row}.id",
+                *(fold(expr.format(row=row)) for expr in indexed.values()),
+                *(f"{row}.{column}" for column in extra),
+            ]
+        )
+
+    watched = ", ".join(
+        sorted(
+            {
+                column
+                for expr in indexed.values()
+                for column in re.findall(r"\{row\}\.(\w+)", expr)
+            }
+            | set(extra)
+        )
+    )
+    return [
+        (
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({', '.join(columns)}, "
+            f"tokenize = '{TOKENIZER}')"
+        ),
+        f"INSERT INTO {fts} ({names}) SELECT {values(source)} FROM {source}",
+        (
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {fts} ({names}) VALUES ({values('new')}); END"
+        ),
+        (
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {source} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; END"
+        ),
+        (
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {watched} ON {source} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; "
+            f"INSERT INTO {fts} ({names}) VALUES ({values('new')}); END"
+        ),
+    ]
+
+
+def drop_sql(fts):
+    return [
+        f"DROP TRIGGER IF EXISTS {fts}_ai",
+        f"DROP TRIGGER IF EXISTS {fts}_ad",
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0028_project_budgets"),
+    ]
+
+    operations = [
+        migrations.RunSQL(create_sql(fts, *spec), drop_sql(fts))
+        for fts, spec in INDEXES.items()
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0.2 on 2026-10-19 05:59
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+def merge_duplicate_rollups(apps, schema_editor):
+    ExpenseRollup = apps.get_model("business", "ExpenseRollup")
+
+    kept = {}
+    for rollup in ExpenseRollup.objects.order_by("pk"):
+        key = (
+            rollup.organization_id,
+            rollup.year,
+            rollup.month,
+            rollup.wallet_id,
+            rollup.project_id,
+            rollup.category,
+            rollup.type,
+        )
+        target = kept.get(key)
+        if target is None:
+            kept[key] = rollup
+            continue
+        target.total += rollup.total
+        target.count += rollup.count
+        target.save(update_fields=["total", "count"])
+        rollup.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("business", "0029_search_index"),
+        ("core", "0003_user_first_name_user_last_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rollups, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="expenserollup",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="expenserollup",
+            constraint=models.UniqueConstraint(
+                models.F("organization"),
+                models.F("year"),
+                models.F("month"),
+                django.db.models.functions.comparison.Coalesce(
+                    "wallet", models.Value(0)
+                ),
+                django.db.models.functions.comparison.Coalesce(
+                    "project", models.Value(0)
+                ),
+                models.F("category"),
+                models.F("type"),
+                name="expense_rollup_key",
+            ),
+        ),
+    ]
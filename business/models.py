@@ -1,6 +1,10 @@
+from decimal import Decimal
+from typing import ClassVar
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -120,6 +124,11 @@ class Worker(models.Model):
                         end_date=today
                     )
 
+        if is_new or old_hired_at != self.hired_at or old_active != self.is_active:
+            from business.employment import invalidate_employment_index
+
+            invalidate_employment_index(self.organization_id)
+
 
 class EmploymentPeriod(models.Model):
     """Okres zatrudnienia pracownika."""
@@ -175,6 +184,29 @@ class Project(models.Model):
         default=False,
         help_text=_("Domyślny projekt do ewidencji czasu pracy"),
     )
+    budget_hours = models.DecimalField(
+        _("Budżet roboczogodzin"),
+        max_digits=10,
+        decimal_places=1,
+        null=True,
+        blank=True,
+    )
+    budget_amount = models.DecimalField(
+        _("Budżet kosztów (PLN)"),
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+    )
+    hours_total = models.DecimalField(
+        _("Suma godzin"), max_digits=10, decimal_places=1, default=0
+    )
+    expenses_total = models.DecimalField(
+        _("Suma wydatków"), max_digits=12, decimal_places=2, default=0
+    )
+    labour_cost_total = models.DecimalField(
+        _("Suma kosztów robocizny"), max_digits=12, decimal_places=2, default=0
+    )
     created_at = models.DateTimeField(_("Data utworzenia"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Data aktualizacji"), auto_now=True)
 
@@ -186,6 +218,36 @@ class Project(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    @classmethod
+    def apply_cost_entry(cls, project_id, date, hours=0, expenses=0, labour_cost=0):
+        """Dolicza godziny, wydatki i koszt robocizny do sum projektu.
+
+        Aktualizuje sumy na projekcie, zestawienie miesięczne i (dla godzin
+        i wydatków) dzienny szereg kosztów. Wartości ujemne odejmują wpis
+        (edycja, usunięcie). Sumy są zmieniane wyrażeniami F(), więc równoległe
+        zapisy się nie nadpisują.
+        """
+        if project_id is None:
+            return
+        hours = Decimal(str(hours))
+        expenses = Decimal(str(expenses))
+        labour_cost = Decimal(str(labour_cost))
+        cls.objects.filter(pk=project_id).update(
+            hours_total=models.F("hours_total") + hours,
+            expenses_total=models.F("expenses_total") + expenses,
+            labour_cost_total=models.F("labour_cost_total") + labour_cost,
+        )
+        ProjectCostRollup.apply_entry(project_id, date, hours, expenses, labour_cost)
+        if hours or expenses:
+            ProjectDailyCost.apply_entry(project_id, date, hours, expenses)
+
+    def delete(self, *args, **kwargs):
+        # Transakcje projektu zostają z project=NULL, więc ich agregaty trzeba
+        # dołączyć do wierszy bez projektu, zanim SET_NULL utworzy duplikaty klucza.
+        with transaction.atomic():
+            ExpenseRollup.detach_project(self.pk)
+            return super().delete(*args, **kwargs)
+
 
 class WorkLog(models.Model):
     """Wpis w ewidencji czasu pracy."""
@@ -235,10 +297,77 @@ class WorkLog(models.Model):
         verbose_name_plural = _("Wpisy czasu pracy")
         unique_together = ("worker", "date")
         ordering = ["-date", "worker"]
+        indexes = [
+            models.Index(
+                fields=["project", "-date", "-id"], name="worklog_project_feed_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.worker} - {self.date} ({self.hours}h)"
 
+    COST_ENTRY_FIELDS = ("project_id", "date", "hours")
+
+    def _stored_cost_entry(self):
+        if not self.pk:
+            return None
+        return WorkLog.objects.filter(pk=self.pk).values(*self.COST_ENTRY_FIELDS).first()
+
+    @staticmethod
+    def _apply_cost_entry(entry, sign):
+        Project.apply_cost_entry(
+            entry["project_id"], entry["date"], hours=Decimal(str(entry["hours"])) * sign
+        )
+
+    def _invalidate_worker_summaries(self):
+        from business.workers import invalidate_worker_summaries
+
+        invalidate_worker_summaries(self.organization_id)
+
+    @classmethod
+    def reassign_project(cls, queryset, project):
+        """Przepina wpisy na projekt (``update``) i przenosi ich godziny w sumach."""
+        with transaction.atomic():
+            rows = (
+                queryset.exclude(project=project)
+                .order_by()
+                .values("project_id", "date")
+                .annotate(total=models.Sum("hours"))
+            )
+            moved = {}
+            for row in rows:
+                Project.apply_cost_entry(
+                    row["project_id"], row["date"], hours=-row["total"]
+                )
+                moved[row["date"]] = moved.get(row["date"], 0) + row["total"]
+
+            updated = queryset.update(project=project)
+            for day, hours in moved.items():
+                Project.apply_cost_entry(project.pk, day, hours=hours)
+        return updated
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = self._stored_cost_entry()
+            super().save(*args, **kwargs)
+            current = {name: getattr(self, name) for name in self.COST_ENTRY_FIELDS}
+            current["date"] = models.DateField().to_python(current["date"])
+            if previous == current:
+                return
+            if previous:
+                self._apply_cost_entry(previous, sign=-1)
+            self._apply_cost_entry(current, sign=1)
+        self._invalidate_worker_summaries()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = self._stored_cost_entry()
+            result = super().delete(*args, **kwargs)
+            if previous:
+                self._apply_cost_entry(previous, sign=-1)
+        self._invalidate_worker_summaries()
+        return result
+
 
 class TimesheetHistory(models.Model):
     """Historia zmian ewidencji czasu pracy."""
@@ -300,6 +429,24 @@ class Wallet(models.Model):
         verbose_name=_("Organizacja"),
     )
     is_active = models.BooleanField(_("Aktywny"), default=True)
+    balance = models.DecimalField(
+        _("Saldo"), max_digits=12, decimal_places=2, default=0
+    )
+    refills_total = models.DecimalField(
+        _("Suma zasileń"), max_digits=12, decimal_places=2, default=0
+    )
+    expenses_total = models.DecimalField(
+        _("Suma wydatków"), max_digits=12, decimal_places=2, default=0
+    )
+    advances_total = models.DecimalField(
+        _("Suma zaliczek"), max_digits=12, decimal_places=2, default=0
+    )
+
+    LEDGER_FIELDS: ClassVar[dict[str, str]] = {
+        "REFILL": "refills_total",
+        "EXPENSE": "expenses_total",
+        "ADVANCE": "advances_total",
+    }
 
     class Meta:
         verbose_name = _("Portfel")
@@ -309,13 +456,38 @@ class Wallet(models.Model):
         return f"{self.user} ({self.get_current_balance()} PLN)"
 
     def get_current_balance(self):
-        """Oblicza aktualne saldo portfela (REFILL - EXPENSE - ADVANCE)."""
+        """Zwraca saldo portfela (REFILL - EXPENSE - ADVANCE).
+
+        Saldo jest aktualizowane w bazie przez F(), więc obiekt trzymany
+        od dłuższego czasu trzeba najpierw odświeżyć (``refresh_from_db``).
+        """
+        return self.balance
+
+    def calculate_ledger_totals(self) -> dict:
+        """Liczy saldo i sumy wprost z transakcji (do uzgadniania kolumn)."""
         totals = self.transactions.aggregate(
-            refills=models.Sum("amount", filter=models.Q(type="REFILL")),
-            expenses=models.Sum("amount", filter=models.Q(type="EXPENSE")),
-            advances=models.Sum("amount", filter=models.Q(type="ADVANCE")),
+            refills_total=models.Sum("amount", filter=models.Q(type="REFILL")),
+            expenses_total=models.Sum("amount", filter=models.Q(type="EXPENSE")),
+            advances_total=models.Sum("amount", filter=models.Q(type="ADVANCE")),
+        )
+        totals = {key: value or 0 for key, value in totals.items()}
+        totals["balance"] = (
+            totals["refills_total"] - totals["expenses_total"] - totals["advances_total"]
+        )
+        return totals
+
+    @classmethod
+    def apply_ledger_entry(cls, wallet_id, type, amount, sign=1):
+        """Atomowo uwzględnia transakcję (sign=1) lub ją wycofuje (sign=-1)."""
+        if not wallet_id or type not in cls.LEDGER_FIELDS:
+            return
+        amount = Decimal(str(amount)) * sign
+        delta = amount if type == "REFILL" else -amount
+        field = cls.LEDGER_FIELDS[type]
+        cls.objects.filter(pk=wallet_id).update(
+            balance=models.F("balance") + delta,
+            **{field: models.F(field) + amount},
         )
-        return (totals["refills"] or 0) - (totals["expenses"] or 0) - (totals["advances"] or 0)
 
 
 class WalletTransaction(models.Model):
@@ -380,6 +552,35 @@ class WalletTransaction(models.Model):
         null=True,
         blank=True,
     )
+    receipt_preview = models.ImageField(
+        _("Podgląd paragonu"),
+        upload_to="receipts/previews/%Y/%m/%d/",
+        null=True,
+        blank=True,
+    )
+    receipt_thumbnail = models.ImageField(
+        _("Miniatura paragonu"),
+        upload_to="receipts/thumbnails/%Y/%m/%d/",
+        null=True,
+        blank=True,
+    )
+    receipt_width = models.PositiveIntegerField(
+        _("Szerokość paragonu"), null=True, blank=True
+    )
+    receipt_height = models.PositiveIntegerField(
+        _("Wysokość paragonu"), null=True, blank=True
+    )
+    receipt_hash = models.CharField(
+        _("Skrót percepcyjny paragonu"), max_length=16, blank=True
+    )
+    receipt_duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name=_("Możliwy duplikat wydatku"),
+    )
     worker = models.ForeignKey(
         Worker,
         on_delete=models.SET_NULL,
@@ -393,10 +594,327 @@ class WalletTransaction(models.Model):
         verbose_name = _("Transakcja portfela")
         verbose_name_plural = _("Transakcje portfela")
         ordering = ["-date"]
+        indexes = [
+            models.Index(
+                fields=["wallet", "-date", "-id"], name="wallet_tx_feed_idx"
+            ),
+            models.Index(
+                fields=["wallet", "type", "-date", "-id"],
+                name="wallet_tx_type_feed_idx",
+            ),
+            models.Index(
+                fields=["organization", "-date", "-id"], name="org_tx_feed_idx"
+            ),
+            models.Index(
+                fields=["organization", "type", "-date", "-id"],
+                name="org_tx_type_feed_idx",
+            ),
+            models.Index(
+                fields=["organization", "receipt_hash"], name="org_receipt_hash_idx"
+            ),
+            models.Index(
+                fields=["project", "-date", "-id"], name="project_tx_feed_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.get_type_display()} - {self.amount} PLN ({self.date})"
 
+    LEDGER_ENTRY_FIELDS = (
+        "organization_id",
+        "wallet_id",
+        "project_id",
+        "type",
+        "category",
+        "amount",
+        "date",
+    )
+
+    def _stored_ledger_entry(self):
+        if not self.pk:
+            return None
+        return (
+            WalletTransaction.objects.filter(pk=self.pk)
+            .values(*self.LEDGER_ENTRY_FIELDS)
+            .first()
+        )
+
+    @staticmethod
+    def _apply_ledger_entry(entry, sign):
+        """Aktualizuje saldo portfela, zestawienia miesięczne i agregaty wydatków."""
+        Wallet.apply_ledger_entry(
+            entry["wallet_id"], entry["type"], entry["amount"], sign=sign
+        )
+        WalletMonthSnapshot.invalidate(entry["wallet_id"], entry["date"])
+        ExpenseRollup.apply_entry(entry, sign=sign)
+        if entry["type"] == WalletTransaction.Type.EXPENSE:
+            Project.apply_cost_entry(
+                entry["project_id"],
+                entry["date"],
+                expenses=Decimal(str(entry["amount"])) * sign,
+            )
+        elif entry["type"] == WalletTransaction.Type.ADVANCE:
+            from business.workers import invalidate_worker_summaries
+
+            invalidate_worker_summaries(entry["organization_id"])
+
+    @classmethod
+    def apply_bulk_ledger(cls, transactions):
+        """Uzupełnia salda, zestawienia i agregaty po ``bulk_create``.
+
+        ``bulk_create`` pomija ``save()``, więc wpisy są tu grupowane i każda
+        grupa (portfel/typ, klucz agregatu, projekt/dzień) kosztuje jedno
+        zapytanie.
+        """
+        wallet_totals = {}
+        rollups = {}
+        earliest = {}
+        for t in transactions:
+            date = models.DateField().to_python(t.date)
+            amount = Decimal(str(t.amount))
+            key = (t.wallet_id, t.type)
+            wallet_totals[key] = wallet_totals.get(key, 0) + amount
+            if t.wallet_id:
+                earliest[t.wallet_id] = min(date, earliest.get(t.wallet_id, date))
+            rollup_key = (
+                t.organization_id,
+                date.replace(day=1),
+                t.wallet_id,
+                t.project_id,
+                t.category,
+                t.type,
+            )
+            total, count = rollups.get(rollup_key, (0, 0))
+            rollups[rollup_key] = (total + amount, count + 1)
+
+        project_expenses = {}
+        for t in transactions:
+            if t.project_id and t.type == cls.Type.EXPENSE:
+                key = (t.project_id, models.DateField().to_python(t.date))
+                project_expenses[key] = project_expenses.get(key, 0) + Decimal(
+                    str(t.amount)
+                )
+
+        for (wallet_id, type), amount in wallet_totals.items():
+            Wallet.apply_ledger_entry(wallet_id, type, amount)
+        advance_organizations = {
+            t.organization_id for t in transactions if t.type == cls.Type.ADVANCE
+        }
+        if advance_organizations:
+            from business.workers import invalidate_worker_summaries
+
+            for organization_id in advance_organizations:
+                invalidate_worker_summaries(organization_id)
+        for (project_id, day), amount in project_expenses.items():
+            Project.apply_cost_entry(project_id, day, expenses=amount)
+        for wallet_id, date in earliest.items():
+            WalletMonthSnapshot.invalidate(wallet_id, date)
+        for key, (amount, count) in rollups.items():
+            organization_id, date, wallet_id, project_id, category, type = key
+            ExpenseRollup.apply_entry(
+                {
+                    "organization_id": organization_id,
+                    "wallet_id": wallet_id,
+                    "project_id": project_id,
+                    "type": type,
+                    "category": category,
+                    "amount": amount,
+                    "date": date,
+                },
+                count=count,
+            )
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = self._stored_ledger_entry()
+            super().save(*args, **kwargs)
+            current = {name: getattr(self, name) for name in self.LEDGER_ENTRY_FIELDS}
+            current["amount"] = Decimal(str(current["amount"]))
+            current["date"] = models.DateField().to_python(current["date"])
+            if previous == current:
+                return
+            if previous:
+                self._apply_ledger_entry(previous, sign=-1)
+            self._apply_ledger_entry(current, sign=1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = self._stored_ledger_entry()
+            result = super().delete(*args, **kwargs)
+            if previous:
+                self._apply_ledger_entry(previous, sign=-1)
+        return result
+
+
+class WalletMonthSnapshot(models.Model):
+    """Zamknięty miesiąc portfela: saldo otwarcia, sumy wg typu i kategorii."""
+
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name="month_snapshots",
+        verbose_name=_("Portfel"),
+    )
+    month = models.PositiveSmallIntegerField(_("Miesiąc"))
+    year = models.PositiveSmallIntegerField(_("Rok"))
+    opening_balance = models.DecimalField(
+        _("Saldo otwarcia"), max_digits=12, decimal_places=2, default=0
+    )
+    refills = models.DecimalField(
+        _("Zasilenia"), max_digits=12, decimal_places=2, default=0
+    )
+    expenses = models.DecimalField(
+        _("Wydatki"), max_digits=12, decimal_places=2, default=0
+    )
+    advances = models.DecimalField(
+        _("Zaliczki"), max_digits=12, decimal_places=2, default=0
+    )
+    closing_balance = models.DecimalField(
+        _("Saldo zamknięcia"), max_digits=12, decimal_places=2, default=0
+    )
+    expenses_by_category = models.JSONField(
+        _("Wydatki wg kategorii"), default=dict, blank=True
+    )
+    created_at = models.DateTimeField(_("Data utworzenia"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Miesięczne zestawienie portfela")
+        verbose_name_plural = _("Miesięczne zestawienia portfeli")
+        unique_together = ("wallet", "year", "month")
+        ordering = ["-year", "-month"]
+
+    def __str__(self) -> str:
+        return f"{self.wallet_id} - {self.month:02d}/{self.year} ({self.closing_balance} PLN)"
+
+    @classmethod
+    def invalidate(cls, wallet_id, date):
+        """Usuwa zestawienia od miesiąca zmienionej transakcji wzwyż.
+
+        Saldo otwarcia każdego kolejnego miesiąca zależy od poprzedniego,
+        więc wcześniejsze miesiące pozostają nietknięte.
+        """
+        if not wallet_id:
+            return
+        date = models.DateField().to_python(date)
+        cls.objects.filter(
+            models.Q(year__gt=date.year)
+            | models.Q(year=date.year, month__gte=date.month),
+            wallet_id=wallet_id,
+        ).delete()
+
+
+class ExpenseRollup(models.Model):
+    """Suma transakcji organizacji w miesiącu wg portfela, projektu, kategorii i typu."""
+
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="expense_rollups",
+        verbose_name=_("Organizacja"),
+    )
+    month = models.PositiveSmallIntegerField(_("Miesiąc"))
+    year = models.PositiveSmallIntegerField(_("Rok"))
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="expense_rollups",
+        verbose_name=_("Portfel"),
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="expense_rollups",
+        verbose_name=_("Projekt"),
+    )
+    category = models.CharField(
+        _("Kategoria"),
+        max_length=20,
+        choices=WalletTransaction.Category.choices,
+        blank=True,
+    )
+    type = models.CharField(
+        _("Typ"), max_length=20, choices=WalletTransaction.Type.choices
+    )
+    total = models.DecimalField(
+        _("Suma"), max_digits=12, decimal_places=2, default=0
+    )
+    count = models.IntegerField(_("Liczba transakcji"), default=0)
+
+    class Meta:
+        verbose_name = _("Agregat wydatków")
+        verbose_name_plural = _("Agregaty wydatków")
+        constraints = [
+            # Portfel i projekt mogą być NULL, a SQLite traktuje NULL jako
+            # różne wartości, więc klucz porównuje je po COALESCE.
+            models.UniqueConstraint(
+                "organization",
+                "year",
+                "month",
+                Coalesce("wallet", models.Value(0)),
+                Coalesce("project", models.Value(0)),
+                "category",
+                "type",
+                name="expense_rollup_key",
+            ),
+        ]
+        ordering = ["-year", "-month"]
+
+    def __str__(self) -> str:
+        return f"{self.organization} - {self.month:02d}/{self.year} {self.type} ({self.total} PLN)"
+
+    @classmethod
+    def apply_entry(cls, entry, sign=1, count=1):
+        """Dolicza transakcję do agregatu (sign=1) lub ją odejmuje (sign=-1).
+
+        ``count`` pozwala doliczyć od razu sumę kilku transakcji o tym samym kluczu.
+        """
+        date = models.DateField().to_python(entry["date"])
+        keys = {
+            "organization_id": entry["organization_id"],
+            "year": date.year,
+            "month": date.month,
+            "wallet_id": entry["wallet_id"],
+            "project_id": entry["project_id"],
+            "category": entry["category"] or "",
+            "type": entry["type"],
+        }
+        amount = Decimal(str(entry["amount"])) * sign
+        count = count * sign
+        rollups = cls.objects.filter(**keys)
+        updated = rollups.update(
+            total=models.F("total") + amount, count=models.F("count") + count
+        )
+        if not updated and sign > 0:
+            cls.objects.create(**keys, total=amount, count=count)
+        elif sign < 0:
+            rollups.filter(count__lte=0).delete()
+
+    @classmethod
+    def detach_project(cls, project_id):
+        """Przenosi agregaty projektu do wierszy bez projektu (przed jego usunięciem)."""
+        for rollup in cls.objects.filter(project_id=project_id):
+            merged = cls.objects.filter(
+                organization_id=rollup.organization_id,
+                year=rollup.year,
+                month=rollup.month,
+                wallet_id=rollup.wallet_id,
+                project__isnull=True,
+                category=rollup.category,
+                type=rollup.type,
+            ).update(
+                total=models.F("total") + rollup.total,
+                count=models.F("count") + rollup.count,
+            )
+            if merged:
+                rollup.delete()
+            else:
+                rollup.project = None
+                rollup.save(update_fields=["project"])
+
 
 class Vacation(models.Model):
     """Urlop pracownika."""
@@ -433,15 +951,14 @@ class Vacation(models.Model):
                 _("Data początkowa nie może być późniejsza niż data końcowa.")
             )
 
-        overlapping = Vacation.objects.filter(
-            worker=self.worker,
-            start_date__lte=self.end_date,
-            end_date__gte=self.start_date,
-        )
-        if self.pk:
-            overlapping = overlapping.exclude(pk=self.pk)
+        from business.vacations import VacationIndex
 
-        if overlapping.exists():
+        # Indeks można podpiąć z góry (np. przy sprawdzaniu wielu urlopów
+        # naraz); w przeciwnym razie wczytujemy tylko urlopy tego pracownika.
+        index = getattr(self, "vacation_index", None) or VacationIndex.for_worker(
+            self.worker_id, self.start_date, self.end_date
+        )
+        if index.overlapping(self.worker_id, self.start_date, self.end_date, self.pk):
             raise ValidationError(_("Pracownik ma już urlop w tym terminie."))
 
 
@@ -525,3 +1042,178 @@ class Payroll(models.Model):
 
     def __str__(self) -> str:
         return f"{self.worker} - {self.month:02d}/{self.year} ({self.get_status_display()})"
+
+
+class ProjectLabourCost(models.Model):
+    """Miesięczny koszt robocizny przypisany do projektu."""
+
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="project_labour_costs",
+        verbose_name=_("Organizacja"),
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name="labour_costs",
+        verbose_name=_("Projekt"),
+    )
+    month = models.PositiveSmallIntegerField(_("Miesiąc"))
+    year = models.PositiveSmallIntegerField(_("Rok"))
+    hours = models.DecimalField(
+        _("Suma godzin"), max_digits=8, decimal_places=1, default=0
+    )
+    labour_cost = models.DecimalField(
+        _("Koszt robocizny"), max_digits=12, decimal_places=2, default=0
+    )
+    updated_at = models.DateTimeField(_("Data aktualizacji"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Koszt robocizny projektu")
+        verbose_name_plural = _("Koszty robocizny projektów")
+        unique_together = ("project", "year", "month")
+        ordering = ["-year", "-month", "project"]
+
+    def __str__(self) -> str:
+        return f"{self.project} - {self.month:02d}/{self.year} ({self.labour_cost} PLN)"
+
+
+class ProjectCostRollup(models.Model):
+    """Godziny, wydatki i koszt robocizny projektu w miesiącu.
+
+    Aktualizowany przy zapisie wpisów czasu pracy, wydatków i przeliczeniu
+    kosztów robocizny; ``rebuild_project_costs`` odtwarza go od zera.
+    """
+
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name="cost_rollups",
+        verbose_name=_("Projekt"),
+    )
+    month = models.PositiveSmallIntegerField(_("Miesiąc"))
+    year = models.PositiveSmallIntegerField(_("Rok"))
+    hours = models.DecimalField(
+        _("Suma godzin"), max_digits=8, decimal_places=1, default=0
+    )
+    expenses = models.DecimalField(
+        _("Suma wydatków"), max_digits=12, decimal_places=2, default=0
+    )
+    labour_cost = models.DecimalField(
+        _("Koszt robocizny"), max_digits=12, decimal_places=2, default=0
+    )
+
+    class Meta:
+        verbose_name = _("Koszty projektu w miesiącu")
+        verbose_name_plural = _("Koszty projektów w miesiącach")
+        unique_together = ("project", "year", "month")
+        ordering = ["-year", "-month", "project"]
+
+    def __str__(self) -> str:
+        return f"{self.project} - {self.month:02d}/{self.year}"
+
+    @classmethod
+    def apply_entry(cls, project_id, date, hours=0, expenses=0, labour_cost=0):
+        date = models.DateField().to_python(date)
+        keys = {"project_id": project_id, "year": date.year, "month": date.month}
+        updated = cls.objects.filter(**keys).update(
+            hours=models.F("hours") + hours,
+            expenses=models.F("expenses") + expenses,
+            labour_cost=models.F("labour_cost") + labour_cost,
+        )
+        if not updated:
+            cls.objects.create(
+                **keys, hours=hours, expenses=expenses, labour_cost=labour_cost
+            )
+
+
+class ProjectDailyCost(models.Model):
+    """Godziny i wydatki projektu w danym dniu (szereg do tempa spalania budżetu)."""
+
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name="daily_costs",
+        verbose_name=_("Projekt"),
+    )
+    date = models.DateField(_("Data"))
+    hours = models.DecimalField(
+        _("Suma godzin"), max_digits=8, decimal_places=1, default=0
+    )
+    expenses = models.DecimalField(
+        _("Suma wydatków"), max_digits=12, decimal_places=2, default=0
+    )
+
+    class Meta:
+        verbose_name = _("Koszty projektu w dniu")
+        verbose_name_plural = _("Koszty projektów w dniach")
+        unique_together = ("project", "date")
+        ordering = ["-date", "project"]
+
+    def __str__(self) -> str:
+        return f"{self.project} - {self.date}"
+
+    @classmethod
+    def apply_entry(cls, project_id, date, hours=0, expenses=0):
+        date = models.DateField().to_python(date)
+        updated = cls.objects.filter(project_id=project_id, date=date).update(
+            hours=models.F("hours") + hours,
+            expenses=models.F("expenses") + expenses,
+        )
+        if not updated:
+            cls.objects.create(
+                project_id=project_id, date=date, hours=hours, expenses=expenses
+            )
+
+
+class PayrollMonthSummary(models.Model):
+    """Podsumowanie wypłat organizacji za miesiąc."""
+
+    class Status(models.TextChoices):
+        EMPTY = "EMPTY", _("Nie wygenerowano")
+        DRAFT = "DRAFT", _("W toku")
+        CLOSED = "CLOSED", _("Zamknięty")
+
+    organization = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name="payroll_summaries",
+        verbose_name=_("Organizacja"),
+    )
+    month = models.PositiveSmallIntegerField(_("Miesiąc"))
+    year = models.PositiveSmallIntegerField(_("Rok"))
+    status = models.CharField(
+        _("Status"), max_length=10, choices=Status.choices, default=Status.EMPTY
+    )
+    total_earned = models.DecimalField(
+        _("Wypracowano (Brutto)"), max_digits=12, decimal_places=2, default=0
+    )
+    total_bonuses = models.DecimalField(
+        _("Bonusy"), max_digits=12, decimal_places=2, default=0
+    )
+    total_advances = models.DecimalField(
+        _("Potrącone zaliczki"), max_digits=12, decimal_places=2, default=0
+    )
+    total_payout = models.DecimalField(
+        _("Do wypłaty (Netto)"), max_digits=12, decimal_places=2, default=0
+    )
+    updated_at = models.DateTimeField(_("Data aktualizacji"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Podsumowanie wypłat")
+        verbose_name_plural = _("Podsumowania wypłat")
+        unique_together = ("organization", "year", "month")
+        ordering = ["-year", "-month"]
+
+    def __str__(self) -> str:
+        return f"{self.organization} - {self.month:02d}/{self.year} ({self.status})"
+
+    def as_stats(self) -> dict:
+        return {
+            "total_earned": self.total_earned,
+            "total_bonuses": self.total_bonuses,
+            "total_payout": self.total_payout,
+            "total_advances": self.total_advances,
+            "status": self.status,
+        }
@@ -0,0 +1,466 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.utils.text import slugify
+
+from business.employment import get_employment_index
+from business.models import (
+    BonusDay,
+    Payroll,
+    PayrollMonthSummary,
+    Project,
+    ProjectLabourCost,
+    WalletTransaction,
+    Worker,
+    WorkLog,
+)
+from business.workers import invalidate_worker_summaries
+from core.models import Organization
+
+
+def calculate_worker_totals(organization, year, month, worker_ids=None):
+    """Liczy godziny, bonusy i zaliczki pracowników za miesiąc.
+
+    Każda wielkość pochodzi z osobnego zapytania grupującego, dzięki czemu
+    sumy godzin i zaliczek nie mnożą się przez złączenie tabel.
+    Zwraca słownik ``worker_id -> {"total_hours", "bonuses", "advances"}``.
+    """
+    logs = WorkLog.objects.filter(
+        organization=organization, date__year=year, date__month=month
+    )
+    advances = WalletTransaction.objects.filter(
+        organization=organization,
+        type=WalletTransaction.Type.ADVANCE,
+        worker__isnull=False,
+        date__year=year,
+        date__month=month,
+    )
+    if worker_ids is not None:
+        logs = logs.filter(worker_id__in=worker_ids)
+        advances = advances.filter(worker_id__in=worker_ids)
+
+    hours = dict(
+        logs.values("worker_id")
+        .annotate(total=Sum("hours"))
+        .values_list("worker_id", "total")
+    )
+    advance_sums = dict(
+        advances.values("worker_id")
+        .annotate(total=Sum("amount"))
+        .values_list("worker_id", "total")
+    )
+
+    bonus_map = dict(
+        BonusDay.objects.filter(
+            organization=organization, date__year=year, date__month=month
+        ).values_list("date", "amount")
+    )
+    bonuses = {}
+    if bonus_map:
+        bonus_logs = logs.filter(date__in=list(bonus_map), hours__gt=0).values_list(
+            "worker_id", "date"
+        )
+        for worker_id, log_date in bonus_logs:
+            bonuses[worker_id] = bonuses.get(worker_id, 0) + bonus_map[log_date]
+
+    return {
+        worker_id: {
+            "total_hours": hours.get(worker_id) or Decimal(0),
+            "bonuses": bonuses.get(worker_id, 0),
+            "advances": advance_sums.get(worker_id) or Decimal(0),
+        }
+        for worker_id in hours.keys() | advance_sums.keys()
+    }
+
+
+def fill_payroll(payroll, hourly_rate, totals):
+    """Uzupełnia kwoty wypłaty na podstawie stawki i sum miesięcznych."""
+    payroll.total_hours = totals["total_hours"]
+    payroll.hourly_rate_snapshot = hourly_rate
+    payroll.bonuses = totals["bonuses"]
+    payroll.gross_pay = totals["total_hours"] * hourly_rate + totals["bonuses"]
+    payroll.advances_deducted = totals["advances"]
+    payroll.net_pay = payroll.gross_pay - totals["advances"]
+    return payroll
+
+
+def generate_payrolls(organization, year, month):
+    """Tworzy lub przelicza wypłaty DRAFT za miesiąc.
+
+    Zwraca krotkę (liczba przeliczonych, liczba pominiętych zamkniętych).
+    """
+    totals = {
+        worker_id: worker_totals
+        for worker_id, worker_totals in calculate_worker_totals(
+            organization, year, month
+        ).items()
+        if worker_totals["total_hours"] > 0 or worker_totals["advances"] > 0
+    }
+    workers = Worker.objects.filter(organization=organization, id__in=list(totals))
+    existing_payrolls = {
+        p.worker_id: p
+        for p in Payroll.objects.filter(
+            organization=organization, year=year, month=month
+        )
+    }
+
+    generated_count = 0
+    skipped_count = 0
+    for worker in workers:
+        payroll = existing_payrolls.get(worker.id)
+        if payroll and payroll.status == Payroll.Status.CLOSED:
+            skipped_count += 1
+            continue
+
+        if payroll is None:
+            payroll = Payroll(
+                organization=organization,
+                worker=worker,
+                year=year,
+                month=month,
+                status=Payroll.Status.DRAFT,
+            )
+        fill_payroll(payroll, worker.hourly_rate, totals[worker.id])
+        payroll.save()
+        generated_count += 1
+
+    refresh_project_labour_costs(organization, year, month)
+    refresh_payroll_summary(organization, year, month)
+    return generated_count, skipped_count
+
+
+def get_unpaid_workers(organization, year, month, payrolls):
+    """Pracownicy zatrudnieni w miesiącu (wg okresów zatrudnienia) bez wypłaty.
+
+    Zwykle oznacza to brak wpisanych godzin; obejmuje też osoby, które
+    odeszły w trakcie miesiąca.
+    """
+    employed = get_employment_index(organization).employed_in_month(year, month)
+    paid = {payroll.worker_id for payroll in payrolls}
+    return list(
+        Worker.objects.filter(organization=organization, id__in=employed - paid)
+    )
+
+
+def refresh_project_labour_costs(organization, year, month):
+    """Przelicza koszt robocizny projektów za miesiąc.
+
+    Godziny są grupowane po (projekt, pracownik) w jednym zapytaniu, a stawką
+    jest ``hourly_rate_snapshot`` z wypłaty za ten miesiąc lub, gdy wypłaty
+    jeszcze nie ma, bieżąca stawka pracownika.
+    """
+    rates = dict(
+        Payroll.objects.filter(
+            organization=organization, year=year, month=month
+        ).values_list("worker_id", "hourly_rate_snapshot")
+    )
+    rows = (
+        WorkLog.objects.filter(
+            organization=organization,
+            project__isnull=False,
+            date__year=year,
+            date__month=month,
+        )
+        .values("project_id", "worker_id", "worker__hourly_rate")
+        .annotate(total=Sum("hours"))
+    )
+
+    costs = {}
+    for row in rows:
+        rate = rates.get(row["worker_id"], row["worker__hourly_rate"])
+        hours, cost = costs.get(row["project_id"], (Decimal(0), Decimal(0)))
+        costs[row["project_id"]] = (hours + row["total"], cost + row["total"] * rate)
+
+    month_start = date(year, month, 1)
+    with transaction.atomic():
+        previous = ProjectLabourCost.objects.filter(
+            organization=organization, year=year, month=month
+        )
+        for project_id, cost in previous.values_list("project_id", "labour_cost"):
+            Project.apply_cost_entry(project_id, month_start, labour_cost=-cost)
+        previous.delete()
+        ProjectLabourCost.objects.bulk_create(
+            [
+                ProjectLabourCost(
+                    organization=organization,
+                    project_id=project_id,
+                    year=year,
+                    month=month,
+                    hours=hours,
+                    labour_cost=cost,
+                )
+                for project_id, (hours, cost) in costs.items()
+            ]
+        )
+        for project_id, (_, cost) in costs.items():
+            Project.apply_cost_entry(project_id, month_start, labour_cost=cost)
+
+
+def summarize_payrolls(organization, year, month):
+    """Liczy sumy i status wypłat za miesiąc jednym zapytaniem agregującym."""
+    zero = Decimal(0)
+    totals = Payroll.objects.filter(
+        organization=organization, year=year, month=month
+    ).aggregate(
+        total_earned=Coalesce(Sum("gross_pay"), zero),
+        total_bonuses=Coalesce(Sum("bonuses"), zero),
+        total_payout=Coalesce(Sum("net_pay"), zero),
+        total_advances=Coalesce(Sum("advances_deducted"), zero),
+        drafts=Count("id", filter=Q(status=Payroll.Status.DRAFT)),
+        closed=Count("id", filter=Q(status=Payroll.Status.CLOSED)),
+    )
+
+    drafts = totals.pop("drafts")
+    closed = totals.pop("closed")
+    totals["status"] = PayrollMonthSummary.Status.EMPTY
+    if drafts:
+        totals["status"] = PayrollMonthSummary.Status.DRAFT
+    elif closed:
+        totals["status"] = PayrollMonthSummary.Status.CLOSED
+    return totals
+
+
+def worker_payroll_months(worker_ids):
+    """Miesiące (id organizacji, rok, miesiąc) z wypłatami lub godzinami pracowników.
+
+    Zbierane przed usunięciem pracowników, żeby po kaskadzie przeliczyć
+    ``refresh_payroll_months`` dane tych miesięcy.
+    """
+    months = set(
+        Payroll.objects.filter(worker_id__in=worker_ids).values_list(
+            "organization_id", "year", "month"
+        )
+    )
+    months.update(
+        WorkLog.objects.filter(worker_id__in=worker_ids)
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .order_by()
+        .values_list("organization_id", "year", "month")
+        .distinct()
+    )
+    return months
+
+
+def cascaded_advance_payrolls(worker_ids):
+    """Wypłaty innych pracowników z zaliczkami z portfeli usuwanych pracowników.
+
+    Zwraca czwórki (id organizacji, rok, miesiąc, id pracownika). Kaskada
+    usuwa te zaliczki razem z portfelem, więc wypłaty DRAFT pracowników,
+    którym je wydano, trzeba po usunięciu przeliczyć.
+    """
+    return set(
+        WalletTransaction.objects.filter(
+            wallet__user__worker_profile__in=worker_ids,
+            type=WalletTransaction.Type.ADVANCE,
+            worker__isnull=False,
+        )
+        .exclude(worker_id__in=worker_ids)
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .order_by()
+        .values_list("organization_id", "year", "month", "worker_id")
+        .distinct()
+    )
+
+
+def refresh_payroll_months(months, payrolls=()):
+    """Przelicza koszty robocizny projektów i podsumowania wypłat miesięcy.
+
+    ``payrolls`` to czwórki (id organizacji, rok, miesiąc, id pracownika),
+    których wypłaty DRAFT są wcześniej przeliczane.
+    """
+    drafts = {}
+    for organization_id, year, month, worker_id in payrolls:
+        drafts.setdefault((organization_id, year, month), []).append(worker_id)
+    months = set(months) | set(drafts)
+    organizations = Organization.objects.in_bulk(
+        {organization_id for organization_id, _, _ in months}
+    )
+    for key in sorted(months):
+        organization_id, year, month = key
+        organization = organizations[organization_id]
+        if key in drafts:
+            recalculate_draft_payrolls(organization, year, month, drafts[key])
+        refresh_project_labour_costs(organization, year, month)
+        refresh_payroll_summary(organization, year, month)
+
+
+def refresh_payroll_summary(organization, year, month):
+    """Zapisuje aktualne podsumowanie wypłat miesiąca i zwraca je jako słownik.
+
+    Wywoływane po każdym zapisie wypłat, więc unieważnia też podsumowania
+    pracowników.
+    """
+    summary, _ = PayrollMonthSummary.objects.update_or_create(
+        organization=organization,
+        year=year,
+        month=month,
+        defaults=summarize_payrolls(organization, year, month),
+    )
+    invalidate_worker_summaries(organization.pk)
+    return summary.as_stats()
+
+
+def get_payroll_summary(organization, year, month):
+    """Zwraca zapisane podsumowanie wypłat; brakujące wylicza i zapisuje."""
+    summary = PayrollMonthSummary.objects.filter(
+        organization=organization, year=year, month=month
+    ).first()
+    if summary is None:
+        return refresh_payroll_summary(organization, year, month)
+    return summary.as_stats()
+
+
+def recalculate_draft_payrolls(organization, year, month, worker_ids=None):
+    """Przelicza istniejące wypłaty DRAFT, opcjonalnie tylko wskazanych pracowników."""
+    drafts = Payroll.objects.filter(
+        organization=organization, year=year, month=month, status=Payroll.Status.DRAFT
+    ).select_related("worker")
+    if worker_ids is not None:
+        drafts = drafts.filter(worker_id__in=worker_ids)
+    drafts = list(drafts)
+    if not drafts:
+        return 0
+
+    totals = calculate_worker_totals(
+        organization, year, month, [p.worker_id for p in drafts]
+    )
+    empty = {"total_hours": Decimal(0), "bonuses": 0, "advances": Decimal(0)}
+    for payroll in drafts:
+        fill_payroll(
+            payroll, payroll.worker.hourly_rate, totals.get(payroll.worker_id, empty)
+        )
+        payroll.save()
+    return len(drafts)
+
+
+def get_payslips(organization, year, month):
+    """Zwraca dane pasków wypłat zamkniętych wypłat miesiąca.
+
+    Wynik zawiera wyłącznie proste typy, aby można go było przekazać do
+    renderowania PDF w osobnych procesach.
+    """
+    payrolls = list(
+        Payroll.objects.filter(
+            organization=organization,
+            year=year,
+            month=month,
+            status=Payroll.Status.CLOSED,
+        ).select_related("worker")
+    )
+    worker_ids = [p.worker_id for p in payrolls]
+
+    bonus_map = dict(
+        BonusDay.objects.filter(
+            organization=organization, date__year=year, date__month=month
+        ).values_list("date", "amount")
+    )
+    bonus_days = {}
+    if bonus_map:
+        bonus_logs = (
+            WorkLog.objects.filter(
+                organization=organization,
+                worker_id__in=worker_ids,
+                date__in=list(bonus_map),
+                hours__gt=0,
+            )
+            .order_by("date")
+            .values_list("worker_id", "date")
+        )
+        for worker_id, log_date in bonus_logs:
+            bonus_days.setdefault(worker_id, []).append(
+                (log_date.strftime("%d.%m.%Y"), Decimal(bonus_map[log_date]))
+            )
+
+    advances = {}
+    advance_rows = (
+        WalletTransaction.objects.filter(
+            organization=organization,
+            type=WalletTransaction.Type.ADVANCE,
+            worker_id__in=worker_ids,
+            date__year=year,
+            date__month=month,
+        )
+        .order_by("date", "id")
+        .values_list("worker_id", "date", "amount", "description")
+    )
+    for worker_id, advance_date, amount, description in advance_rows:
+        advances.setdefault(worker_id, []).append(
+            (advance_date.strftime("%d.%m.%Y"), amount, description or "")
+        )
+
+    return [
+        {
+            "filename": (
+                f"pasek_{p.worker_id}_{slugify(str(p.worker))}_{month:02d}_{year}.pdf"
+            ),
+            "org_name": organization.name,
+            "period": f"{month:02d}/{year}",
+            "worker_name": str(p.worker),
+            "total_hours": p.total_hours,
+            "hourly_rate": p.hourly_rate_snapshot,
+            "gross_pay": p.gross_pay,
+            "bonuses": p.bonuses,
+            "advances_deducted": p.advances_deducted,
+            "net_pay": p.net_pay,
+            "bonus_days": bonus_days.get(p.worker_id, []),
+            "advances": advances.get(p.worker_id, []),
+        }
+        for p in payrolls
+    ]
+
+
+class PayrollDirtySet:
+    """Zbiór wypłat (pracownik, rok, miesiąc) nieaktualnych po zapisach w żądaniu."""
+
+    ALL_WORKERS = None
+
+    def __init__(self):
+        self._months = {}
+        self._organizations = {}
+
+    def __bool__(self):
+        return bool(self._months)
+
+    def mark(self, organization, year, month, worker_id=ALL_WORKERS):
+        self._organizations[organization.pk] = organization
+        key = (organization.pk, year, month)
+        if worker_id is self.ALL_WORKERS:
+            self._months[key] = self.ALL_WORKERS
+            return
+        workers = self._months.setdefault(key, set())
+        if workers is not self.ALL_WORKERS:
+            workers.add(worker_id)
+
+    def flush(self):
+        """Przelicza wypłaty DRAFT dla zapamiętanych miesięcy i czyści zbiór."""
+        recalculated = 0
+        months, self._months = self._months, {}
+        for (organization_id, year, month), worker_ids in months.items():
+            organization = self._organizations[organization_id]
+            recalculated += recalculate_draft_payrolls(
+                organization,
+                year,
+                month,
+                None if worker_ids is self.ALL_WORKERS else list(worker_ids),
+            )
+            refresh_project_labour_costs(organization, year, month)
+            refresh_payroll_summary(organization, year, month)
+        return recalculated
+
+
+def mark_payroll_dirty(request, organization, year, month, worker_id=None):
+    """Oznacza wypłatę jako nieaktualną; bez worker_id cały miesiąc organizacji.
+
+    Przeliczenie wykonuje PayrollRecalcMiddleware po zakończeniu żądania.
+    Poza cyklem żądania (brak middleware) wypłaty są przeliczane od razu.
+    """
+    dirty = getattr(request, "dirty_payrolls", None)
+    if dirty is None:
+        dirty = PayrollDirtySet()
+        dirty.mark(organization, year, month, worker_id)
+        dirty.flush()
+        return
+    dirty.mark(organization, year, month, worker_id)
@@ -0,0 +1,191 @@
+import os
+from copy import deepcopy
+from functools import cache
+from io import BytesIO
+
+from fontTools import ttLib
+from fpdf import FPDF
+from fpdf.errors import FPDFException
+
+FONT_DIRS = (
+    "/usr/share/fonts/liberation-sans-fonts/",
+    "/usr/share/fonts/liberation/",
+)
+FONT_FAMILY = "Liberation"
+# Błędy fpdf2 (np. znak spoza czcionki) i odczytu plików czcionek.
+RENDER_ERRORS = (FPDFException, OSError)
+FONT_FILES = {
+    "": "LiberationSans-Regular.ttf",
+    "B": "LiberationSans-Bold.ttf",
+    "I": "LiberationSans-Italic.ttf",
+    "BI": "LiberationSans-BoldItalic.ttf",
+}
+
+
+class FontRegistry:
+    """Czcionki TTF parsowane raz na proces i współdzielone przez dokumenty PDF."""
+
+    def __init__(self, font_dir=None):
+        self.font_dir = font_dir
+        self.family = "helvetica"
+        self._fonts = {}
+        if not font_dir:
+            return
+
+        loader = FPDF()
+        for style, filename in FONT_FILES.items():
+            path = os.path.join(font_dir, filename)
+            if not os.path.exists(path):
+                continue
+            loaded_keys = set(loader.fonts)
+            loader.add_font(FONT_FAMILY, style, path)
+            with open(path, "rb") as f:
+                data = f.read()
+            for fontkey in set(loader.fonts) - loaded_keys:
+                self._fonts[fontkey] = (loader.fonts[fontkey], data)
+
+        if self._fonts:
+            self.family = FONT_FAMILY
+
+    def install(self, pdf):
+        """Rejestruje czcionki w dokumencie i zwraca nazwę rodziny do set_font."""
+        for fontkey, (font, data) in self._fonts.items():
+            # Metryki i cmap są współdzielone, ale fpdf2 przy zapisie wycina
+            # podzbiór glifów bezpośrednio w obiekcie fontTools, więc każdy
+            # dokument dostaje własny (leniwy) uchwyt do bajtów czcionki.
+            doc_font = deepcopy(font)
+            doc_font.i = len(pdf.fonts) + 1
+            doc_font.ttfont = ttLib.TTFont(
+                BytesIO(data), recalcTimestamp=False, lazy=True
+            )
+            doc_font._hbfont = None
+            pdf.fonts[fontkey] = doc_font
+        return self.family
+
+
+@cache
+def get_font_registry(font_dir=None):
+    """Zwraca wspólny dla procesu rejestr czcionek (wyszukiwany i parsowany raz).
+
+    Jawny ``font_dir`` pomija wyszukiwanie w ``FONT_DIRS``.
+    """
+    if font_dir:
+        return FontRegistry(font_dir)
+    for candidate in FONT_DIRS:
+        if os.path.exists(candidate):
+            return FontRegistry(candidate)
+    return FontRegistry()
+
+
+def font_dir_for_workers():
+    """Katalog czcionek bieżącego rejestru, przekazywany jawnie do procesów puli.
+
+    Procesy startowane przez spawn lub forkserver (domyślny od Pythona 3.14)
+    nie dziedziczą stanu procesu głównego, więc same by go nie znalazły.
+    """
+    return get_font_registry().font_dir
+
+
+class PayrollPDF(FPDF):
+    """Prosty generator PDF dla listy płac."""
+
+    document_title = "Lista płac"
+
+    def __init__(self, org_name, period_str, font_registry=None):
+        super().__init__()
+        self.org_name = org_name
+        self.period_str = period_str
+        self.font_name = (font_registry or get_font_registry()).install(self)
+
+    def header(self):
+        self.set_font(self.font_name, "B", 16)
+        self.cell(0, 10, f"{self.document_title} - {self.period_str}", align="C")
+        self.ln(10)
+        self.set_font(self.font_name, "", 12)
+        self.cell(0, 10, self.org_name, align="C")
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font(self.font_name, "I", 8)
+        self.cell(0, 10, f"Strona {self.page_no()}", align="C")
+
+
+class PayslipPDF(PayrollPDF):
+    """Pasek wypłaty pojedynczego pracownika."""
+
+    document_title = "Pasek wypłaty"
+
+
+class PayslipRenderError(Exception):
+    """Błąd renderowania paska wypłaty.
+
+    Wyjątki fpdf2 nie zawsze dają się zserializować, więc z procesu roboczego
+    wraca ten wyjątek z samym komunikatem zamiast zepsutej puli procesów.
+    """
+
+
+def render_payslip(payslip, font_dir=None):
+    """Renderuje pasek wypłaty do bajtów PDF.
+
+    Przyjmuje wyłącznie proste dane (bez obiektów ORM), dzięki czemu może być
+    wywoływana w osobnym procesie. Zwraca krotkę (nazwa pliku, bajty PDF).
+    """
+    font_registry = get_font_registry(font_dir) if font_dir else None
+    try:
+        return _render_payslip(payslip, font_registry)
+    except RENDER_ERRORS as exc:
+        raise PayslipRenderError(f"{payslip['filename']}: {exc}") from None
+
+
+def _render_payslip(payslip, font_registry):
+    pdf = PayslipPDF(payslip["org_name"], payslip["period"], font_registry)
+    pdf.add_page()
+
+    pdf.set_font(pdf.font_name, "B", 13)
+    pdf.cell(0, 10, payslip["worker_name"])
+    pdf.ln(12)
+
+    pdf.set_font(pdf.font_name, "", 10)
+    rows = [
+        ("Godziny", f"{payslip['total_hours']}"),
+        ("Stawka (PLN/h)", f"{payslip['hourly_rate']}"),
+        ("Wypracowano (brutto)", f"{payslip['gross_pay']:.2f}"),
+        ("Bonusy", f"{payslip['bonuses']:.2f}"),
+        ("Potrącone zaliczki", f"{payslip['advances_deducted']:.2f}"),
+    ]
+    for label, value in rows:
+        pdf.cell(120, 8, label, border=1)
+        pdf.cell(50, 8, value, border=1, align="R")
+        pdf.ln()
+    pdf.set_font(pdf.font_name, "B", 10)
+    pdf.cell(120, 8, "Do wypłaty", border=1)
+    pdf.cell(50, 8, f"{payslip['net_pay']:.2f}", border=1, align="R")
+    pdf.ln(14)
+
+    sections = [
+        ("Dni premiowe", ("Data", "Kwota"), payslip["bonus_days"]),
+        ("Zaliczki", ("Data", "Kwota", "Opis"), payslip["advances"]),
+    ]
+    for heading, columns, entries in sections:
+        pdf.set_font(pdf.font_name, "B", 11)
+        pdf.cell(0, 8, heading)
+        pdf.ln(9)
+        pdf.set_font(pdf.font_name, "", 10)
+        if not entries:
+            pdf.cell(0, 8, "Brak")
+            pdf.ln(10)
+            continue
+        widths = (40, 40, 90)[: len(columns)]
+        for column, width in zip(columns, widths):
+            pdf.cell(width, 8, column, border=1, align="C")
+        pdf.ln()
+        for entry in entries:
+            pdf.cell(widths[0], 8, entry[0], border=1)
+            pdf.cell(widths[1], 8, f"{entry[1]:.2f}", border=1, align="R")
+            if len(columns) > 2:
+                pdf.cell(widths[2], 8, entry[2][:50], border=1)
+            pdf.ln()
+        pdf.ln(4)
+
+    return payslip["filename"], bytes(pdf.output())
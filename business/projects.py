@@ -0,0 +1,254 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Case,
+    DecimalField,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+
+from business.models import (
+    ExpenseRollup,
+    Project,
+    ProjectCostRollup,
+    ProjectDailyCost,
+    ProjectLabourCost,
+    WalletTransaction,
+    WorkLog,
+)
+from business.wallets import get_transaction_page
+
+PROJECT_ENTRIES_PAGE_SIZE = 25
+PROJECT_CATALOG_TIMEOUT = 60 * 60
+
+
+def _catalog_key(organization_id):
+    return f"business:project-catalog:{organization_id}"
+
+
+def get_project_catalog(organization):
+    """Projekty organizacji do list wyboru: słowniki id, name, status, is_default.
+
+    Kolejność: projekt domyślny, aktywne, planowane, zakończone, a w grupie
+    po nazwie. Lista zmienia się rzadko, więc trzymamy ją w cache i
+    unieważniamy przy zapisie lub usunięciu projektu
+    (``invalidate_project_catalog``); przy kilku procesach aplikacji
+    natychmiastowe unieważnienie wymaga współdzielonego backendu cache.
+    """
+    key = _catalog_key(organization.pk)
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = list(
+            Project.objects.filter(organization=organization)
+            .annotate(
+                status_order=Case(
+                    When(status=Project.Status.ACTIVE, then=1),
+                    When(status=Project.Status.PLANNED, then=2),
+                    When(status=Project.Status.COMPLETED, then=3),
+                    default=4,
+                    output_field=IntegerField(),
+                )
+            )
+            .order_by("-is_default", "status_order", "name")
+            .values("id", "name", "status", "is_default")
+        )
+        cache.set(key, catalog, PROJECT_CATALOG_TIMEOUT)
+    return catalog
+
+
+def get_open_projects(organization):
+    """Projekty do przypisywania czasu pracy: bez domyślnego i zakończonych."""
+    return [
+        project
+        for project in get_project_catalog(organization)
+        if not project["is_default"] and project["status"] != Project.Status.COMPLETED
+    ]
+
+
+def invalidate_project_catalog(organization_id):
+    cache.delete(_catalog_key(organization_id))
+
+
+def _monthly(queryset, field):
+    return (
+        queryset.filter(project__isnull=False)
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .order_by()
+        .values_list("project_id", "year", "month")
+        .annotate(total=Sum(field))
+    )
+
+
+def _daily(queryset, field):
+    return (
+        queryset.filter(project__isnull=False)
+        .order_by()
+        .values_list("project_id", "date")
+        .annotate(total=Sum(field))
+    )
+
+
+def withdraw_project_costs(logs=None, transactions=None):
+    """Odejmuje z sum projektów wpisy czasu pracy i wydatki usuwane kaskadowo.
+
+    Kasowanie pracownika, konta lub portfela usuwa powiązane wpisy przez
+    kolektor ORM, z pominięciem ich ``delete``, więc sumy trzeba wycofać
+    wcześniej, w tej samej transakcji.
+    """
+    if logs is not None:
+        for project_id, day, total in _daily(logs, "hours"):
+            Project.apply_cost_entry(project_id, day, hours=-total)
+    if transactions is not None:
+        expenses = transactions.filter(type=WalletTransaction.Type.EXPENSE)
+        for project_id, day, total in _daily(expenses, "amount"):
+            Project.apply_cost_entry(project_id, day, expenses=-total)
+
+
+def rebuild_project_costs(organization=None):
+    """Przelicza od zera miesięczne i dzienne koszty projektów oraz sumy na projektach.
+
+    Służy do zasilenia danych historycznych i naprawy rozbieżności; na co dzień
+    sumy aktualizuje zapis wpisów czasu pracy, wydatków i kosztów robocizny.
+    Zwraca liczbę zapisanych wierszy miesięcznych.
+    """
+    projects = Project.objects.all()
+    logs = WorkLog.objects.all()
+    expenses = WalletTransaction.objects.filter(type=WalletTransaction.Type.EXPENSE)
+    labour = ProjectLabourCost.objects.all()
+    if organization is not None:
+        projects = projects.filter(organization=organization)
+        logs = logs.filter(organization=organization)
+        expenses = expenses.filter(organization=organization)
+        labour = labour.filter(organization=organization)
+
+    rows = {}
+
+    def row(project_id, year, month):
+        return rows.setdefault(
+            (project_id, year, month),
+            {"hours": Decimal(0), "expenses": Decimal(0), "labour_cost": Decimal(0)},
+        )
+
+    for project_id, year, month, total in _monthly(logs, "hours"):
+        row(project_id, year, month)["hours"] += total
+    for project_id, year, month, total in _monthly(expenses, "amount"):
+        row(project_id, year, month)["expenses"] += total
+    for project_id, year, month, total in labour.values_list(
+        "project_id", "year", "month", "labour_cost"
+    ):
+        row(project_id, year, month)["labour_cost"] += total
+
+    days = {}
+    for project_id, day, total in _daily(logs, "hours"):
+        days.setdefault(
+            (project_id, day), {"hours": Decimal(0), "expenses": Decimal(0)}
+        )["hours"] += total
+    for project_id, day, total in _daily(expenses, "amount"):
+        days.setdefault(
+            (project_id, day), {"hours": Decimal(0), "expenses": Decimal(0)}
+        )["expenses"] += total
+
+    def rollup_sum(field):
+        return Coalesce(
+            Subquery(
+                ProjectCostRollup.objects.filter(project=OuterRef("pk"))
+                .order_by()
+                .values("project")
+                .annotate(total=Sum(field))
+                .values("total")
+            ),
+            Value(0),
+            output_field=DecimalField(),
+        )
+
+    with transaction.atomic():
+        ProjectCostRollup.objects.filter(project__in=projects).delete()
+        ProjectCostRollup.objects.bulk_create(
+            [
+                ProjectCostRollup(
+                    project_id=project_id, year=year, month=month, **totals
+                )
+                for (project_id, year, month), totals in rows.items()
+            ],
+            batch_size=1000,
+        )
+        ProjectDailyCost.objects.filter(project__in=projects).delete()
+        ProjectDailyCost.objects.bulk_create(
+            [
+                ProjectDailyCost(project_id=project_id, date=day, **totals)
+                for (project_id, day), totals in days.items()
+            ],
+            batch_size=1000,
+        )
+        projects.update(
+            hours_total=rollup_sum("hours"),
+            expenses_total=rollup_sum("expenses"),
+            labour_cost_total=rollup_sum("labour_cost"),
+        )
+    return len(rows)
+
+
+def get_project_breakdown(project):
+    """Zestawienia do szczegółów projektu: miesiące, pracownicy i kategorie.
+
+    Każde zestawienie to jedno zapytanie grupujące (miesiące i kategorie
+    czytane z agregatów), więc rozmiar odpowiedzi nie rośnie z liczbą wpisów.
+    """
+    monthly_summary = [
+        {
+            "month": date(row.year, row.month, 1),
+            "total_hours": row.hours,
+            "total_expense": row.expenses,
+            "total_labour_cost": row.labour_cost,
+        }
+        for row in project.cost_rollups.order_by("-year", "-month")
+    ]
+    worker_hours = (
+        project.work_logs.order_by()
+        .values("worker_id", "worker__first_name", "worker__last_name")
+        .annotate(total_hours=Sum("hours"))
+        .order_by("-total_hours", "worker__last_name")
+    )
+    categories = dict(WalletTransaction.Category.choices)
+    expense_categories = [
+        {
+            "category": row["category"],
+            "label": categories.get(row["category"], "Bez kategorii"),
+            "total": row["total"],
+        }
+        for row in ExpenseRollup.objects.filter(
+            project=project, type=WalletTransaction.Type.EXPENSE
+        )
+        .order_by()
+        .values("category")
+        .annotate(total=Sum("total"))
+        .order_by("-total")
+        if row["total"]
+    ]
+    return {
+        "monthly_summary": monthly_summary,
+        "worker_hours": list(worker_hours),
+        "expense_categories": expense_categories,
+    }
+
+
+def get_project_entries(project, kind, cursor=None):
+    """Strona wpisów czasu pracy (``logs``) lub wydatków projektu od najnowszych.
+
+    Stronicowanie kluczem (date, id) jak w historii transakcji portfela.
+    """
+    if kind == "logs":
+        queryset = project.work_logs.select_related("worker")
+    else:
+        queryset = project.expenses.filter(
+            type=WalletTransaction.Type.EXPENSE
+        ).select_related("wallet__user__worker_profile")
+    return get_transaction_page(queryset, cursor, PROJECT_ENTRIES_PAGE_SIZE)
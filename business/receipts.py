@@ -0,0 +1,420 @@
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from PIL import Image, ImageOps
+
+from business.models import WalletTransaction
+
+PREVIEW_SIZE = (1600, 1600)
+THUMBNAIL_SIZE = (160, 160)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 90
+
+RECEIPT_VARIANTS = ("preview", "thumbnail")
+RECEIPT_CACHE_MAX_AGE = 60 * 60 * 24
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+HASH_SIZE = 8
+HASH_BANDS = 8
+DUPLICATE_HASH_DISTANCE = 6
+HASH_INDEX_MAX_AGE = 5 * 60
+
+
+def _encode(image, format, **options):
+    buffer = BytesIO()
+    image.save(buffer, format=format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _encode_webp(image, size):
+    resized = image.copy()
+    resized.thumbnail(size, Image.Resampling.LANCZOS)
+    return _encode(resized, "WEBP", quality=WEBP_QUALITY, method=4)
+
+
+def _encode_original(image, format):
+    """Zapisuje oryginał ponownie, już obrócony i bez metadanych (EXIF, GPS)."""
+    if format == "JPEG":
+        return _encode(
+            image.convert("RGB"), "JPEG", quality=JPEG_QUALITY, optimize=True
+        )
+    if format == "PNG":
+        return _encode(image, "PNG", optimize=True)
+    return None
+
+
+def image_hash(image):
+    """Skrót percepcyjny dHash (64 bity, 16 znaków hex).
+
+    Porównuje jasność sąsiednich pikseli pomniejszonego obrazu, więc dwa
+    zdjęcia tego samego paragonu (inna kompresja, rozmiar, lekkie światło)
+    różnią się najwyżej kilkoma bitami.
+    """
+    pixels = (
+        image.convert("L")
+        .resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+        .tobytes()
+    )
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            value = (value << 1) | (left > pixels[row * (HASH_SIZE + 1) + col + 1])
+    return f"{value:016x}"
+
+
+def compute_receipt_hash(data):
+    """Liczy skrót zdjęcia z surowych bajtów (bez dekodowania pełnej rozdzielczości)."""
+    try:
+        with Image.open(BytesIO(data)) as source:
+            source.draft("L", (HASH_SIZE * 16, HASH_SIZE * 16))
+            return image_hash(ImageOps.exif_transpose(source))
+    except OSError:
+        return ""
+
+
+def hamming_distance(first, second):
+    return (int(first, 16) ^ int(second, 16)).bit_count()
+
+
+class ReceiptHashIndex:
+    """Indeks skrótów paragonów organizacji w pamięci.
+
+    Skrót jest dzielony na ``HASH_BANDS`` pasm po 8 bitów; dwa skróty różniące
+    się o mniej niż ``HASH_BANDS`` bitów mają (z zasady szufladkowej) co najmniej
+    jedno identyczne pasmo, więc porównywane są tylko skróty z tych samych
+    kubełków zamiast wszystkich zdjęć organizacji.
+    """
+
+    def __init__(self):
+        self.buckets = defaultdict(set)
+        self.last_id = 0
+        self.built_at = time.monotonic()
+
+    @staticmethod
+    def bands(value):
+        width = len(value) // HASH_BANDS
+        return [(i, value[i * width : (i + 1) * width]) for i in range(HASH_BANDS)]
+
+    def add(self, transaction_id, value):
+        for band in self.bands(value):
+            self.buckets[band].add((transaction_id, value))
+
+    def nearest(self, value, max_distance=DUPLICATE_HASH_DISTANCE):
+        """Zwraca [(odległość, id transakcji)] posortowane od najbliższych."""
+        candidates = set()
+        for band in self.bands(value):
+            candidates |= self.buckets.get(band, set())
+        matches = {}
+        for transaction_id, other in candidates:
+            distance = hamming_distance(value, other)
+            if distance <= max_distance:
+                matches[transaction_id] = min(distance, matches.get(transaction_id, 64))
+        return sorted((d, pk) for pk, d in matches.items())
+
+
+_hash_indexes = {}
+_hash_indexes_lock = threading.Lock()
+
+
+def get_receipt_hash_index(organization_id):
+    """Zwraca indeks skrótów organizacji, dociągając z bazy tylko nowe wiersze.
+
+    Indeks żyje w pamięci procesu; co ``HASH_INDEX_MAX_AGE`` sekund jest
+    budowany od nowa, żeby uwzględnić skróty zmienione w innych procesach.
+    """
+    with _hash_indexes_lock:
+        index = _hash_indexes.get(organization_id)
+        if index is None or time.monotonic() - index.built_at > HASH_INDEX_MAX_AGE:
+            index = _hash_indexes[organization_id] = ReceiptHashIndex()
+        rows = (
+            WalletTransaction.objects.filter(
+                organization_id=organization_id, pk__gt=index.last_id
+            )
+            .exclude(receipt_hash="")
+            .values_list("pk", "receipt_hash")
+        )
+        for transaction_id, value in rows:
+            index.add(transaction_id, value)
+            index.last_id = max(index.last_id, transaction_id)
+        return index
+
+
+def find_duplicate_receipt(wallet_transaction):
+    """Zwraca najbliższy starszy wydatek z podobnym zdjęciem paragonu lub None.
+
+    Kandydaci z indeksu są sprawdzani w bazie, bo w międzyczasie mogli zostać
+    usunięci albo mieć podmienione zdjęcie.
+    """
+    value = wallet_transaction.receipt_hash
+    if not value:
+        return None
+    index = get_receipt_hash_index(wallet_transaction.organization_id)
+    for _, transaction_id in index.nearest(value):
+        if transaction_id >= wallet_transaction.pk:
+            continue
+        candidate = (
+            WalletTransaction.objects.filter(
+                pk=transaction_id,
+                organization_id=wallet_transaction.organization_id,
+                type=WalletTransaction.Type.EXPENSE,
+            )
+            .exclude(receipt_hash="")
+            .first()
+        )
+        if candidate and hamming_distance(value, candidate.receipt_hash) <= (
+            DUPLICATE_HASH_DISTANCE
+        ):
+            return candidate
+    return None
+
+
+def hash_receipt(wallet_transaction, value):
+    """Zapisuje skrót zdjęcia i oznacza wydatek, jeśli wygląda na duplikat.
+
+    ``value`` to skrót albo przyszły wynik (``Future``) liczenia go w puli
+    wątków. Zwraca znaleziony duplikat lub None.
+    """
+    if hasattr(value, "result"):
+        value = value.result()
+    if not value:
+        return None
+
+    wallet_transaction.receipt_hash = value
+    duplicate = find_duplicate_receipt(wallet_transaction)
+    wallet_transaction.receipt_duplicate_of = duplicate
+    WalletTransaction.objects.filter(pk=wallet_transaction.pk).update(
+        receipt_hash=value, receipt_duplicate_of=duplicate
+    )
+    get_receipt_hash_index(wallet_transaction.organization_id).add(
+        wallet_transaction.pk, value
+    )
+    return duplicate
+
+
+def submit_receipt_hash(data):
+    """Liczy skrót w puli wątków paragonów (lub od razu, gdy pula jest wyłączona)."""
+    if settings.RECEIPT_PROCESSING_THREADS < 1:
+        return compute_receipt_hash(data)
+    return get_receipt_executor().submit(compute_receipt_hash, data)
+
+
+def clear_receipt_derivatives(wallet_transaction):
+    """Zeruje podgląd i miniaturę po podmianie zdjęcia (do czasu przetworzenia)."""
+    wallet_transaction.receipt_preview = None
+    wallet_transaction.receipt_thumbnail = None
+    wallet_transaction.receipt_width = None
+    wallet_transaction.receipt_height = None
+    wallet_transaction.receipt_hash = ""
+    wallet_transaction.receipt_duplicate_of = None
+
+
+def process_receipt(transaction_id):
+    """Normalizuje zdjęcie paragonu i zapisuje podgląd WebP oraz miniaturę.
+
+    Orientacja z EXIF jest nakładana na piksele, a metadane usuwane również
+    z oryginału. Wynik jest zapisywany przez ``update()`` tylko wtedy, gdy
+    w międzyczasie nie podmieniono zdjęcia. Skrót jest liczony tylko dla
+    wydatków, które go jeszcze nie mają (np. po podmianie zdjęcia), i od razu
+    trafia do indeksu duplikatów. Zwraca True po zapisaniu wyników.
+    """
+    receipt = WalletTransaction.objects.filter(pk=transaction_id).first()
+    if receipt is None or not receipt.receipt_image:
+        return False
+
+    source_name = receipt.receipt_image.name
+    try:
+        with receipt.receipt_image.open("rb") as f, Image.open(f) as source:
+            source_format = source.format
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except OSError:
+        return False
+
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    image.info = {}
+
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    storage = receipt.receipt_image.storage
+    written = []
+
+    original = _encode_original(image, source_format)
+    if original is not None:
+        receipt.receipt_image.save(os.path.basename(source_name), original, save=False)
+        written.append(receipt.receipt_image.name)
+    receipt.receipt_preview.save(
+        f"{stem}.webp", _encode_webp(image, PREVIEW_SIZE), save=False
+    )
+    written.append(receipt.receipt_preview.name)
+    receipt.receipt_thumbnail.save(
+        f"{stem}.webp", _encode_webp(image, THUMBNAIL_SIZE), save=False
+    )
+    written.append(receipt.receipt_thumbnail.name)
+
+    updated = WalletTransaction.objects.filter(
+        pk=transaction_id, receipt_image=source_name
+    ).update(
+        receipt_image=receipt.receipt_image.name,
+        receipt_preview=receipt.receipt_preview.name,
+        receipt_thumbnail=receipt.receipt_thumbnail.name,
+        receipt_width=image.width,
+        receipt_height=image.height,
+    )
+    if not updated:
+        for name in written:
+            storage.delete(name)
+        return False
+
+    if not receipt.receipt_hash:
+        value = image_hash(image)
+        if WalletTransaction.objects.filter(
+            pk=transaction_id, receipt_image=receipt.receipt_image.name, receipt_hash=""
+        ).update(receipt_hash=value):
+            get_receipt_hash_index(receipt.organization_id).add(transaction_id, value)
+
+    if original is not None:
+        storage.delete(source_name)
+    return True
+
+
+def _process_receipt_in_thread(transaction_id):
+    try:
+        return process_receipt(transaction_id)
+    finally:
+        connection.close()
+
+
+@cache
+def get_receipt_executor():
+    """Wspólna pula wątków przetwarzających zdjęcia paragonów."""
+    return ThreadPoolExecutor(
+        max_workers=settings.RECEIPT_PROCESSING_THREADS,
+        thread_name_prefix="receipts",
+    )
+
+
+def schedule_receipt_processing(wallet_transaction):
+    """Zleca przetworzenie paragonu po zatwierdzeniu bieżącej transakcji bazy."""
+    if not wallet_transaction.receipt_image:
+        return
+
+    transaction_id = wallet_transaction.pk
+    if settings.RECEIPT_PROCESSING_THREADS < 1:
+        transaction.on_commit(lambda: process_receipt(transaction_id))
+        return
+    transaction.on_commit(
+        lambda: get_receipt_executor().submit(
+            _process_receipt_in_thread, transaction_id
+        )
+    )
+
+
+def _byte_range(header, size):
+    """Zwraca (start, koniec) pojedynczego zakresu bajtów lub None (cały plik).
+
+    Wiele zakresów i niepoprawna składnia są ignorowane zgodnie z RFC 9110;
+    zakres poza plikiem zgłasza ValueError (odpowiedź 416).
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if not start:
+        suffix = int(end)
+        if suffix == 0:
+            raise ValueError("Pusty zakres.")
+        return max(size - suffix, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size:
+        raise ValueError("Zakres poza plikiem.")
+    if start > end:
+        return None
+    return start, end
+
+
+def _read_range(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_receipt(request, receipt):
+    """Zwraca plik paragonu z nagłówkami cache, obsługą 304 i zakresów bajtów.
+
+    Przy ``RECEIPT_SENDFILE_BACKEND`` Django tylko autoryzuje żądanie, a plik
+    wysyła serwer frontowy (nginx: X-Accel-Redirect, Apache/lighttpd: X-Sendfile).
+    """
+    try:
+        size = receipt.size
+        last_modified = receipt.storage.get_modified_time(receipt.name)
+    except FileNotFoundError:
+        raise Http404("Brak pliku paragonu.")
+
+    name_hash = hashlib.md5(receipt.name.encode(), usedforsecurity=False).hexdigest()
+    etag = quote_etag(f"{name_hash[:12]}-{size:x}-{int(last_modified.timestamp()):x}")
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+
+    if response is None:
+        content_type = (
+            mimetypes.guess_type(receipt.name)[0] or "application/octet-stream"
+        )
+        backend = settings.RECEIPT_SENDFILE_BACKEND
+        if backend == "x-accel-redirect":
+            response = HttpResponse(content_type=content_type)
+            prefix = settings.RECEIPT_ACCEL_REDIRECT_PREFIX.rstrip("/")
+            response["X-Accel-Redirect"] = f"{prefix}/{receipt.name}"
+        elif backend == "x-sendfile":
+            response = HttpResponse(content_type=content_type)
+            response["X-Sendfile"] = receipt.path
+        else:
+            byte_range = None
+            if_range = request.headers.get("If-Range")
+            if "Range" in request.headers and (not if_range or if_range == etag):
+                try:
+                    byte_range = _byte_range(request.headers["Range"], size)
+                except ValueError:
+                    response = HttpResponse(status=416)
+                    response["Content-Range"] = f"bytes */{size}"
+                    return response
+
+            if byte_range:
+                start, end = byte_range
+                response = StreamingHttpResponse(
+                    _read_range(receipt.open("rb"), start, end - start + 1),
+                    status=206,
+                    content_type=content_type,
+                )
+                response["Content-Range"] = f"bytes {start}-{end}/{size}"
+                response["Content-Length"] = str(end - start + 1)
+            else:
+                response = FileResponse(receipt.open("rb"), content_type=content_type)
+            response["Accept-Ranges"] = "bytes"
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, max_age=RECEIPT_CACHE_MAX_AGE)
+    return response
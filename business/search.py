@@ -0,0 +1,115 @@
+import re
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+from business.models import Project, WalletTransaction, Worker
+
+SEARCH_RESULT_LIMIT = 8
+
+# Indeksy pełnotekstowe FTS5 (zob. migracja 0029_search_index) utrzymywane
+# triggerami bazy, więc obejmują też bulk_create i aktualizacje querysetów.
+SEARCH_TABLES = {
+    "project": "business_project_fts",
+    "worker": "business_worker_fts",
+    "transaction": "business_transaction_fts",
+}
+
+
+def build_match_query(text):
+    """Zamienia wpisany tekst na zapytanie FTS5: wszystkie słowa jako prefiksy.
+
+    Znaki diakrytyczne zdejmuje tokenizer; "ł" nie ma rozkładu w Unicode,
+    więc składamy je tu tak samo jak triggery przy indeksowaniu.
+    """
+    text = text.replace("ł", "l").replace("Ł", "L")
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def match_ids(kind, text):
+    """Podzapytanie z kluczami wierszy pasujących do ``text`` (do ``pk__in``)."""
+    table = SEARCH_TABLES[kind]
+    match = build_match_query(text)
+    if not match:
+        return RawSQL(f"SELECT rowid FROM {table} WHERE 0", [])
+    return RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match])
+
+
+def _ranked_ids(kind, match, organization, wallet=None, limit=SEARCH_RESULT_LIMIT):
+    table = SEARCH_TABLES[kind]
+    sql = (
+        f"SELECT rowid, bm25({table}) AS rank FROM {table} "
+        f"WHERE {table} MATCH %s AND organization_id = %s"
+    )
+    params = [match, organization.pk]
+    if wallet is not None:
+        sql += " AND wallet_id = %s"
+        params.append(wallet.pk)
+    sql += " ORDER BY rank LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def global_search(user, text):
+    """Wyniki wyszukiwania w projektach, pracownikach i transakcjach.
+
+    Każdy indeks zwraca najlepsze trafienia wg BM25, które są następnie
+    scalane w jedną listę od najtrafniejszych. Brygadzista nie widzi
+    pracowników, a z transakcji tylko te z własnego portfela.
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    organization = user.organization
+    results = []
+
+    def collect(kind, queryset, wallet=None):
+        ranked = _ranked_ids(kind, match, organization, wallet)
+        objects = queryset.in_bulk([pk for pk, _ in ranked])
+        for pk, rank in ranked:
+            if pk in objects:
+                results.append((rank, kind, objects[pk]))
+
+    collect("project", Project.objects.filter(is_default=False))
+    if user.is_owner:
+        collect("worker", Worker.objects.all())
+        collect(
+            "transaction",
+            WalletTransaction.objects.select_related("project", "worker"),
+        )
+    elif getattr(user, "wallet", None) is not None:
+        collect(
+            "transaction",
+            WalletTransaction.objects.select_related("project", "worker"),
+            wallet=user.wallet,
+        )
+
+    results.sort(key=lambda result: result[0])
+    return [
+        {
+            "kind": kind,
+            "object": obj,
+            "url": _result_url(kind, obj),
+            # szczegóły projektu otwierają się w oknie modalnym (SSE)
+            "modal": kind == "project",
+        }
+        for _, kind, obj in results[:SEARCH_RESULT_LIMIT]
+    ]
+
+
+def _result_url(kind, obj):
+    if kind == "project":
+        return reverse("business:project_detail", kwargs={"pk": obj.pk})
+    if kind == "worker":
+        query = {"search": f"{obj.first_name} {obj.last_name}"}
+        if not obj.is_active:
+            query["show_inactive"] = "true"
+        return f"{reverse('business:worker_list')}?{urlencode(query)}"
+    if obj.wallet_id:
+        return reverse("business:finance_detail", kwargs={"pk": obj.wallet_id})
+    return reverse("business:finance_list")
@@ -1,13 +1,30 @@
 from django.urls import path
 
-from business.views import finance, payroll, project, timesheet, worker
+from business.views import (
+    analytics,
+    finance,
+    imports,
+    payroll,
+    project,
+    search,
+    timesheet,
+    vacation,
+    worker,
+)
 
 app_name = "business"
 
 urlpatterns = [
+    path("szukaj/", search.global_search_view, name="global_search"),
     # Pracownicy
     path("pracownicy/", worker.worker_list_view, name="worker_list"),
     path("pracownicy/dodaj/", worker.worker_create_view, name="worker_create"),
+    path("pracownicy/import/", worker.worker_import_view, name="worker_import"),
+    path(
+        "pracownicy/zbiorczo/",
+        worker.worker_bulk_action_view,
+        name="worker_bulk_action",
+    ),
     path("pracownicy/<int:pk>/edytuj/", worker.worker_edit_view, name="worker_edit"),
     path("pracownicy/<int:pk>/usun/", worker.worker_delete_view, name="worker_delete"),
     path(
@@ -38,6 +55,11 @@ urlpatterns = [
         worker.vacation_create_view,
         name="vacation_create",
     ),
+    path(
+        "urlopy/",
+        vacation.vacation_calendar_view,
+        name="vacation_calendar",
+    ),
     path(
         "urlopy/<int:pk>/usun/",
         worker.vacation_delete_view,
@@ -84,11 +106,41 @@ urlpatterns = [
     path("projekty/", project.project_list_view, name="project_list"),
     path("projekty/dodaj/", project.project_create_view, name="project_create"),
     path("projekty/<int:pk>/", project.project_detail_view, name="project_detail"),
+    path(
+        "projekty/<int:pk>/wpisy/<str:kind>/",
+        project.project_entries_view,
+        name="project_entries",
+    ),
     path("projekty/<int:pk>/edytuj/", project.project_edit_view, name="project_edit"),
     path("projekty/<int:pk>/usun/", project.project_delete_view, name="project_delete"),
     # Finanse / Portfel
     path("finanse/", finance.finance_list_view, name="finance_list"),
     path("finanse/<int:pk>/", finance.finance_detail_view, name="finance_detail"),
+    path(
+        "finanse/analityka/",
+        analytics.expense_analytics_view,
+        name="expense_analytics",
+    ),
+    path(
+        "finanse/import/",
+        imports.statement_import_view,
+        name="statement_import",
+    ),
+    path(
+        "finanse/dziennik/eksport/",
+        finance.transaction_journal_export_view,
+        name="transaction_journal_export",
+    ),
+    path(
+        "finanse/transakcje/",
+        finance.transaction_feed_view,
+        name="transaction_feed",
+    ),
+    path(
+        "finanse/<int:pk>/transakcje/",
+        finance.transaction_feed_view,
+        name="wallet_transaction_feed",
+    ),
     path("finanse/zasil/", finance.refill_create_view, name="refill_create"),
     path("finanse/wydatek/dodaj/", finance.expense_create_view, name="expense_create"),
     path("finanse/zaliczka/dodaj/", finance.advance_create_view, name="advance_create"),
@@ -139,6 +191,11 @@ urlpatterns = [
         payroll.payroll_export_excel_view,
         name="payroll_export_excel",
     ),
+    path(
+        "finanse/wyplaty/eksport/paski/",
+        payroll.payroll_export_payslips_view,
+        name="payroll_export_payslips",
+    ),
     path(
         "czas-pracy/bonusy/",
         payroll.bonus_day_manage_view,
@@ -0,0 +1,126 @@
+import calendar
+import math
+from bisect import bisect_right
+from datetime import date, timedelta
+
+from business.models import Vacation
+
+# Dzień jest oznaczany, gdy na urlopie jest więcej niż ta część zespołu.
+ABSENCE_ALERT_SHARE = 0.25
+
+
+class VacationIndex:
+    """Urlopy w pamięci: posortowane przedziały każdego pracownika.
+
+    Urlopy jednej osoby się nie nakładają, więc po posortowaniu po dacie
+    początku końce też są rosnące i sprawdzenie kolizji to wyszukiwanie
+    binarne. ``coverage`` liczy liczbę osób na urlopie dzień po dniu jednym
+    przejściem po posortowanych zdarzeniach (początek +1, dzień po końcu -1).
+    """
+
+    def __init__(self, vacations):
+        self.vacations = sorted(vacations, key=lambda v: (v.start_date, v.pk or 0))
+        self._by_worker = {}
+        for vacation in self.vacations:
+            self._by_worker.setdefault(vacation.worker_id, []).append(vacation)
+        self._starts = {
+            worker_id: [v.start_date for v in items]
+            for worker_id, items in self._by_worker.items()
+        }
+
+    @classmethod
+    def load(cls, organization, start, end):
+        """Wszystkie urlopy organizacji nachodzące na przedział, jednym zapytaniem."""
+        return cls(
+            Vacation.objects.filter(
+                organization=organization, start_date__lte=end, end_date__gte=start
+            ).select_related("worker")
+        )
+
+    @classmethod
+    def for_worker(cls, worker_id, start, end):
+        return cls(
+            Vacation.objects.filter(
+                worker_id=worker_id, start_date__lte=end, end_date__gte=start
+            )
+        )
+
+    def overlapping(self, worker_id, start, end, exclude_pk=None):
+        """Pierwszy urlop pracownika nachodzący na [start, end] lub None."""
+        items = self._by_worker.get(worker_id, [])
+        i = bisect_right(self._starts.get(worker_id, []), end)
+        while i > 0:
+            i -= 1
+            vacation = items[i]
+            if vacation.end_date < start:
+                break
+            if vacation.pk is None or vacation.pk != exclude_pk:
+                return vacation
+        return None
+
+    def coverage(self, start, end):
+        """Lista par (dzień, liczba osób na urlopie) dla dni z przedziału."""
+        events = []
+        for vacation in self.vacations:
+            first = max(vacation.start_date, start)
+            last = min(vacation.end_date, end)
+            if first <= last:
+                events.append((first, 1))
+                events.append((last + timedelta(days=1), -1))
+        events.sort()
+
+        counts, absent, i = [], 0, 0
+        day = start
+        while day <= end:
+            while i < len(events) and events[i][0] <= day:
+                absent += events[i][1]
+                i += 1
+            counts.append((day, absent))
+            day += timedelta(days=1)
+        return counts
+
+
+def calendar_range(year, month, span):
+    """Pierwszy i ostatni dzień miesiąca albo kwartału zawierającego miesiąc."""
+    if span == "quarter":
+        month = (month - 1) // 3 * 3 + 1
+        last_month = month + 2
+    else:
+        last_month = month
+    _, last_day = calendar.monthrange(year, last_month)
+    return date(year, month, 1), date(year, last_month, last_day)
+
+
+def build_vacation_calendar(organization, start, end, team_size):
+    """Dane kalendarza urlopów: wiersze pracowników i dzienne obłożenie.
+
+    ``team_size`` (liczba zatrudnionych w okresie) wyznacza próg, powyżej
+    którego dzień jest oznaczany jako zbyt obsadzony urlopami.
+    """
+    index = VacationIndex.load(organization, start, end)
+    limit = max(1, math.floor(team_size * ABSENCE_ALERT_SHARE))
+    days = [
+        {"date": day, "absent": absent, "over_limit": absent > limit}
+        for day, absent in index.coverage(start, end)
+    ]
+
+    rows = {}
+    for vacation in index.vacations:
+        row = rows.setdefault(
+            vacation.worker_id,
+            {"worker": vacation.worker, "days": [False] * len(days), "vacations": []},
+        )
+        row["vacations"].append(vacation)
+        first = (max(vacation.start_date, start) - start).days
+        last = (min(vacation.end_date, end) - start).days
+        for offset in range(first, last + 1):
+            row["days"][offset] = True
+
+    return {
+        "days": days,
+        "rows": sorted(
+            rows.values(),
+            key=lambda row: (row["worker"].last_name, row["worker"].first_name),
+        ),
+        "absence_limit": limit,
+    }
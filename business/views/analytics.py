@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from datastar_py import ServerSentEventGenerator as SSE
+from datastar_py.django import DatastarResponse
+from datastar_py.django import read_signals as read_signals_django
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import redirect
+
+from business.analytics import ANALYTICS_FILTERS, get_expense_analytics
+from business.views.utils import get_user_org, is_owner, render_template
+
+
+def expense_analytics_view(request: HttpRequest):
+    """Analityka wydatków (kategorie, projekty, brygadziści) oparta na agregatach."""
+    if not request.user.is_authenticated or not is_owner(request.user):
+        return redirect("core:login")
+
+    organization = get_user_org(request.user)
+    if "Datastar-Request" in request.headers:
+        filters = read_signals_django(request) or {}
+    else:
+        filters = {name: request.GET.get(name, "") for name in ANALYTICS_FILTERS}
+        filters["an_year"] = request.GET.get("an_year", "")
+
+    try:
+        year = int(str(filters.get("an_year") or datetime.now().year))
+    except ValueError:
+        year = datetime.now().year
+
+    context = {
+        "year": year,
+        "filters": filters,
+        **get_expense_analytics(organization, year, filters),
+    }
+
+    if "Datastar-Request" in request.headers:
+        rendered = render_template(
+            "business/expense_analytics.html#analytics_content", context, request
+        )
+        return DatastarResponse(
+            SSE.patch_elements(rendered, selector="#analytics-content", mode="inner")
+        )
+
+    return HttpResponse(
+        render_template("business/expense_analytics.html", context, request)
+    )
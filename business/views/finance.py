@@ -1,15 +1,58 @@
+from datetime import date
+
 from datastar_py import ServerSentEventGenerator as SSE
 from datastar_py.django import DatastarResponse
+from datastar_py.django import read_signals as read_signals_django
 from django.contrib import messages
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, Q, F, DecimalField
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
 from django.db.models.functions import Coalesce
-from django.http import FileResponse, HttpRequest, HttpResponse
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
 from django.utils import timezone
 
 from business.forms import AdvanceForm, ExpenseForm, RefillForm
-from business.models import Wallet, WalletTransaction, Worker
+from business.journal import (
+    JOURNAL_CHUNK_SIZE,
+    journal_rows,
+    stream_journal_csv,
+    stream_journal_xlsx,
+)
+from business.models import (
+    Wallet,
+    WalletMonthSnapshot,
+    WalletTransaction,
+    Worker,
+)
+from business.payrolls import mark_payroll_dirty
+from business.projects import get_project_catalog
+from business.receipts import (
+    RECEIPT_VARIANTS,
+    clear_receipt_derivatives,
+    hash_receipt,
+    schedule_receipt_processing,
+    serve_receipt,
+    submit_receipt_hash,
+)
+from business.views.utils import (
+    get_toast_event,
+    get_user_org,
+    render_template,
+    stream_sync,
+)
+from business.wallets import (
+    TRANSACTION_FILTERS,
+    TRANSACTION_PAGE_SIZE,
+    filter_transactions,
+    get_transaction_page,
+    load_transaction_rows,
+    next_month,
+)
 from business.views.utils import (
     get_toast_event,
     get_user_org,
@@ -18,41 +61,61 @@ from business.views.utils import (
 
 User = get_user_model()
 
+RECENT_TRANSACTIONS_PAGE_SIZE = 15
+EMPTY_TRANSACTION_FILTERS = dict.fromkeys(TRANSACTION_FILTERS, "")
+
 
 def get_annotated_finances(organization, queryset=None):
+    """Annotuje portfele saldem i sumami z kolumn oraz wydatkami bieżącego miesiąca.
+
+    Wydatki miesiąca pochodzą z zestawienia miesięcznego, a gdy miesiąc nie
+    jest jeszcze zamknięty, z samych transakcji tego miesiąca (bez skanowania
+    całej historii portfela).
+    """
     if queryset is None:
         queryset = Wallet.objects.filter(organization=organization)
 
-    today = timezone.now()
+    today = timezone.now().date()
+    month_start = today.replace(day=1)
+    snapshot_expenses = WalletMonthSnapshot.objects.filter(
+        wallet=OuterRef("pk"), year=today.year, month=today.month
+    ).values("expenses")
+    month_expenses = (
+        WalletTransaction.objects.filter(
+            wallet=OuterRef("pk"),
+            type="EXPENSE",
+            date__gte=month_start,
+            date__lt=date(*next_month(today.year, today.month), 1),
+        )
+        .order_by()
+        .values("wallet")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
     return queryset.annotate(
-        total_refills=Coalesce(
-            Sum("transactions__amount", filter=Q(transactions__type="REFILL")),
-            0,
-            output_field=DecimalField(),
-        ),
-        total_expenses=Coalesce(
-            Sum("transactions__amount", filter=Q(transactions__type="EXPENSE")),
-            0,
-            output_field=DecimalField(),
-        ),
-        total_advances=Coalesce(
-            Sum("transactions__amount", filter=Q(transactions__type="ADVANCE")),
-            0,
-            output_field=DecimalField(),
-        ),
+        total_refills=F("refills_total"),
+        total_expenses=F("expenses_total"),
+        total_advances=F("advances_total"),
+        current_balance=F("balance"),
         monthly_expenses_sum=Coalesce(
-            Sum(
-                "transactions__amount",
-                filter=Q(
-                    transactions__type="EXPENSE",
-                    transactions__date__year=today.year,
-                    transactions__date__month=today.month,
-                ),
-            ),
+            Subquery(snapshot_expenses),
+            Subquery(month_expenses),
             0,
             output_field=DecimalField(),
         ),
-    ).annotate(current_balance=F("total_refills") - F("total_expenses") - F("total_advances"))
+    )
+
+
+def mark_advance_dirty(request, organization, transaction):
+    """Oznacza wypłatę pracownika do przeliczenia po zmianie zaliczki."""
+    if transaction.type == WalletTransaction.Type.ADVANCE and transaction.worker_id:
+        mark_payroll_dirty(
+            request,
+            organization,
+            transaction.date.year,
+            transaction.date.month,
+            transaction.worker_id,
+        )
 
 
 def get_or_create_finance(request):
@@ -63,16 +126,51 @@ def get_or_create_finance(request):
     return wallet
 
 
+def get_transaction_feed(organization, wallet=None, filters=None, cursor=None):
+    """Zwraca kontekst strony historii transakcji portfela lub całej organizacji."""
+    if wallet:
+        queryset = wallet.transactions.all()
+        page_size = TRANSACTION_PAGE_SIZE
+        feed_url = reverse("business:wallet_transaction_feed", args=[wallet.pk])
+    else:
+        queryset = WalletTransaction.objects.filter(organization=organization)
+        page_size = RECENT_TRANSACTIONS_PAGE_SIZE
+        feed_url = reverse("business:transaction_feed")
+
+    transactions, next_cursor = get_transaction_page(
+        load_transaction_rows(filter_transactions(queryset, filters or {})),
+        cursor,
+        page_size,
+    )
+    return {
+        "transactions": transactions,
+        "next_cursor": next_cursor,
+        "feed_url": feed_url,
+    }
+
+
+def get_feed_filter_options(organization):
+    return {
+        "filter_types": WalletTransaction.Type.choices,
+        "filter_categories": WalletTransaction.Category.choices,
+        "filter_projects": sorted(
+            get_project_catalog(organization), key=lambda project: project["name"]
+        ),
+        "filter_workers": Worker.objects.filter(organization=organization).order_by(
+            "last_name", "first_name"
+        ),
+    }
+
+
 def refresh_finance_content(request, wallet=None):
     organization = get_user_org(request.user)
 
     if wallet:
         wallet = get_annotated_finances(organization).get(pk=wallet.pk)
-        transactions = wallet.transactions.all().order_by("-date", "-id")[:30]
 
         context = {
             "wallet": wallet,
-            "transactions": transactions,
+            **get_transaction_feed(organization, wallet),
             "current_balance": wallet.current_balance,
             "monthly_expenses_sum": wallet.monthly_expenses_sum,
             "total_advances_sum": wallet.total_advances,
@@ -86,6 +184,7 @@ def refresh_finance_content(request, wallet=None):
             SSE.patch_elements(
                 rendered_wallet, selector="#finance-content", mode="inner"
             ),
+            SSE.patch_signals(EMPTY_TRANSACTION_FILTERS),
             get_toast_event(request),
         ]
     else:
@@ -93,13 +192,9 @@ def refresh_finance_content(request, wallet=None):
             organization,
             Wallet.objects.filter(
                 organization=organization, user__role=User.Role.FOREMAN
-            ).select_related("user"),
+            ).select_related("user__worker_profile"),
         )
 
-        recent_transactions = WalletTransaction.objects.filter(
-            organization=organization
-        ).order_by("-date", "-id")[:15]
-
         total_balance = wallets.aggregate(total=Sum("current_balance"))["total"] or 0
 
         rendered_list = render_template(
@@ -107,7 +202,8 @@ def refresh_finance_content(request, wallet=None):
             {
                 "wallets": wallets,
                 "total_balance": total_balance,
-                "recent_transactions": recent_transactions,
+                **get_transaction_feed(organization),
+                **get_feed_filter_options(organization),
             },
             request,
         )
@@ -115,6 +211,7 @@ def refresh_finance_content(request, wallet=None):
             SSE.patch_elements(
                 rendered_list, selector="#finance-list-dashboard", mode="inner"
             ),
+            SSE.patch_signals(EMPTY_TRANSACTION_FILTERS),
             get_toast_event(request),
         ]
 
@@ -141,13 +238,9 @@ def finance_list_view(request: HttpRequest):
             organization,
             Wallet.objects.filter(
                 organization=organization, user__role=User.Role.FOREMAN
-            ).select_related("user"),
+            ).select_related("user__worker_profile"),
         )
 
-        recent_transactions = WalletTransaction.objects.filter(
-            organization=organization
-        ).order_by("-date", "-id")[:15]
-
         total_balance = wallets.aggregate(total=Sum("current_balance"))["total"] or 0
 
         from business.views.project import get_projects
@@ -157,7 +250,8 @@ def finance_list_view(request: HttpRequest):
         context = {
             "wallets": wallets,
             "total_balance": total_balance,
-            "recent_transactions": recent_transactions,
+            **get_transaction_feed(organization),
+            **get_feed_filter_options(organization),
             "projects": projects,
         }
         return HttpResponse(
@@ -186,11 +280,10 @@ def finance_detail_view(request: HttpRequest, pk: int):
     if "Datastar-Request" in request.headers:
         return DatastarResponse(refresh_finance_content(request, wallet))
 
-    transactions = wallet.transactions.all().order_by("-date", "-id")[:30]
-
     context = {
         "wallet": wallet,
-        "transactions": transactions,
+        **get_transaction_feed(organization, wallet),
+        **get_feed_filter_options(organization),
         "current_balance": wallet.current_balance,
         "monthly_expenses_sum": wallet.monthly_expenses_sum,
         "total_advances_sum": wallet.total_advances,
@@ -200,6 +293,88 @@ def finance_detail_view(request: HttpRequest, pk: int):
     return HttpResponse(content)
 
 
+def transaction_feed_view(request: HttpRequest, pk: int | None = None):
+    """Kolejna strona historii transakcji (przewijanie) lub lista po zmianie filtrów."""
+    if not request.user.is_authenticated:
+        return DatastarResponse(SSE.redirect("/login/"))
+
+    organization = get_user_org(request.user)
+    wallet = None
+    if pk is not None:
+        wallet = Wallet.objects.filter(pk=pk, organization=organization).first()
+        if wallet is None or (
+            not request.user.is_owner and wallet.user_id != request.user.pk
+        ):
+            messages.error(request, "Brak uprawnień do tego portfela.")
+            return DatastarResponse(get_toast_event(request))
+    elif not request.user.is_owner:
+        messages.error(request, "Brak uprawnień.")
+        return DatastarResponse(get_toast_event(request))
+
+    filters = read_signals_django(request) or {}
+    cursor = request.GET.get("cursor")
+    context = get_transaction_feed(organization, wallet, filters, cursor)
+
+    if wallet:
+        template = "business/finance_detail.html#transaction_list"
+        selector = "#transaction-list"
+    else:
+        template = "business/finance_list.html#recent_transaction_list"
+        selector = "#recent-transaction-list"
+    rendered_rows = render_template(template, context, request)
+
+    if cursor:
+        return DatastarResponse(
+            [
+                SSE.remove_elements("#transaction-feed-more"),
+                SSE.patch_elements(rendered_rows, selector=selector, mode="append"),
+            ]
+        )
+    return DatastarResponse(
+        SSE.patch_elements(rendered_rows, selector=selector, mode="inner")
+    )
+
+
+def transaction_journal_export_view(request: HttpRequest):
+    """Eksport dziennika transakcji (CSV lub XLSX) z filtrami historii ``tx_*``.
+
+    CSV jest wysyłany strumieniowo porcjami wierszy; XLSX powstaje w pliku
+    tymczasowym wysyłanym porcjami, więc w obu przypadkach pamięć nie zależy
+    od długości okresu. Treść jest iteratorem asynchronicznym, bo pod ASGI
+    synchroniczny strumień zostałby zebrany w całości przed wysłaniem.
+    """
+    if not request.user.is_authenticated or not request.user.is_owner:
+        return HttpResponse(status=403)
+
+    organization = get_user_org(request.user)
+    transactions = WalletTransaction.objects.filter(organization=organization)
+    wallet_id = request.GET.get("wallet")
+    if wallet_id and wallet_id.isdigit():
+        transactions = transactions.filter(wallet_id=wallet_id)
+    rows = journal_rows(filter_transactions(transactions, request.GET))
+
+    date_from = request.GET.get("tx_date_from") or "poczatek"
+    date_to = request.GET.get("tx_date_to") or timezone.now().date().isoformat()
+    filename = f"dziennik_{date_from}_{date_to}"
+
+    if request.GET.get("format") == "xlsx":
+        response = StreamingHttpResponse(
+            stream_sync(stream_journal_xlsx(rows)),
+            content_type=(
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            ),
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}.xlsx"'
+        return response
+
+    response = StreamingHttpResponse(
+        stream_sync(stream_journal_csv(rows), batch_size=JOURNAL_CHUNK_SIZE),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
 def refill_create_view(request: HttpRequest):
     if not request.user.is_authenticated or not request.user.is_owner:
         return DatastarResponse(SSE.redirect("/login/"))
@@ -263,14 +438,30 @@ def expense_create_view(request: HttpRequest):
         wallet = get_or_create_finance(request)
 
     if request.method == "POST":
-        form = ExpenseForm(request.POST, request.FILES)
+        form = ExpenseForm(request.POST, request.FILES, organization=organization)
         if form.is_valid():
+            receipt_hash = None
+            if receipt_image := form.cleaned_data.get("receipt_image"):
+                # Skrót liczy się w puli wątków równolegle z zapisem wydatku.
+                receipt_hash = submit_receipt_hash(receipt_image.read())
+                receipt_image.seek(0)
+
             expense = form.save(commit=False)
             expense.wallet = wallet
             expense.organization = organization
             expense.save()
+            schedule_receipt_processing(expense)
 
             messages.success(request, "Wydatek został zarejestrowany.")
+            if receipt_hash is not None:
+                duplicate = hash_receipt(expense, receipt_hash)
+                if duplicate:
+                    messages.warning(
+                        request,
+                        "Ten paragon wygląda na już rozliczony: "
+                        f"{duplicate.get_category_display() or 'wydatek'} "
+                        f"z {duplicate.date:%d.%m.%Y} na {duplicate.amount} PLN.",
+                    )
 
             if request.GET.get("from_list") == "true":
                 events = refresh_finance_content(request, wallet=None)
@@ -281,7 +472,7 @@ def expense_create_view(request: HttpRequest):
             events.append(SSE.patch_signals({"is_modal_open": False}))
             return DatastarResponse(events)
     else:
-        form = ExpenseForm()
+        form = ExpenseForm(organization=organization)
 
     rendered_modal = render_template(
         "business/finance_detail.html#expense_form",
@@ -327,6 +518,7 @@ def advance_create_view(request: HttpRequest):
             advance.wallet = wallet
             advance.organization = organization
             advance.save()
+            mark_advance_dirty(request, organization, advance)
 
             messages.success(request, "Zaliczka została zarejestrowana.")
 
@@ -387,7 +579,12 @@ def transaction_receipt_view(request: HttpRequest, pk: int):
     if not can_view or not transaction.receipt_image:
         return HttpResponse(status=403)
 
-    return FileResponse(transaction.receipt_image.open())
+    variant = request.GET.get("variant")
+    receipt = transaction.receipt_image
+    if variant in RECEIPT_VARIANTS:
+        receipt = getattr(transaction, f"receipt_{variant}") or receipt
+
+    return serve_receipt(request, receipt)
 
 
 def transaction_receipt_modal(request: HttpRequest, pk: int):
@@ -443,14 +640,23 @@ def transaction_edit_view(request: HttpRequest, pk: int):
         template_hash = "#refill_form"
         title = "Edytuj zasilenie"
 
+    form_kwargs = {"instance": transaction}
+    if form_class is not RefillForm:
+        form_kwargs["organization"] = organization
+
     if request.method == "POST":
-        form_kwargs = {"instance": transaction}
-        if transaction.type == WalletTransaction.Type.ADVANCE:
-            form_kwargs["organization"] = organization
 
+        mark_advance_dirty(request, organization, transaction)
         form = form_class(request.POST, request.FILES, **form_kwargs)
         if form.is_valid():
-            form.save()
+            receipt_changed = "receipt_image" in form.changed_data
+            transaction = form.save(commit=False)
+            if receipt_changed:
+                clear_receipt_derivatives(transaction)
+            transaction.save()
+            if receipt_changed:
+                schedule_receipt_processing(transaction)
+            mark_advance_dirty(request, organization, transaction)
             messages.success(request, "Transakcja została zaktualizowana.")
 
             if request.GET.get("from_list") == "true" or not transaction.wallet:
@@ -461,9 +667,6 @@ def transaction_edit_view(request: HttpRequest, pk: int):
             events.append(SSE.patch_signals({"is_modal_open": False}))
             return DatastarResponse(events)
     else:
-        form_kwargs = {"instance": transaction}
-        if transaction.type == WalletTransaction.Type.ADVANCE:
-            form_kwargs["organization"] = organization
         form = form_class(**form_kwargs)
 
     template_name = "business/finance_detail.html"
@@ -502,6 +705,7 @@ def transaction_delete_view(request: HttpRequest, pk: int):
         return DatastarResponse(get_toast_event(request))
 
     wallet = transaction.wallet
+    mark_advance_dirty(request, organization, transaction)
     transaction.delete()
     messages.success(request, "Transakcja została usunięta.")
 
@@ -0,0 +1,163 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from datastar_py import ServerSentEventGenerator as SSE
+from datastar_py.django import DatastarResponse
+from django.contrib import messages
+from django.core.files.storage import default_storage
+from django.http import HttpRequest
+
+from business.forms import StatementImportForm
+from business.imports import StatementImporter, read_statement
+from business.models import Wallet
+from business.views.finance import refresh_finance_content
+from business.views.utils import (
+    get_toast_event,
+    get_user_org,
+    render_template,
+    stream_sync,
+)
+
+IMPORT_SESSION_KEY = "statement_import"
+PREVIEW_ROWS_LIMIT = 200
+
+
+def _count_statuses(counts, results):
+    for result in results:
+        counts[result["status"]] += 1
+    return counts
+
+
+def _statement_batches(name, process, delete=False):
+    """Przetwarza zapisany wyciąg partiami (``importer.batches`` lub ``commit``)."""
+    try:
+        with default_storage.open(name, "rb") as file:
+            yield from process(read_statement(file))
+    finally:
+        if delete:
+            default_storage.delete(name)
+
+
+async def _stream_preview(request, importer, name):
+    """Waliduje wyciąg partiami i dosyła kolejne wiersze podglądu oraz liczniki.
+
+    Generator jest asynchroniczny, bo pod ASGI synchroniczny strumień zostałby
+    zebrany w całości i postęp dotarłby dopiero na końcu. Partie i szablony
+    są obsługiwane przez ``sync_to_async``.
+    """
+    render = sync_to_async(render_template)
+    counts = {"new": 0, "duplicate": 0, "error": 0}
+    yield SSE.patch_elements(
+        await render("business/finance_import.html#import_preview", {}, request),
+        selector="#import-preview",
+        mode="inner",
+    )
+
+    shown = 0
+    async for results in stream_sync(_statement_batches(name, importer.batches)):
+        _count_statuses(counts, results)
+        rows = results[: max(PREVIEW_ROWS_LIMIT - shown, 0)]
+        shown += len(rows)
+        if rows:
+            yield SSE.patch_elements(
+                await render(
+                    "business/finance_import.html#import_preview_rows",
+                    {"rows": rows},
+                    request,
+                ),
+                selector="#import-preview-rows",
+                mode="append",
+            )
+        yield SSE.patch_signals({f"import_{k}": v for k, v in counts.items()})
+
+    yield SSE.patch_elements(
+        await render(
+            "business/finance_import.html#import_actions",
+            {"counts": counts, "truncated": shown < sum(counts.values())},
+            request,
+        ),
+        selector="#import-actions",
+        mode="inner",
+    )
+
+
+async def _stream_commit(request, importer, name):
+    """Zapisuje wyciąg partiami, raportując postęp, i odświeża listę finansów."""
+    counts = {"new": 0, "duplicate": 0, "error": 0}
+    batches = _statement_batches(name, importer.commit, delete=True)
+    async for results in stream_sync(batches):
+        _count_statuses(counts, results)
+        yield SSE.patch_signals({"import_saved": counts["new"]})
+
+    await sync_to_async(messages.success)(
+        request,
+        f"Zaimportowano {counts['new']} transakcji "
+        f"(pominięte duplikaty: {counts['duplicate']}, błędy: {counts['error']}).",
+    )
+    for event in await sync_to_async(refresh_finance_content)(request, wallet=None):
+        yield event
+    yield SSE.patch_signals({"is_modal_open": False})
+
+
+def statement_import_view(request: HttpRequest):
+    """Import zasileń i wydatków z wyciągu CSV: formularz, podgląd i zapis.
+
+    Podgląd zapisuje plik tymczasowo i zapamiętuje mapowanie w sesji; zapis
+    korzysta z tego samego pliku, więc nie trzeba go przesyłać ponownie.
+    """
+    if not request.user.is_authenticated or not request.user.is_owner:
+        return DatastarResponse(SSE.redirect("/login/"))
+
+    organization = get_user_org(request.user)
+    step = request.GET.get("step")
+
+    if request.method == "POST" and step == "commit":
+        # Sesję trzeba zmienić przed rozpoczęciem strumienia, inaczej się nie zapisze.
+        pending = request.session.pop(IMPORT_SESSION_KEY, None)
+        if not pending or not default_storage.exists(pending["file"]):
+            messages.error(request, "Brak wyciągu do zaimportowania.")
+            return DatastarResponse(get_toast_event(request))
+
+        wallet = None
+        if pending["wallet_id"]:
+            wallet = Wallet.objects.filter(
+                pk=pending["wallet_id"], organization=organization
+            ).first()
+        importer = StatementImporter(organization, pending["mapping"], wallet)
+        return DatastarResponse(_stream_commit(request, importer, pending["file"]))
+
+    if request.method == "POST":
+        form = StatementImportForm(
+            request.POST, request.FILES, organization=organization
+        )
+        if form.is_valid():
+            previous = request.session.pop(IMPORT_SESSION_KEY, None)
+            if previous:
+                default_storage.delete(previous["file"])
+
+            name = default_storage.save(
+                f"imports/{uuid.uuid4().hex}.csv", form.cleaned_data["file"]
+            )
+            wallet = form.cleaned_data["wallet"]
+            mapping = form.get_mapping()
+            request.session[IMPORT_SESSION_KEY] = {
+                "file": name,
+                "wallet_id": wallet.pk if wallet else None,
+                "mapping": mapping,
+            }
+            importer = StatementImporter(organization, mapping, wallet)
+            return DatastarResponse(_stream_preview(request, importer, name))
+    else:
+        form = StatementImportForm(organization=organization)
+
+    rendered_modal = render_template(
+        "business/finance_import.html#import_form",
+        {"form": form, "url": request.path},
+        request,
+    )
+    return DatastarResponse(
+        [
+            SSE.patch_elements(rendered_modal, selector="#modal-content"),
+            SSE.patch_signals({"is_modal_open": True}),
+        ]
+    )
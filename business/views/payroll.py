@@ -1,69 +1,45 @@
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from functools import cache
 
 from datastar_py import ServerSentEventGenerator as SSE
 from datastar_py.django import DatastarResponse
+from django.conf import settings
 from django.contrib import messages
 from django.db import transaction
-from django.db.models import DecimalField, Q, Sum
-from django.db.models.functions import Coalesce
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
 
-from business.models import BonusDay, Payroll, WalletTransaction, Worker, WorkLog
+from business.models import BonusDay, Payroll
+from business.payrolls import (
+    generate_payrolls,
+    get_payroll_summary,
+    get_payslips,
+    get_unpaid_workers,
+    mark_payroll_dirty,
+    refresh_payroll_summary,
+)
+from business.pdf import (
+    PayrollPDF,
+    PayslipRenderError,
+    font_dir_for_workers,
+    render_payslip,
+)
 from business.views.utils import (
     get_toast_event,
     get_user_org,
     is_owner,
     render_template,
+    stream_sync,
 )
+from business.wallets import close_wallet_month
+
+PAYSLIP_ERRORS_FILENAME = "bledy.txt"
 
-import os
-from fpdf import FPDF
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment
-from openpyxl.utils import get_column_letter
-from django.http import Http404
-
-class PayrollPDF(FPDF):
-    """Prosty generator PDF dla listy płac."""
-    def __init__(self, org_name, period_str):
-        super().__init__()
-        self.org_name = org_name
-        self.period_str = period_str
-        
-        font_dir = "/usr/share/fonts/liberation-sans-fonts/"
-        if not os.path.exists(font_dir):
-            font_dir = "/usr/share/fonts/liberation/"
-            
-        self.font_name = "helvetica"
-        if os.path.exists(font_dir):
-            fonts = {
-                "": "LiberationSans-Regular.ttf",
-                "B": "LiberationSans-Bold.ttf",
-                "I": "LiberationSans-Italic.ttf",
-                "BI": "LiberationSans-BoldItalic.ttf",
-            }
-            loaded = False
-            for style, filename in fonts.items():
-                path = os.path.join(font_dir, filename)
-                if os.path.exists(path):
-                    self.add_font("Liberation", style, path)
-                    loaded = True
-            if loaded:
-                self.font_name = "Liberation"
-
-    def header(self):
-        self.set_font(self.font_name, "B", 16)
-        self.cell(0, 10, f"Lista płac - {self.period_str}", align="C")
-        self.ln(10)
-        self.set_font(self.font_name, "", 12)
-        self.cell(0, 10, self.org_name, align="C")
-        self.ln(10)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font(self.font_name, "I", 8)
-        self.cell(0, 10, f"Strona {self.page_no()}", align="C")
 
 def payroll_export_pdf_view(request: HttpRequest):
     """Eksportuje zamknięte wypłaty do formatu PDF."""
@@ -204,6 +180,99 @@ def payroll_export_excel_view(request: HttpRequest):
     wb.save(response)
     return response
 
+@cache
+def get_payslip_executor():
+    """Wspólna pula procesów renderujących paski wypłat."""
+    return ProcessPoolExecutor(max_workers=settings.PAYSLIP_EXPORT_PROCESSES)
+
+
+class _ZipStreamBuffer:
+    """Bufor zapisu dla zipfile opróżniany po każdym dodanym pliku."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _render_payslips(payslips):
+    """Renderuje paski (przy kilku w puli procesów) w kolejności ukończenia.
+
+    Zwraca pary (nazwa pliku, bajty PDF); pasek, którego nie udało się
+    wyrenderować, daje parę (None, komunikat błędu).
+    """
+    if settings.PAYSLIP_EXPORT_PROCESSES < 1 or len(payslips) < 2:
+        for payslip in payslips:
+            try:
+                yield render_payslip(payslip)
+            except PayslipRenderError as exc:
+                yield None, str(exc)
+        return
+
+    font_dir = font_dir_for_workers()
+    executor = get_payslip_executor()
+    futures = [
+        executor.submit(render_payslip, payslip, font_dir) for payslip in payslips
+    ]
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except PayslipRenderError as exc:
+            yield None, str(exc)
+
+
+def _stream_payslips_zip(payslips):
+    """Archiwum ZIP wysyłane plik po pliku.
+
+    Nagłówki odpowiedzi wychodzą przed renderowaniem, więc błąd jednego paska
+    nie może już zmienić jej statusu: trafia do pliku ``PAYSLIP_ERRORS_FILENAME``
+    w archiwum, które pozostaje poprawne.
+    """
+    buffer = _ZipStreamBuffer()
+    errors = []
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for filename, content in _render_payslips(payslips):
+            if filename is None:
+                errors.append(content)
+                continue
+            archive.writestr(filename, content)
+            yield buffer.drain()
+        if errors:
+            archive.writestr(PAYSLIP_ERRORS_FILENAME, "\n".join(errors))
+    yield buffer.drain()
+
+
+def payroll_export_payslips_view(request: HttpRequest):
+    """Eksportuje paski wypłat pracowników jako archiwum ZIP (jeden PDF na osobę)."""
+    if not request.user.is_authenticated or not is_owner(request.user):
+        return HttpResponse(status=403)
+
+    organization = get_user_org(request.user)
+    year, month = _get_year_month(request)
+
+    payslips = get_payslips(organization, year, month)
+    if not payslips:
+        raise Http404("Brak zamkniętych wypłat dla wybranego miesiąca.")
+
+    response = StreamingHttpResponse(
+        stream_sync(_stream_payslips_zip(payslips)), content_type="application/zip"
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="paski_{month:02d}_{year}.zip"'
+    )
+    return response
+
+
 @transaction.atomic
 def bonus_day_manage_view(request: HttpRequest):
     """Zarządzanie bonusami (dniówkami premium) dla danej organizacji."""
@@ -238,12 +307,14 @@ def bonus_day_manage_view(request: HttpRequest):
                         date=bonus_date,
                         defaults={"amount": amount, "description": description},
                     )
+                    mark_payroll_dirty(request, organization, year, month)
                     messages.success(request, f"Dodano bonus dla dnia {bonus_date}.")
             except (ValueError, TypeError):
                 messages.error(request, "Nieprawidłowe dane formularza.")
         elif action == "delete":
             bonus_id = request.POST.get("bonus_id")
             BonusDay.objects.filter(id=bonus_id, organization=organization).delete()
+            mark_payroll_dirty(request, organization, year, month)
             messages.warning(request, "Usunięto bonus.")
 
     bonus_days = BonusDay.objects.filter(
@@ -291,29 +362,6 @@ def get_payrolls_for_month(organization, year, month):
     )
 
 
-def get_payroll_stats(payrolls):
-    total_earned = sum(p.gross_pay for p in payrolls)
-    total_bonuses = sum(p.bonuses for p in payrolls)
-    total_payout = sum(p.net_pay for p in payrolls)
-    total_advances = sum(p.advances_deducted for p in payrolls)
-    has_drafts = any(p.status == Payroll.Status.DRAFT for p in payrolls)
-    has_closed = any(p.status == Payroll.Status.CLOSED for p in payrolls)
-
-    status = "EMPTY"
-    if has_closed and not has_drafts:
-        status = "CLOSED"
-    elif has_drafts:
-        status = "DRAFT"
-
-    return {
-        "total_earned": total_earned,
-        "total_bonuses": total_bonuses,
-        "total_payout": total_payout,
-        "total_advances": total_advances,
-        "status": status,
-    }
-
-
 def payroll_list_view(request: HttpRequest):
     """Zarządzanie wypłatami i podgląd na dany miesiąc."""
     if not request.user.is_authenticated or not is_owner(request.user):
@@ -324,13 +372,14 @@ def payroll_list_view(request: HttpRequest):
     year, month = _get_year_month(request)
 
     payrolls = get_payrolls_for_month(organization, year, month)
-    stats = get_payroll_stats(payrolls)
+    stats = get_payroll_summary(organization, year, month)
 
     context = {
         "payrolls": payrolls,
         "current_year": year,
         "current_month": month,
         "stats": stats,
+        "unpaid_workers": get_unpaid_workers(organization, year, month, payrolls),
     }
 
     if "Datastar-Request" in request.headers:
@@ -366,100 +415,7 @@ def payroll_generate_month_view(request: HttpRequest):
         messages.error(request, "Nieprawidłowy miesiąc lub rok.")
         return DatastarResponse(get_toast_event(request))
 
-    workers_with_stats = (
-        Worker.objects.filter(organization=organization)
-        .annotate(
-            total_hours=Coalesce(
-                Sum(
-                    "work_logs__hours",
-                    filter=Q(work_logs__date__year=year, work_logs__date__month=month),
-                ),
-                0,
-                output_field=DecimalField(),
-            ),
-            total_advances=Coalesce(
-                Sum(
-                    "advances__amount",
-                    filter=Q(
-                        advances__organization=organization,
-                        advances__type=WalletTransaction.Type.ADVANCE,
-                        advances__date__year=year,
-                        advances__date__month=month,
-                    ),
-                ),
-                0,
-                output_field=DecimalField(),
-            ),
-        )
-        .filter(Q(total_hours__gt=0) | Q(total_advances__gt=0))
-        .distinct()
-    )
-
-    generated_count = 0
-    skipped_count = 0
-
-    bonus_days = BonusDay.objects.filter(
-        organization=organization, date__year=year, date__month=month
-    )
-    bonus_map = {bd.date: bd.amount for bd in bonus_days}
-    bonus_dates = list(bonus_map.keys())
-
-    existing_payrolls = {
-        p.worker_id: p
-        for p in Payroll.objects.filter(organization=organization, year=year, month=month)
-    }
-
-    worker_bonuses = {}
-    if bonus_dates:
-        worker_ids = [w.id for w in workers_with_stats]
-        bonus_logs = WorkLog.objects.filter(
-            organization=organization,
-            worker_id__in=worker_ids,
-            date__in=bonus_dates,
-            hours__gt=0
-        ).values("worker_id", "date")
-        
-        for log in bonus_logs:
-            wid = log["worker_id"]
-            d = log["date"]
-            worker_bonuses[wid] = worker_bonuses.get(wid, 0) + bonus_map.get(d, 0)
-
-    for worker in workers_with_stats:
-        existing = existing_payrolls.get(worker.id)
-
-        if existing and existing.status == Payroll.Status.CLOSED:
-            skipped_count += 1
-            continue
-
-        worker_bonus_sum = worker_bonuses.get(worker.id, 0)
-
-        hourly_rate = worker.hourly_rate
-        gross_pay = (worker.total_hours * hourly_rate) + worker_bonus_sum
-        net_pay = gross_pay - worker.total_advances
-
-        if existing:
-            existing.total_hours = worker.total_hours
-            existing.hourly_rate_snapshot = hourly_rate
-            existing.bonuses = worker_bonus_sum
-            existing.gross_pay = gross_pay
-            existing.advances_deducted = worker.total_advances
-            existing.net_pay = net_pay
-            existing.save()
-        else:
-            Payroll.objects.create(
-                organization=organization,
-                worker=worker,
-                year=year,
-                month=month,
-                status=Payroll.Status.DRAFT,
-                total_hours=worker.total_hours,
-                hourly_rate_snapshot=hourly_rate,
-                bonuses=worker_bonus_sum,
-                gross_pay=gross_pay,
-                advances_deducted=worker.total_advances,
-                net_pay=net_pay,
-            )
-        generated_count += 1
+    generated_count, skipped_count = generate_payrolls(organization, year, month)
 
     messages.success(
         request,
@@ -472,12 +428,13 @@ def payroll_generate_month_view(request: HttpRequest):
         )
 
     payrolls = get_payrolls_for_month(organization, year, month)
-    stats = get_payroll_stats(payrolls)
+    stats = get_payroll_summary(organization, year, month)
     context = {
         "payrolls": payrolls,
         "current_year": year,
         "current_month": month,
         "stats": stats,
+        "unpaid_workers": get_unpaid_workers(organization, year, month, payrolls),
     }
 
     rendered = render_template(
@@ -512,6 +469,7 @@ def payroll_close_month_view(request: HttpRequest):
         organization=organization, year=year, month=month, status=Payroll.Status.DRAFT
     )
     count = drafts.update(status=Payroll.Status.CLOSED)
+    close_wallet_month(organization, year, month)
 
     messages.success(
         request,
@@ -519,12 +477,13 @@ def payroll_close_month_view(request: HttpRequest):
     )
 
     payrolls = get_payrolls_for_month(organization, year, month)
-    stats = get_payroll_stats(payrolls)
+    stats = refresh_payroll_summary(organization, year, month)
     context = {
         "payrolls": payrolls,
         "current_year": year,
         "current_month": month,
         "stats": stats,
+        "unpaid_workers": get_unpaid_workers(organization, year, month, payrolls),
     }
 
     rendered = render_template(
@@ -566,12 +525,13 @@ def payroll_reopen_month_view(request: HttpRequest):
     )
 
     payrolls = get_payrolls_for_month(organization, year, month)
-    stats = get_payroll_stats(payrolls)
+    stats = refresh_payroll_summary(organization, year, month)
     context = {
         "payrolls": payrolls,
         "current_year": year,
         "current_month": month,
         "stats": stats,
+        "unpaid_workers": get_unpaid_workers(organization, year, month, payrolls),
     }
 
     rendered = render_template(
@@ -2,23 +2,19 @@ from datastar_py import ServerSentEventGenerator as SSE
 from datastar_py.django import DatastarResponse
 from datastar_py.django import read_signals as read_signals_django
 from django.contrib import messages
-from django.db.models import (
-    Case,
-    DecimalField,
-    F,
-    IntegerField,
-    OuterRef,
-    Q,
-    Subquery,
-    Sum,
-    When,
-)
-from django.db.models.functions import Coalesce
+from django.db.models import Case, F, IntegerField, When
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 
+from business.budgets import attach_budget_forecasts
 from business.forms import ProjectForm
-from business.models import Project, WalletTransaction, WorkLog
+from business.models import Project
+from business.projects import (
+    get_project_breakdown,
+    get_project_entries,
+    invalidate_project_catalog,
+)
+from business.search import match_ids
 from business.views.utils import (
     get_toast_event,
     get_user_org,
@@ -28,35 +24,23 @@ from business.views.utils import (
 
 
 def annotate_project_costs(qs):
-    """Annotuje queryset projektów statystykami kosztów i godzin."""
-    hours_subquery = (
-        WorkLog.objects.filter(project=OuterRef("pk"))
-        .values("project")
-        .annotate(total=Sum("hours"))
-        .values("total")
-    )
-    expense_subquery = (
-        WalletTransaction.objects.filter(project=OuterRef("pk"), type="EXPENSE")
-        .values("project")
-        .annotate(total=Sum("amount"))
-        .values("total")
-    )
+    """Annotuje queryset projektów statystykami kosztów i godzin.
+
+    Sumy są utrzymywane na bieżąco w kolumnach projektu (zob.
+    ``Project.apply_cost_entry``), więc lista nie agreguje wpisów ani wydatków.
+    """
     return qs.annotate(
-        total_hours=Coalesce(
-            Subquery(hours_subquery), 0.0, output_field=DecimalField()
-        ),
-        total_expense=Coalesce(
-            Subquery(expense_subquery), 0.0, output_field=DecimalField()
-        ),
-    ).annotate(total_project_cost=F("total_expense"))
+        total_hours=F("hours_total"),
+        total_expense=F("expenses_total"),
+        total_labour_cost=F("labour_cost_total"),
+        total_project_cost=F("expenses_total") + F("labour_cost_total"),
+    )
 
 
 def get_projects(organization, search_query=""):
     qs = Project.objects.filter(organization=organization).exclude(is_default=True)
     if search_query:
-        qs = qs.filter(
-            Q(name__icontains=search_query) | Q(address__icontains=search_query)
-        )
+        qs = qs.filter(pk__in=match_ids("project", search_query))
     qs = (
         annotate_project_costs(qs)
         .annotate(
@@ -70,7 +54,7 @@ def get_projects(organization, search_query=""):
         )
         .order_by("status_order", "name")
     )
-    return list(qs)
+    return attach_budget_forecasts(list(qs))
 
 
 def refresh_project_list(request, organization):
@@ -97,6 +81,7 @@ def handle_project_form(data, files=None, instance=None, organization=None):
             ).exclude(pk=project.pk if project.pk else 0).update(is_default=False)
 
         project.save()
+        invalidate_project_catalog(project.organization_id)
         return True, project, None
     return False, None, form
 
@@ -224,6 +209,7 @@ def project_delete_view(request: HttpRequest, pk: int):
         return DatastarResponse(get_toast_event(request))
 
     project.delete()
+    invalidate_project_catalog(organization.pk)
     messages.success(request, "Skasowano projekt.")
 
     return DatastarResponse(
@@ -250,61 +236,8 @@ def project_detail_view(request: HttpRequest, pk: int):
         messages.error(request, "Projekt nie istnieje.")
         return redirect("business:project_list")
 
-    work_logs = (
-        project.work_logs.all()
-        .select_related("worker")
-        .order_by("-date", "worker__last_name")
-    )
-    expenses = project.expenses.filter(type="EXPENSE").order_by("-date")
-
-    from django.db.models.functions import TruncMonth
-
-    monthly_hours = (
-        project.work_logs.all()
-        .annotate(month=TruncMonth("date"))
-        .values("month")
-        .annotate(total_hours=Sum("hours"))
-        .order_by("-month")
-    )
-
-    monthly_expenses = (
-        project.expenses.filter(type="EXPENSE")
-        .annotate(month=TruncMonth("date"))
-        .values("month")
-        .annotate(total_amount=Sum("amount"))
-        .order_by("-month")
-    )
-
-    monthly_summary = {}
-
-    for row in monthly_hours:
-        m = row["month"]
-        if m not in monthly_summary:
-            monthly_summary[m] = {"total_hours": 0, "total_expense": 0}
-        monthly_summary[m]["total_hours"] += row["total_hours"]
-
-    for row in monthly_expenses:
-        m = row["month"]
-        if m not in monthly_summary:
-            monthly_summary[m] = {"total_hours": 0, "total_expense": 0}
-        monthly_summary[m]["total_expense"] += row["total_amount"]
-
-    sorted_months = sorted(monthly_summary.keys(), reverse=True)
-    summary_list = [
-        {
-            "month": m,
-            "total_hours": monthly_summary[m]["total_hours"],
-            "total_expense": monthly_summary[m]["total_expense"],
-        }
-        for m in sorted_months
-    ]
-
-    context = {
-        "project": project,
-        "work_logs": work_logs,
-        "expenses": expenses,
-        "monthly_summary": summary_list,
-    }
+    attach_budget_forecasts([project])
+    context = {"project": project, **get_project_breakdown(project)}
 
     rendered_modal = render_template(
         "business/project_detail.html#project_detail_modal",
@@ -317,3 +250,43 @@ def project_detail_view(request: HttpRequest, pk: int):
             SSE.patch_signals({"is_modal_open": True}),
         ]
     )
+
+
+PROJECT_ENTRY_KINDS = {
+    "logs": ("business/project_detail.html#project_log_rows", "#project-log-rows"),
+    "expenses": (
+        "business/project_detail.html#project_expense_rows",
+        "#project-expense-rows",
+    ),
+}
+
+
+def project_entries_view(request: HttpRequest, pk: int, kind: str):
+    """Kolejna strona wpisów czasu pracy lub wydatków w szczegółach projektu."""
+    if not request.user.is_authenticated:
+        return DatastarResponse(SSE.redirect("/login/"))
+
+    organization = get_user_org(request.user)
+    project = Project.objects.filter(pk=pk, organization=organization).first()
+    if project is None or kind not in PROJECT_ENTRY_KINDS:
+        messages.error(request, "Projekt nie istnieje.")
+        return DatastarResponse(get_toast_event(request))
+
+    cursor = request.GET.get("cursor")
+    rows, next_cursor = get_project_entries(project, kind, cursor)
+    template, selector = PROJECT_ENTRY_KINDS[kind]
+    rendered_rows = render_template(
+        template,
+        {"project": project, "kind": kind, "rows": rows, "next_cursor": next_cursor},
+        request,
+    )
+    if cursor:
+        return DatastarResponse(
+            [
+                SSE.remove_elements(f"#project-{kind}-more"),
+                SSE.patch_elements(rendered_rows, selector=selector, mode="append"),
+            ]
+        )
+    return DatastarResponse(
+        SSE.patch_elements(rendered_rows, selector=selector, mode="inner")
+    )
@@ -0,0 +1,34 @@
+from datastar_py import ServerSentEventGenerator as SSE
+from datastar_py.django import DatastarResponse
+from datastar_py.django import read_signals as read_signals_django
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import redirect
+
+from business.search import global_search
+from business.views.utils import render_template
+
+
+def global_search_view(request: HttpRequest):
+    """Wyszukiwarka w projektach, pracownikach i opisach transakcji."""
+    if not request.user.is_authenticated:
+        return redirect("core:login")
+
+    if "Datastar-Request" in request.headers:
+        signals = read_signals_django(request) or {}
+        query = signals.get("global_query", "")
+    else:
+        query = request.GET.get("q", "")
+
+    context = {"query": query, "results": global_search(request.user, query)}
+
+    if "Datastar-Request" in request.headers:
+        rendered = render_template(
+            "business/search.html#search_results", context, request
+        )
+        return DatastarResponse(
+            SSE.patch_elements(
+                rendered, selector="#global-search-results", mode="inner"
+            )
+        )
+
+    return HttpResponse(render_template("business/search.html", context, request))
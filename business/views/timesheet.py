@@ -6,12 +6,16 @@ from datastar_py import ServerSentEventGenerator as SSE
 from datastar_py.django import DatastarResponse
 from datastar_py.django import read_signals as read_signals_django
 from django.contrib import messages
-from django.db.models import Case, IntegerField, Q, When
+from django.db.models import Q
+from django.db.models.functions import ExtractMonth, ExtractYear
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 from django.utils import formats, timezone
 
+from business.employment import get_employment_index
 from business.models import Project, Worker, WorkLog
+from business.payrolls import mark_payroll_dirty
+from business.projects import get_open_projects
 from business.views.utils import (
     get_toast_event,
     get_user_org,
@@ -67,8 +71,10 @@ def get_timesheet_context(request, user, organization, year, month):
         user.visible_workers.add(user_worker_id)
         visible_worker_ids.append(str(user_worker_id))
 
+    # Pracownicy zatrudnieni w danym miesiącu, także ci, którzy już odeszli.
+    employed_ids = get_employment_index(organization).employed_in_month(year, month)
     all_workers_qs = Worker.objects.filter(
-        organization=organization, is_active=True
+        organization=organization, id__in=employed_ids
     ).select_related("user")
     if not user.is_owner:
         all_workers_qs = all_workers_qs.filter(Q(user__isnull=True) | Q(user=user))
@@ -97,23 +103,8 @@ def get_timesheet_context(request, user, organization, year, month):
 
     month_display = formats.date_format(date(year, month, 1), "F Y")
 
-    projects = list(
-        Project.objects.filter(organization=organization)
-        .exclude(Q(status="COMPLETED") | Q(is_default=True))
-        .annotate(
-            status_order=Case(
-                When(status="ACTIVE", then=1),
-                When(status="PLANNED", then=2),
-                When(status="COMPLETED", then=3),
-                default=4,
-                output_field=IntegerField(),
-            )
-        )
-        .order_by("-is_default", "status_order", "name")
-    )
-    default_project = next(
-        (p for p in projects if p.is_default), projects[0] if projects else None
-    )
+    projects = get_open_projects(organization)
+    default_project = projects[0] if projects else None
 
     worker_visible_signals = {
         f"workerVisible_{wid}": True
@@ -121,7 +112,7 @@ def get_timesheet_context(request, user, organization, year, month):
         if wid.strip().isdigit()
     }
     worker_visible_signals["selected_project"] = (
-        str(default_project.id) if default_project else ""
+        str(default_project["id"]) if default_project else ""
     )
 
     return {
@@ -173,8 +164,10 @@ def timesheet_manage_workers_view(request: HttpRequest):
         return DatastarResponse(SSE.redirect("/login/"))
 
     organization = get_user_org(request.user)
+    year, month = _get_year_month(request)
+    employed_ids = get_employment_index(organization).employed_in_month(year, month)
     workers_qs = Worker.objects.filter(
-        organization=organization, is_active=True
+        organization=organization, id__in=employed_ids
     ).select_related("user")
 
     worker_profile = getattr(request.user, "worker_profile", None)
@@ -213,7 +206,7 @@ def timesheet_manage_workers_view(request: HttpRequest):
         worker_signals = {
             f"workerVisible_{w.id}": (str(w.id) in visible_worker_ids)
             for w in Worker.objects.filter(
-                organization=organization, is_active=True
+                organization=organization, id__in=employed_ids
             ).filter(
                 Q(user__isnull=True) | Q(user=request.user)
                 if not request.user.is_owner
@@ -221,8 +214,6 @@ def timesheet_manage_workers_view(request: HttpRequest):
             )
         }
 
-    year, month = _get_year_month(request)
-
     context = {
         "all_workers": all_workers,
         "user_worker_id": user_worker_id,
@@ -373,12 +364,23 @@ def timesheet_update_view(request: HttpRequest):
             existing.delete()
         log = None
 
+    if old_hours != new_hours:
+        mark_payroll_dirty(request, organization, year, month, worker.id)
+
     if was_overwritten and old_hours != new_hours:
         messages.warning(
             request,
             f"Nadpisano wpis pracownika {worker} z {log_date.strftime('%Y-%m-%d')} utworzony przez: {old_creator.get_full_name() or old_creator.username if old_creator else 'Nieznany'}",
         )
 
+    if hours > 0 and not get_employment_index(organization).is_employed(
+        worker.id, log_date
+    ):
+        messages.warning(
+            request,
+            f"Uwaga: {worker} nie ma okresu zatrudnienia obejmującego {log_date.strftime('%d.%m.%Y')}.",
+        )
+
     if (
         hours > 0
         and worker.vacations.filter(
@@ -460,7 +462,8 @@ def timesheet_bulk_fill_view(request: HttpRequest):
         worker_profile = getattr(request.user, "worker_profile", None)
         user_worker_id = worker_profile.id if worker_profile else None
         workers_qs = Worker.objects.filter(
-            organization=organization, is_active=True
+            organization=organization,
+            id__in=get_employment_index(organization).employed_on(log_date),
         ).filter(Q(id__in=raw_ids) | Q(id=user_worker_id))
 
         default_project = Project.objects.filter(
@@ -548,6 +551,10 @@ def timesheet_bulk_fill_view(request: HttpRequest):
                 if existing:
                     existing.delete()
 
+            mark_payroll_dirty(
+                request, organization, log_date.year, log_date.month, worker.id
+            )
+
             if was_overwritten:
                 messages.warning(
                     request,
@@ -655,17 +662,14 @@ def timesheet_assign_project_view(request: HttpRequest):
             request.user.visible_workers.values_list("id", flat=True)
         )
 
+    employed_ids = get_employment_index(organization).employed_in_month(year, month)
     all_workers = list(
-        Worker.objects.filter(organization=organization, is_active=True).filter(
+        Worker.objects.filter(organization=organization, id__in=employed_ids).filter(
             id__in=visible_worker_ids
         )
     )
 
-    projects = list(
-        Project.objects.filter(organization=organization).exclude(
-            Q(status="COMPLETED") | Q(is_default=True)
-        )
-    )
+    projects = get_open_projects(organization)
 
     _, num_days = calendar.monthrange(year, month)
     days = list(range(1, num_days + 1))
@@ -726,12 +730,24 @@ def timesheet_assign_project_post(request: HttpRequest):
         )
         worker_ids = [wid for wid in worker_ids if wid in allowed_workers]
 
-    updated = WorkLog.objects.filter(
+    logs = WorkLog.objects.filter(
         organization=organization,
         worker_id__in=worker_ids,
         date__range=[start_date, end_date],
         hours__gt=0,
-    ).update(project=project)
+    )
+    # Koszt robocizny idzie za godzinami, więc przeliczamy miesiące i pracowników,
+    # których wpisy zmieniły projekt.
+    moved = set(
+        logs.exclude(project=project)
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .order_by()
+        .values_list("worker_id", "year", "month")
+        .distinct()
+    )
+    updated = WorkLog.reassign_project(logs, project)
+    for worker_id, log_year, log_month in moved:
+        mark_payroll_dirty(request, organization, log_year, log_month, worker_id)
 
     messages.success(
         request,
@@ -1,3 +1,6 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
 from datastar_py import ServerSentEventGenerator as SSE
 from django.template.loader import render_to_string
 
@@ -18,3 +21,23 @@ def get_toast_event(request):
     """Generuje zdarzenie SSE dla powiadomień toast."""
     html = render_template("partials.html#toast_messages", {}, request)
     return SSE.patch_elements(html, selector="#toast-container")
+
+
+async def stream_sync(iterable, batch_size=1):
+    """Asynchroniczny iterator po synchronicznym generatorze odpowiedzi.
+
+    Pod ASGI Django zbiera synchroniczną treść ``StreamingHttpResponse``
+    w całości, zanim wyśle pierwszy bajt. Tu kolejne porcje (po
+    ``batch_size`` elementów) są pobierane przez ``sync_to_async`` w wątku
+    obsługującym ORM, więc trafiają do klienta na bieżąco.
+    """
+    iterator = iter(iterable)
+    take = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    try:
+        while batch := await take():
+            for item in batch:
+                yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
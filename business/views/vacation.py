@@ -0,0 +1,65 @@
+from datetime import MAXYEAR, MINYEAR, datetime
+
+from datastar_py import ServerSentEventGenerator as SSE
+from datastar_py.django import DatastarResponse
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import redirect
+
+from business.employment import get_employment_index
+from business.vacations import build_vacation_calendar, calendar_range
+from business.views.utils import get_toast_event, get_user_org, render_template
+
+
+def _shift_month(year, month, delta):
+    index = year * 12 + month - 1 + delta
+    return index // 12, index % 12 + 1
+
+
+def vacation_calendar_view(request: HttpRequest):
+    """Kalendarz urlopów zespołu na miesiąc lub kwartał."""
+    if not request.user.is_authenticated:
+        return redirect("core:login")
+
+    organization = get_user_org(request.user)
+    now = datetime.now()
+    try:
+        year = int(request.GET.get("year", now.year))
+        month = int(request.GET.get("month", now.month))
+        # Ostatni rok odpada, bo obłożenie liczone jest do dnia po końcu okresu.
+        if not (MINYEAR <= year < MAXYEAR and 1 <= month <= 12):
+            raise ValueError
+    except ValueError:
+        year, month = now.year, now.month
+    span = "quarter" if request.GET.get("span") == "quarter" else "month"
+
+    start, end = calendar_range(year, month, span)
+    step = 3 if span == "quarter" else 1
+    team_size = len(get_employment_index(organization).employed_between(start, end))
+    context = {
+        **build_vacation_calendar(organization, start, end, team_size),
+        "span": span,
+        "start": start,
+        "end": end,
+        "current_year": start.year,
+        "current_month": start.month,
+        "team_size": team_size,
+        "prev": _shift_month(start.year, start.month, -step),
+        "next": _shift_month(start.year, start.month, step),
+    }
+
+    if "Datastar-Request" in request.headers:
+        rendered = render_template(
+            "business/vacation_calendar.html#calendar_content", context, request
+        )
+        return DatastarResponse(
+            [
+                SSE.patch_elements(
+                    rendered, selector="#vacation-calendar", mode="inner"
+                ),
+                get_toast_event(request),
+            ]
+        )
+
+    return HttpResponse(
+        render_template("business/vacation_calendar.html", context, request)
+    )
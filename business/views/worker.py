@@ -3,19 +3,33 @@ from datastar_py.django import DatastarResponse
 from datastar_py.django import read_signals as read_signals_django
 from django.contrib import messages
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Value
-from django.db.models.functions import Concat
+from django.db import transaction
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 
-from business.forms import PasswordResetForm, PromoteForm, VacationForm, WorkerForm
-from business.models import Vacation, Worker
+from business.forms import (
+    PasswordResetForm,
+    PromoteForm,
+    VacationForm,
+    WorkerForm,
+    WorkerImportForm,
+)
+from business.imports import read_statement
+from business.models import Vacation, WalletTransaction, Worker
+from business.projects import withdraw_project_costs
+from business.search import match_ids
 from business.views.utils import (
     get_toast_event,
     get_user_org,
     is_owner,
     render_template,
 )
+from business.workers import (
+    attach_worker_summaries,
+    delete_workers,
+    onboard_workers,
+    set_workers_active,
+)
 
 User = get_user_model()
 
@@ -25,15 +39,8 @@ def get_workers(organization, search_query="", show_inactive=False):
     if not show_inactive:
         qs = qs.filter(is_active=True)
     if search_query:
-        qs = qs.annotate(
-            full_name=Concat("first_name", Value(" "), "last_name"),
-            full_name_rev=Concat("last_name", Value(" "), "first_name"),
-        ).filter(
-            Q(full_name__icontains=search_query)
-            | Q(full_name_rev__icontains=search_query)
-            | Q(address__icontains=search_query)
-        )
-    return list(qs)
+        qs = qs.filter(pk__in=match_ids("worker", search_query))
+    return attach_worker_summaries(organization, list(qs))
 
 
 def refresh_worker_list(request, organization):
@@ -85,10 +92,17 @@ def handle_password_reset(data, user):
     return False, form
 
 
+def delete_user_account(user):
+    """Usuwa konto brygadzisty; jego portfel i wydatki znikają kaskadowo."""
+    with transaction.atomic():
+        withdraw_project_costs(
+            transactions=WalletTransaction.objects.filter(wallet__user=user)
+        )
+        user.delete()
+
+
 def delete_worker_and_user(worker):
-    if worker.user:
-        worker.user.delete()
-    worker.delete()
+    delete_workers(Worker.objects.filter(pk=worker.pk))
 
 
 def worker_list_view(request: HttpRequest):
@@ -168,6 +182,49 @@ def worker_create_view(request: HttpRequest):
     )
 
 
+def worker_import_view(request: HttpRequest):
+    """Zbiorcze dodanie pracowników z listy CSV."""
+    if not request.user.is_authenticated or not is_owner(request.user):
+        return DatastarResponse(SSE.redirect("/login/"))
+
+    organization = get_user_org(request.user)
+    errors = []
+    if request.method == "POST":
+        form = WorkerImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            result = onboard_workers(
+                organization, read_statement(form.cleaned_data["file"])
+            )
+            errors = result["errors"]
+            if not errors:
+                messages.success(
+                    request,
+                    f"Dodano pracowników: {len(result['created'])} "
+                    f"(pominięci, już zatrudnieni: {result['duplicates']}).",
+                )
+                return DatastarResponse(
+                    [
+                        refresh_worker_list(request, organization),
+                        SSE.patch_signals({"is_modal_open": False}),
+                        get_toast_event(request),
+                    ]
+                )
+    else:
+        form = WorkerImportForm()
+
+    rendered_modal = render_template(
+        "business/worker_list.html#worker_import_form",
+        {"form": form, "errors": errors, "url": request.path},
+        request,
+    )
+    return DatastarResponse(
+        [
+            SSE.patch_elements(rendered_modal, selector="#modal-content"),
+            SSE.patch_signals({"is_modal_open": True}),
+        ]
+    )
+
+
 def worker_edit_view(request: HttpRequest, pk: int):
     """Edycja danych pracownika."""
     if not request.user.is_authenticated or not is_owner(request.user):
@@ -270,7 +327,7 @@ def worker_demote_view(request: HttpRequest, pk: int):
 
     if request.method == "POST" and worker.user:
         username = worker.user.username
-        worker.user.delete()
+        delete_user_account(worker.user)
         messages.info(request, f"Odebrano uprawnienia dla {username}")
         return DatastarResponse(
             [
@@ -311,6 +368,55 @@ def worker_delete_view(request: HttpRequest, pk: int):
     return DatastarResponse(get_toast_event(request))
 
 
+BULK_WORKER_ACTIONS = {
+    "deactivate": "Dezaktywowano pracowników: {count}.",
+    "activate": "Aktywowano pracowników: {count}.",
+    "delete": "Usunięto pracowników: {count}.",
+}
+
+
+@transaction.atomic
+def worker_bulk_action_view(request: HttpRequest):
+    """Dezaktywacja, aktywacja lub usunięcie zaznaczonych pracowników naraz."""
+    if not request.user.is_authenticated or not is_owner(request.user):
+        return DatastarResponse(SSE.redirect("/login/"))
+
+    if request.method != "POST":
+        return HttpResponse(status=405)
+
+    action = request.GET.get("action")
+    if action not in BULK_WORKER_ACTIONS:
+        messages.error(request, "Nieznana operacja.")
+        return DatastarResponse(get_toast_event(request))
+
+    organization = get_user_org(request.user)
+    signals = read_signals_django(request) or {}
+    selected = [
+        key.removeprefix("workerSelected_")
+        for key, value in signals.items()
+        if key.startswith("workerSelected_") and value is True
+    ]
+    ids = [int(pk) for pk in selected if pk.isdigit()]
+    if not ids:
+        messages.warning(request, "Nie zaznaczono żadnego pracownika.")
+        return DatastarResponse(get_toast_event(request))
+
+    workers = Worker.objects.filter(organization=organization, pk__in=ids)
+    if action == "delete":
+        count = delete_workers(workers)
+    else:
+        count = set_workers_active(workers, action == "activate")
+
+    messages.success(request, BULK_WORKER_ACTIONS[action].format(count=count))
+    return DatastarResponse(
+        [
+            refresh_worker_list(request, organization),
+            SSE.patch_signals({f"workerSelected_{pk}": None for pk in selected}),
+            get_toast_event(request),
+        ]
+    )
+
+
 def worker_password_reset_view(request: HttpRequest, pk: int):
     """Reset hasła dla konta brygadzisty."""
     if not request.user.is_authenticated or not is_owner(request.user):
@@ -0,0 +1,172 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from business.models import Wallet, WalletMonthSnapshot, WalletTransaction
+
+
+def next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def previous_month(year, month):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def write_wallet_snapshots(wallet, year, month):
+    """Uzupełnia brakujące zestawienia portfela do wskazanego miesiąca włącznie.
+
+    Zaczyna od ostatniego zachowanego zestawienia (lub miesiąca pierwszej
+    transakcji), więc po unieważnieniu przelicza tylko miesiące od zmienionej
+    transakcji. Sumy wszystkich brakujących miesięcy pochodzą z jednego
+    zapytania grupującego. Zwraca liczbę zapisanych zestawień.
+    """
+    last = (
+        wallet.month_snapshots.filter(Q(year__lt=year) | Q(year=year, month__lte=month))
+        .order_by("-year", "-month")
+        .first()
+    )
+    if last:
+        opening = last.closing_balance
+        start = next_month(last.year, last.month)
+    else:
+        first_date = (
+            wallet.transactions.order_by("date").values_list("date", flat=True).first()
+        )
+        if first_date is None:
+            return 0
+        opening = Decimal(0)
+        start = (first_date.year, first_date.month)
+    if start > (year, month):
+        return 0
+
+    rows = (
+        wallet.transactions.filter(
+            date__gte=date(*start, 1), date__lt=date(*next_month(year, month), 1)
+        )
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .order_by()
+        .values("year", "month", "type", "category")
+        .annotate(total=Sum("amount"))
+    )
+    totals = {}
+    for row in rows:
+        month_totals = totals.setdefault((row["year"], row["month"]), {})
+        month_totals[row["type"]] = month_totals.get(row["type"], 0) + row["total"]
+        if row["type"] == WalletTransaction.Type.EXPENSE:
+            categories = month_totals.setdefault("categories", {})
+            key = row["category"] or WalletTransaction.Category.OTHER
+            amount = Decimal(categories.get(key, 0)) + row["total"]
+            categories[key] = str(amount.quantize(Decimal("0.01")))
+
+    snapshots = []
+    current = start
+    while current <= (year, month):
+        month_totals = totals.get(current, {})
+        snapshot = WalletMonthSnapshot(
+            wallet=wallet,
+            year=current[0],
+            month=current[1],
+            opening_balance=opening,
+            refills=month_totals.get(WalletTransaction.Type.REFILL, 0),
+            expenses=month_totals.get(WalletTransaction.Type.EXPENSE, 0),
+            advances=month_totals.get(WalletTransaction.Type.ADVANCE, 0),
+            expenses_by_category=month_totals.get("categories", {}),
+        )
+        snapshot.closing_balance = (
+            opening + snapshot.refills - snapshot.expenses - snapshot.advances
+        )
+        snapshots.append(snapshot)
+        opening = snapshot.closing_balance
+        current = next_month(*current)
+
+    WalletMonthSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+    return len(snapshots)
+
+
+def close_wallet_month(organization, year, month):
+    """Zapisuje zestawienia wszystkich portfeli organizacji do miesiąca włącznie."""
+    return sum(
+        write_wallet_snapshots(wallet, year, month)
+        for wallet in Wallet.objects.filter(organization=organization)
+    )
+
+
+TRANSACTION_PAGE_SIZE = 30
+TRANSACTION_FILTERS = {
+    "tx_type": "type",
+    "tx_category": "category",
+    "tx_project": "project_id",
+    "tx_worker": "worker_id",
+    "tx_date_from": "date__gte",
+    "tx_date_to": "date__lte",
+}
+
+
+TRANSACTION_ROW_RELATIONS = (
+    "wallet__user__worker_profile",
+    "project",
+    "worker",
+)
+
+
+def load_transaction_rows(queryset):
+    """Dołącza relacje wyświetlane w wierszu transakcji (portfel, projekt, pracownik).
+
+    ``User.get_full_name`` sięga do ``worker_profile``, więc jest ono pobierane
+    w tym samym zapytaniu; strona historii kosztuje stałą liczbę zapytań.
+    """
+    return queryset.select_related(*TRANSACTION_ROW_RELATIONS)
+
+
+def filter_transactions(queryset, filters):
+    """Zawęża transakcje według sygnałów filtrów (puste wartości są pomijane)."""
+    lookups = {
+        lookup: filters[name]
+        for name, lookup in TRANSACTION_FILTERS.items()
+        if filters.get(name) not in (None, "")
+    }
+    for name in ("date__gte", "date__lte"):
+        if name in lookups:
+            try:
+                lookups[name] = date.fromisoformat(str(lookups[name]))
+            except ValueError:
+                del lookups[name]
+    for name in ("project_id", "worker_id"):
+        if name in lookups and not str(lookups[name]).isdigit():
+            del lookups[name]
+    return queryset.filter(**lookups)
+
+
+def encode_cursor(transaction):
+    return f"{transaction.date.isoformat()}_{transaction.pk}"
+
+
+def decode_cursor(cursor):
+    """Zwraca (data, id) z kursora lub None, gdy kursor jest nieprawidłowy."""
+    try:
+        cursor_date, cursor_id = str(cursor).split("_", 1)
+        return date.fromisoformat(cursor_date), int(cursor_id)
+    except ValueError:
+        return None
+
+
+def get_transaction_page(queryset, cursor=None, page_size=TRANSACTION_PAGE_SIZE):
+    """Zwraca stronę transakcji od najnowszych i kursor następnej strony.
+
+    Stronicowanie kluczem (date, id) zamiast OFFSET: kolejne strony korzystają
+    z indeksów ``(…, -date, -id)`` i nie zwalniają wraz z głębokością historii.
+    """
+    queryset = queryset.order_by("-date", "-id")
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        cursor_date, cursor_id = position
+        queryset = queryset.filter(
+            Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id)
+        )
+
+    rows = list(queryset[: page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
@@ -0,0 +1,310 @@
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from business.employment import invalidate_employment_index
+from business.imports import parse_date
+from business.models import (
+    EmploymentPeriod,
+    Payroll,
+    WalletTransaction,
+    Worker,
+    WorkLog,
+)
+from business.projects import withdraw_project_costs
+
+ONBOARDING_BATCH_SIZE = 500
+WORKER_SUMMARY_TIMEOUT = 60 * 60
+EMPTY_WORKER_SUMMARY = {
+    "month_hours": Decimal(0),
+    "total_advances": Decimal(0),
+    "outstanding_advances": Decimal(0),
+    "last_payroll": None,
+}
+
+# Kolumny listy pracowników: pole -> akceptowane nagłówki (małymi literami).
+WORKER_COLUMNS = {
+    "first_name": ("imię", "imie", "first_name"),
+    "last_name": ("nazwisko", "last_name"),
+    "hourly_rate": ("stawka", "stawka godzinowa", "hourly_rate"),
+    "hired_at": ("data zatrudnienia", "zatrudniony", "hired_at"),
+    "phone": ("telefon", "phone"),
+    "address": ("adres", "address"),
+    "notes": ("notatki", "uprawnienia", "notes"),
+}
+
+
+def _column(row, field):
+    for header in WORKER_COLUMNS[field]:
+        if row.get(header):
+            return row[header]
+    return ""
+
+
+def _worker_key(first_name, last_name, phone):
+    return (
+        first_name.casefold(),
+        last_name.casefold(),
+        "".join(ch for ch in phone or "" if ch.isdigit()),
+    )
+
+
+def parse_worker_row(organization, row, today):
+    first_name = _column(row, "first_name")[:100]
+    last_name = _column(row, "last_name")[:100]
+    if not first_name or not last_name:
+        raise ValueError("Brak imienia lub nazwiska.")
+    rate = _column(row, "hourly_rate").replace(",", ".")
+    try:
+        hourly_rate = Decimal(rate)
+    except InvalidOperation:
+        raise ValueError(f"Nieprawidłowa stawka: {rate or '—'}")
+    if hourly_rate <= 0 or hourly_rate != hourly_rate.to_integral_value():
+        raise ValueError("Stawka musi być dodatnią liczbą całkowitą (PLN).")
+    hired_at = _column(row, "hired_at")
+    return Worker(
+        organization=organization,
+        first_name=first_name,
+        last_name=last_name,
+        hourly_rate=int(hourly_rate),
+        hired_at=parse_date(hired_at) if hired_at else today,
+        phone=_column(row, "phone")[:20] or None,
+        address=_column(row, "address") or None,
+        notes=_column(row, "notes") or None,
+    )
+
+
+def onboard_workers(organization, rows, today=None):
+    """Zakłada pracowników z wierszy listy CSV (``imports.read_statement``).
+
+    Najpierw waliduje wszystkie wiersze; jeśli którykolwiek jest błędny,
+    nic nie zapisuje. Pracownicy i ich okresy zatrudnienia powstają przez
+    ``bulk_create`` w jednej transakcji, z pominięciem ``Worker.save``.
+    Osoby już zatrudnione w organizacji (to samo imię, nazwisko i telefon)
+    oraz powtórzenia w pliku są pomijane. Zwraca słownik z listą utworzonych
+    pracowników (``created``), liczbą pominiętych (``duplicates``) i błędami
+    (``errors``: pary numer linii, komunikat).
+    """
+    today = today or timezone.now().date()
+    known = {
+        _worker_key(*row)
+        for row in Worker.objects.filter(organization=organization).values_list(
+            "first_name", "last_name", "phone"
+        )
+    }
+    workers, errors, duplicates = [], [], 0
+    for line, row in rows:
+        try:
+            worker = parse_worker_row(organization, row, today)
+        except ValueError as error:
+            errors.append((line, str(error)))
+            continue
+        key = _worker_key(worker.first_name, worker.last_name, worker.phone)
+        if key in known:
+            duplicates += 1
+            continue
+        known.add(key)
+        workers.append(worker)
+
+    if errors:
+        return {"created": [], "duplicates": duplicates, "errors": errors}
+
+    with transaction.atomic():
+        Worker.objects.bulk_create(workers, batch_size=ONBOARDING_BATCH_SIZE)
+        EmploymentPeriod.objects.bulk_create(
+            [
+                EmploymentPeriod(
+                    worker=worker,
+                    organization=organization,
+                    start_date=worker.hired_at,
+                )
+                for worker in workers
+            ],
+            batch_size=ONBOARDING_BATCH_SIZE,
+        )
+    invalidate_employment_index(organization.pk)
+    invalidate_worker_summaries(organization.pk)
+    return {"created": workers, "duplicates": duplicates, "errors": []}
+
+
+def set_workers_active(queryset, active, today=None):
+    """Aktywuje lub dezaktywuje pracowników kilkoma zapytaniami zbiorczymi.
+
+    Odpowiada ``Worker.save`` dla zmiany statusu: dezaktywacja zamyka otwarte
+    okresy zatrudnienia i blokuje konta użytkowników, aktywacja zamyka
+    ewentualne otwarte okresy i otwiera nowe od dziś (lub od daty
+    zatrudnienia, jeśli jest późniejsza). Zwraca liczbę zmienionych pracowników.
+    """
+    today = today or timezone.now().date()
+    changed = list(
+        queryset.filter(is_active=not active).values_list(
+            "pk", "organization_id", "hired_at"
+        )
+    )
+    ids = [pk for pk, _, _ in changed]
+    if not ids:
+        return 0
+
+    with transaction.atomic():
+        EmploymentPeriod.objects.filter(
+            worker_id__in=ids, end_date__isnull=True
+        ).update(end_date=today)
+        if active:
+            EmploymentPeriod.objects.bulk_create(
+                [
+                    EmploymentPeriod(
+                        worker_id=pk,
+                        organization_id=organization_id,
+                        start_date=max(today, hired_at),
+                    )
+                    for pk, organization_id, hired_at in changed
+                ],
+                batch_size=ONBOARDING_BATCH_SIZE,
+            )
+        else:
+            get_user_model().objects.filter(
+                worker_profile__in=ids, is_active=True
+            ).update(is_active=False)
+        Worker.objects.filter(pk__in=ids).update(
+            is_active=active, updated_at=timezone.now()
+        )
+    for organization_id in {organization_id for _, organization_id, _ in changed}:
+        invalidate_employment_index(organization_id)
+    return len(ids)
+
+
+def _summary_key(organization_id):
+    return f"business:worker-summaries:{organization_id}"
+
+
+def build_worker_summaries(organization, year, month):
+    """Podsumowania pracowników organizacji w czterech zapytaniach.
+
+    Godziny w miesiącu, suma zaliczek, zaliczki potrącone w zamkniętych
+    wypłatach i ostatnia wypłata pochodzą z osobnych zapytań grupujących, więc
+    ich liczba nie zależy od liczby pracowników. Zaliczki do rozliczenia to
+    wszystkie pobrane minus potrącone w zamkniętych miesiącach. Pracownicy
+    bez godzin, zaliczek i wypłat nie mają wpisu (``EMPTY_WORKER_SUMMARY``).
+    """
+    hours = dict(
+        WorkLog.objects.filter(
+            organization=organization, date__year=year, date__month=month
+        )
+        .values("worker_id")
+        .annotate(total=Sum("hours"))
+        .values_list("worker_id", "total")
+    )
+    advances = dict(
+        WalletTransaction.objects.filter(
+            organization=organization,
+            type=WalletTransaction.Type.ADVANCE,
+            worker__isnull=False,
+        )
+        .values("worker_id")
+        .annotate(total=Sum("amount"))
+        .values_list("worker_id", "total")
+    )
+    deducted = dict(
+        Payroll.objects.filter(organization=organization, status=Payroll.Status.CLOSED)
+        .values("worker_id")
+        .annotate(total=Sum("advances_deducted"))
+        .values_list("worker_id", "total")
+    )
+    last_payrolls = {
+        row["worker_id"]: row
+        for row in Payroll.objects.filter(organization=organization)
+        .annotate(
+            recency=Window(
+                RowNumber(),
+                partition_by=F("worker_id"),
+                order_by=[F("year").desc(), F("month").desc()],
+            )
+        )
+        .filter(recency=1)
+        .values("worker_id", "year", "month", "status", "net_pay")
+    }
+
+    return {
+        worker_id: {
+            "month_hours": hours.get(worker_id) or Decimal(0),
+            "total_advances": advances.get(worker_id) or Decimal(0),
+            "outstanding_advances": (advances.get(worker_id) or Decimal(0))
+            - (deducted.get(worker_id) or Decimal(0)),
+            "last_payroll": last_payrolls.get(worker_id),
+        }
+        for worker_id in hours.keys() | advances.keys() | last_payrolls.keys()
+    }
+
+
+def get_worker_summaries(organization, today=None):
+    """Podsumowania pracowników z cache (``invalidate_worker_summaries``).
+
+    Wpis w cache pamięta miesiąc, dla którego policzono godziny, więc
+    na początku nowego miesiąca jest budowany od nowa.
+    """
+    today = today or timezone.now().date()
+    period = (today.year, today.month)
+    key = _summary_key(organization.pk)
+    cached = cache.get(key)
+    if cached is None or cached["period"] != period:
+        cached = {
+            "period": period,
+            "workers": build_worker_summaries(organization, *period),
+        }
+        cache.set(key, cached, WORKER_SUMMARY_TIMEOUT)
+    return cached["workers"]
+
+
+def attach_worker_summaries(organization, workers, today=None):
+    """Ustawia ``worker.summary`` dla listy pracowników i ją zwraca."""
+    summaries = get_worker_summaries(organization, today)
+    for worker in workers:
+        worker.summary = summaries.get(worker.pk, EMPTY_WORKER_SUMMARY)
+    return workers
+
+
+def invalidate_worker_summaries(organization_id):
+    cache.delete(_summary_key(organization_id))
+
+
+def delete_workers(queryset):
+    """Usuwa pracowników wraz z ich kontami użytkowników.
+
+    Konta i pracownicy są usuwani dwoma zapytaniami ``delete`` w jednej
+    transakcji. Kaskada kasuje wpisy czasu pracy, portfele z transakcjami
+    i wypłaty z pominięciem ich ``delete``, więc wcześniej wycofujemy ich
+    koszty z sum projektów, a potem przeliczamy koszty robocizny
+    i podsumowania wypłat dotkniętych miesięcy. Kaskada usuwa też zaliczki
+    wydane z portfeli usuwanych brygadzistów innym pracownikom, więc ich
+    wypłaty DRAFT są przeliczane. Zwraca liczbę usuniętych pracowników.
+    """
+    from business.payrolls import (
+        cascaded_advance_payrolls,
+        refresh_payroll_months,
+        worker_payroll_months,
+    )
+
+    workers = list(queryset.values_list("pk", "organization_id"))
+    ids = [pk for pk, _ in workers]
+    if not ids:
+        return 0
+
+    with transaction.atomic():
+        months = worker_payroll_months(ids)
+        advance_payrolls = cascaded_advance_payrolls(ids)
+        withdraw_project_costs(
+            WorkLog.objects.filter(worker_id__in=ids),
+            WalletTransaction.objects.filter(wallet__user__worker_profile__in=ids),
+        )
+        get_user_model().objects.filter(worker_profile__in=ids).delete()
+        Worker.objects.filter(pk__in=ids).delete()
+        refresh_payroll_months(months, advance_payrolls)
+    for organization_id in {organization_id for _, organization_id in workers}:
+        invalidate_employment_index(organization_id)
+        invalidate_worker_summaries(organization_id)
+    return len(ids)
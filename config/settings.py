@@ -33,6 +33,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "core.middleware.PasswordChangeMiddleware",
+    "business.middleware.PayrollRecalcMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -93,6 +94,21 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 AUTH_USER_MODEL = "core.User"
 
+# Liczba procesów renderujących paski wypłat (0 = renderowanie w procesie żądania)
+PAYSLIP_EXPORT_PROCESSES = int(
+    os.getenv("PAYSLIP_EXPORT_PROCESSES", str(min(4, os.cpu_count() or 1)))
+)
+
+# Liczba wątków przetwarzających zdjęcia paragonów (0 = przetwarzanie w żądaniu)
+RECEIPT_PROCESSING_THREADS = int(os.getenv("RECEIPT_PROCESSING_THREADS", "2"))
+
+# Wysyłanie plików paragonów przez serwer frontowy po autoryzacji w Django:
+# "" (Django), "x-accel-redirect" (nginx) lub "x-sendfile" (Apache, lighttpd)
+RECEIPT_SENDFILE_BACKEND = os.getenv("RECEIPT_SENDFILE_BACKEND", "")
+RECEIPT_ACCEL_REDIRECT_PREFIX = os.getenv(
+    "RECEIPT_ACCEL_REDIRECT_PREFIX", "/protected-media/"
+)
+
 LOGIN_URL = "core:login"
 LOGIN_REDIRECT_URL = "core:dashboard"
 LOGOUT_REDIRECT_URL = "core:login"
@@ -9,7 +9,7 @@ from django.db.models import Sum
 
 from business.models import Project, Wallet
 from core.models import User
-from business.views.payroll import get_payroll_stats, get_payrolls_for_month
+from business.payrolls import get_payroll_summary
 from .forms import LoginForm, PasswordChangeForm, RegisterForm
 
 
@@ -99,10 +99,9 @@ def dashboard_view(request):
             ).count()
 
             now = datetime.now()
-            payrolls = get_payrolls_for_month(
+            payroll_stats = get_payroll_summary(
                 request.user.organization, now.year, now.month
             )
-            payroll_stats = get_payroll_stats(payrolls)
             payroll_stats["month"] = now.month
             payroll_stats["year"] = now.year
 
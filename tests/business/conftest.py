@@ -0,0 +1,40 @@
+import os
+import shutil
+
+import pytest
+from django.core.cache import cache
+
+from business.pdf import FONT_FILES, FontRegistry
+
+SOURCE_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+
+@pytest.fixture
+def font_dir(tmp_path):
+    if not os.path.exists(SOURCE_FONT):
+        pytest.skip("Brak czcionki TTF w systemie.")
+    for filename in FONT_FILES.values():
+        shutil.copy(SOURCE_FONT, tmp_path / filename)
+    return tmp_path
+
+
+@pytest.fixture
+def pdf_fonts(font_dir, monkeypatch):
+    """Podmienia rejestr czcionek na czcionkę Unicode dostępną w systemie."""
+    registry = FontRegistry(font_dir)
+    monkeypatch.setattr("business.pdf.get_font_registry", lambda: registry)
+    return registry
+
+
+@pytest.fixture
+def media_root(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Czyści cache (np. katalog projektów), bo klucze wpisów powtarzają się między testami."""
+    cache.clear()
+    yield
+    cache.clear()
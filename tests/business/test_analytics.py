@@ -0,0 +1,153 @@
+import json
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from business.analytics import get_expense_analytics
+from business.models import ExpenseRollup, Project, Wallet, WalletTransaction
+from core.models import Organization, User
+
+
+def rollup_rows(org):
+    return sorted(
+        ExpenseRollup.objects.filter(organization=org).values_list(
+            "year",
+            "month",
+            "wallet_id",
+            "project_id",
+            "category",
+            "type",
+            "total",
+            "count",
+        )
+    )
+
+
+@pytest.mark.django_db
+class TestExpenseRollups:
+    def get_test_data(self):
+        org = Organization.objects.create(name="Analytics Org")
+        owner = User.objects.create_user(
+            username="analytics_owner",
+            password="pass",
+            organization=org,
+            role=User.Role.OWNER,
+        )
+        foreman = User.objects.create_user(
+            username="analytics_foreman",
+            first_name="Adam",
+            last_name="Nowak",
+            password="pass",
+            organization=org,
+            role=User.Role.FOREMAN,
+        )
+        wallet = Wallet.objects.create(user=foreman, organization=org)
+        project = Project.objects.create(organization=org, name="Most")
+        return org, owner, wallet, project
+
+    def test_incremental_rollups_match_rebuild(self):
+        org, _, wallet, project = self.get_test_data()
+        fuel = WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="EXPENSE",
+            amount="100.00",
+            category="FUEL",
+            project=project,
+            date=date(2026, 3, 5),
+        )
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="EXPENSE",
+            amount="40.00",
+            category="FUEL",
+            project=project,
+            date=date(2026, 3, 9),
+        )
+        food = WalletTransaction.objects.create(
+            organization=org,
+            type="EXPENSE",
+            amount="30.00",
+            category="FOOD",
+            date=date(2026, 4, 1),
+        )
+        fuel.amount = 60
+        fuel.date = date(2026, 4, 2)
+        fuel.save()
+        food.delete()
+
+        incremental = rollup_rows(org)
+        call_command("rebuild_expense_rollups", stdout=StringIO())
+        assert rollup_rows(org) == incremental
+        assert len(incremental) == 2
+
+    def test_project_delete_merges_rollups(self):
+        org, _, wallet, project = self.get_test_data()
+        for amount, expense_project in [("100.00", project), ("40.00", None)]:
+            WalletTransaction.objects.create(
+                wallet=wallet,
+                organization=org,
+                type="EXPENSE",
+                amount=amount,
+                category="FUEL",
+                project=expense_project,
+                date=date(2026, 3, 5),
+            )
+
+        project.delete()
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="EXPENSE",
+            amount="10.00",
+            category="FUEL",
+            date=date(2026, 3, 6),
+        )
+
+        incremental = rollup_rows(org)
+        assert len(incremental) == 1
+        assert incremental[0][-2:] == (150, 3)
+        call_command("rebuild_expense_rollups", stdout=StringIO())
+        assert rollup_rows(org) == incremental
+
+    def test_analytics_drill_down(self, client):
+        org, owner, wallet, project = self.get_test_data()
+        for category, amount in [("FUEL", 100), ("FOOD", 25), ("FUEL", 50)]:
+            WalletTransaction.objects.create(
+                wallet=wallet,
+                organization=org,
+                type="EXPENSE",
+                amount=amount,
+                category=category,
+                project=project,
+                date=date(2026, 5, 10),
+            )
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="REFILL",
+            amount=1000,
+            date=date(2026, 5, 1),
+        )
+
+        analytics = get_expense_analytics(org, 2026)
+        assert analytics["total"] == 175
+        assert [row["key"] for row in analytics["by_category"]] == ["FUEL", "FOOD"]
+        assert analytics["by_foreman"][0]["label"] == "Adam Nowak"
+
+        client.force_login(owner)
+        url = reverse("business:expense_analytics")
+        assert client.get(url).status_code == 200
+        response = client.get(
+            url,
+            {"datastar": json.dumps({"an_year": "2026", "an_category": "FOOD"})},
+            headers={"datastar-request": "true"},
+        )
+        content = b"".join(response.streaming_content).decode()
+        assert "selector #analytics-content" in content
+        assert "25,00" in content or "25.00" in content
+        assert "150" not in content
@@ -0,0 +1,134 @@
+import json
+import random
+from datetime import date, timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from business.employment import EmploymentIndex, get_employment_index
+from business.models import EmploymentPeriod, Payroll, Worker
+from business.workers import set_workers_active
+from core.models import Organization, User
+
+
+def test_index_matches_linear_scan():
+    rng = random.Random(7)
+    base = date(2025, 1, 1)
+    periods = []
+    for worker_id in range(40):
+        start = base + timedelta(days=rng.randrange(300))
+        for _ in range(rng.randrange(1, 4)):
+            end = start + timedelta(days=rng.randrange(60))
+            periods.append((worker_id, start, end if rng.random() < 0.8 else None))
+            start = end + timedelta(days=rng.randrange(1, 30))
+    index = EmploymentIndex(periods)
+
+    for _ in range(200):
+        start = base + timedelta(days=rng.randrange(400))
+        end = start + timedelta(days=rng.randrange(45))
+        expected = {
+            worker_id
+            for worker_id, s, e in periods
+            if s <= end and (e is None or e >= start)
+        }
+        assert index.employed_between(start, end) == expected
+        assert index.employed_on(start) == {
+            worker_id
+            for worker_id, s, e in periods
+            if s <= start and (e is None or e >= start)
+        }
+        worker_id = rng.randrange(40)
+        assert index.is_employed(worker_id, start, end) == (worker_id in expected)
+
+
+@pytest.mark.django_db
+class TestEmploymentIndex:
+    @pytest.fixture(autouse=True)
+    def setup_data(self):
+        self.org = Organization.objects.create(name="Employment Org")
+        self.owner = User.objects.create_user(
+            username="employment_owner",
+            password="pass",
+            organization=self.org,
+            role=User.Role.OWNER,
+        )
+        self.staying = Worker.objects.create(
+            organization=self.org,
+            first_name="Jan",
+            last_name="Stały",
+            hourly_rate=30,
+            hired_at=date(2025, 1, 1),
+        )
+        self.leaver = Worker.objects.create(
+            organization=self.org,
+            first_name="Adam",
+            last_name="Sezonowy",
+            hourly_rate=30,
+            hired_at=date(2025, 1, 1),
+        )
+        self.leaver.employment_periods.update(end_date=date(2025, 6, 15))
+        Worker.objects.filter(pk=self.leaver.pk).update(is_active=False)
+
+    def test_index_is_cached_and_invalidated(self):
+        index = get_employment_index(self.org)
+        assert index.employed_in_month(2025, 6) == {self.staying.pk, self.leaver.pk}
+        assert index.employed_in_month(2025, 7) == {self.staying.pk}
+        with CaptureQueriesContext(connection) as queries:
+            get_employment_index(self.org)
+        assert len(queries) == 0
+
+        set_workers_active(Worker.objects.filter(pk=self.staying.pk), False)
+        assert self.staying.pk not in get_employment_index(self.org).employed_on(
+            date.today() + timedelta(days=1)
+        )
+
+    def test_worker_without_periods_counts_from_hire_date(self):
+        legacy = Worker.objects.create(
+            organization=self.org,
+            first_name="Stary",
+            last_name="Wpis",
+            hourly_rate=30,
+            hired_at=date(2024, 3, 1),
+        )
+        EmploymentPeriod.objects.filter(worker=legacy).delete()
+        Worker.objects.filter(pk=self.staying.pk).update(hired_at=date(2024, 3, 1))
+
+        index = get_employment_index(self.org)
+        assert index.employed_on(date(2024, 5, 1)) == {legacy.pk}
+
+    def test_timesheet_shows_workers_employed_in_month(self, client):
+        client.force_login(self.owner)
+        self.owner.visible_workers.set([self.staying, self.leaver])
+        url = reverse("business:timesheet_grid_partial")
+
+        def grid(year, month):
+            response = client.get(
+                url,
+                {"year": year, "month": month, "datastar": json.dumps({})},
+                headers={"datastar-request": "true"},
+            )
+            return b"".join(response.streaming_content).decode()
+
+        june = grid(2025, 6)
+        assert "Stały" in june and "Sezonowy" in june
+        july = grid(2025, 7)
+        assert "Stały" in july and "Sezonowy" not in july
+
+    def test_payroll_list_flags_employed_without_payroll(self, client):
+        Payroll.objects.create(
+            organization=self.org,
+            worker=self.staying,
+            year=2025,
+            month=6,
+            total_hours=160,
+        )
+        client.force_login(self.owner)
+
+        response = client.get(
+            reverse("business:payroll_list"), {"year": 2025, "month": 6}
+        )
+        content = response.content.decode()
+        assert "bez wypłaty" in content
+        assert "Adam Sezonowy" in content
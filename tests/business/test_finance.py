@@ -1,10 +1,28 @@
+import json
 import uuid
+import warnings
+from datetime import date
+from io import BytesIO, StringIO
 
 import pytest
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from openpyxl import load_workbook
 
-from business.models import Wallet, WalletTransaction, Worker
+from business.models import (
+    Project,
+    Wallet,
+    WalletMonthSnapshot,
+    WalletTransaction,
+    Worker,
+)
+from business.views.finance import get_annotated_finances
+from business.wallets import get_transaction_page, write_wallet_snapshots
 from core.models import Organization, User
 
 
@@ -56,6 +74,7 @@ class TestFinance:
             amount=200,
         )
 
+        wallet.refresh_from_db()
         assert wallet.get_current_balance() == 650
 
     def test_wallet_view_access(self, client):
@@ -145,3 +164,389 @@ class TestFinance:
         assert "selector #finance-content" in streaming_content
         assert "is_modal_open" in streaming_content
         assert "false" in streaming_content
+
+
+@pytest.mark.django_db
+class TestWalletLedger:
+    def get_wallet(self):
+        uid = uuid.uuid4().hex[:6]
+        org = Organization.objects.create(name=f"Ledger Org {uid}")
+        user = User.objects.create_user(
+            username=f"ledger_{uid}",
+            password="pass",
+            organization=org,
+            role=User.Role.FOREMAN,
+        )
+        return org, Wallet.objects.create(user=user, organization=org)
+
+    def test_ledger_follows_edit_and_delete(self):
+        org, wallet = self.get_wallet()
+        WalletTransaction.objects.create(
+            wallet=wallet, organization=org, type="REFILL", amount=500
+        )
+        expense = WalletTransaction.objects.create(
+            wallet=wallet, organization=org, type="EXPENSE", amount=120
+        )
+
+        expense.amount = 80
+        expense.save()
+        wallet.refresh_from_db()
+        assert wallet.balance == 420
+        assert wallet.expenses_total == 80
+
+        expense.type = WalletTransaction.Type.REFILL
+        expense.save()
+        wallet.refresh_from_db()
+        assert wallet.balance == 580
+        assert wallet.refills_total == 580
+        assert wallet.expenses_total == 0
+
+        expense.delete()
+        wallet.refresh_from_db()
+        assert wallet.balance == 500
+        assert wallet.calculate_ledger_totals()["balance"] == 500
+
+    def test_reconcile_wallets_command(self):
+        org, wallet = self.get_wallet()
+        WalletTransaction.objects.create(
+            wallet=wallet, organization=org, type="REFILL", amount=300
+        )
+        Wallet.objects.filter(pk=wallet.pk).update(balance=0)
+
+        with pytest.raises(CommandError):
+            call_command("reconcile_wallets", stdout=StringIO())
+
+        call_command("reconcile_wallets", "--fix", stdout=StringIO())
+        wallet.refresh_from_db()
+        assert wallet.balance == 300
+        call_command("reconcile_wallets", stdout=StringIO())
+
+
+@pytest.mark.django_db
+class TestWalletMonthSnapshots:
+    def test_snapshots_chain_and_invalidate_from_edited_month(self):
+        org, wallet = TestWalletLedger().get_wallet()
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="REFILL",
+            amount=1000,
+            date=date(2025, 1, 10),
+        )
+        expense = WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="EXPENSE",
+            amount=200,
+            category=WalletTransaction.Category.FUEL,
+            date=date(2025, 2, 3),
+        )
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="ADVANCE",
+            amount=50,
+            date=date(2025, 3, 3),
+        )
+
+        assert write_wallet_snapshots(wallet, 2025, 3) == 3
+        feb, mar = (
+            WalletMonthSnapshot.objects.get(wallet=wallet, year=2025, month=m)
+            for m in (2, 3)
+        )
+        assert feb.opening_balance == 1000
+        assert feb.expenses_by_category == {"FUEL": "200.00"}
+        assert mar.closing_balance == 750
+
+        expense.amount = 100
+        expense.save()
+        assert list(
+            wallet.month_snapshots.order_by("month").values_list("month", flat=True)
+        ) == [1]
+
+        assert write_wallet_snapshots(wallet, 2025, 3) == 2
+        assert wallet.month_snapshots.get(month=3).closing_balance == 850
+
+    def test_saving_unchanged_entry_keeps_snapshots(self):
+        org, wallet = TestWalletLedger().get_wallet()
+        expense = WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="EXPENSE",
+            amount="200.00",
+            date=date(2025, 2, 3),
+        )
+        assert write_wallet_snapshots(wallet, 2025, 2) == 1
+
+        expense.description = "Paragon uzupełniony"
+        expense.amount = "200"
+        expense.date = "2025-02-03"
+        expense.save()
+
+        assert wallet.month_snapshots.filter(month=2).exists()
+        wallet.refresh_from_db()
+        assert wallet.expenses_total == 200
+
+    def test_monthly_expenses_read_from_snapshot(self):
+        org, wallet = TestWalletLedger().get_wallet()
+        today = timezone.now().date()
+        WalletTransaction.objects.create(
+            wallet=wallet, organization=org, type="EXPENSE", amount=40, date=today
+        )
+        WalletMonthSnapshot.objects.create(
+            wallet=wallet, year=today.year, month=today.month, expenses=99
+        )
+
+        annotated = get_annotated_finances(org).get(pk=wallet.pk)
+        assert annotated.monthly_expenses_sum == 99
+
+
+@pytest.mark.django_db
+class TestTransactionFeed:
+    def test_keyset_pages_do_not_overlap(self):
+        org, wallet = TestWalletLedger().get_wallet()
+        for day in range(1, 21):
+            for _ in range(2):
+                WalletTransaction.objects.create(
+                    wallet=wallet,
+                    organization=org,
+                    type="EXPENSE",
+                    amount=day,
+                    date=date(2025, 1, day),
+                )
+
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = get_transaction_page(wallet.transactions.all(), cursor, 15)
+            seen.extend(t.pk for t in rows)
+            if cursor is None:
+                break
+
+        assert len(seen) == len(set(seen)) == 40
+        assert seen == list(
+            wallet.transactions.order_by("-date", "-id").values_list("pk", flat=True)
+        )
+
+    def test_feed_view_filters_and_appends_next_page(self, client):
+        org, wallet = TestWalletLedger().get_wallet()
+        for day in range(1, 32):
+            WalletTransaction.objects.create(
+                wallet=wallet,
+                organization=org,
+                type="EXPENSE",
+                amount=10,
+                category=WalletTransaction.Category.FUEL,
+                date=date(2025, 1, day),
+            )
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="REFILL",
+            amount=500,
+            description="Zasilenie styczniowe",
+            date=date(2025, 1, 15),
+        )
+        client.force_login(wallet.user)
+        url = reverse("business:wallet_transaction_feed", args=[wallet.pk])
+        headers = {"datastar-request": "true"}
+
+        response = client.get(
+            url, {"datastar": json.dumps({"tx_type": "REFILL"})}, headers=headers
+        )
+        content = b"".join(response.streaming_content).decode()
+        assert "selector #transaction-list" in content
+        assert "Zasilenie styczniowe" in content
+        assert "transaction-feed-more" not in content
+
+        _, cursor = get_transaction_page(wallet.transactions.all())
+        response = client.get(url, {"cursor": cursor}, headers=headers)
+        content = b"".join(response.streaming_content).decode()
+        assert "mode append" in content
+        assert "mode remove" in content
+        assert "01.01.2025" in content
+
+    def test_finance_list_query_count_does_not_grow_with_rows(self, client):
+        org = Organization.objects.create(name="Feed Org")
+        owner = User.objects.create_user(
+            username="feed_owner",
+            password="pass",
+            organization=org,
+            role=User.Role.OWNER,
+        )
+        project = Project.objects.create(organization=org, name="Budowa")
+
+        def add_rows(count):
+            for i in range(count):
+                foreman = User.objects.create_user(
+                    username=f"feed_foreman_{uuid.uuid4().hex[:6]}",
+                    password="pass",
+                    organization=org,
+                    role=User.Role.FOREMAN,
+                )
+                worker = Worker.objects.create(
+                    organization=org,
+                    user=foreman,
+                    first_name="Jan",
+                    last_name=f"Brygadzista {i}",
+                    hourly_rate=30,
+                )
+                wallet = Wallet.objects.create(user=foreman, organization=org)
+                WalletTransaction.objects.create(
+                    wallet=wallet,
+                    organization=org,
+                    type="EXPENSE",
+                    amount=5,
+                    project=project,
+                    category=WalletTransaction.Category.FUEL,
+                )
+                WalletTransaction.objects.create(
+                    wallet=wallet,
+                    organization=org,
+                    type="ADVANCE",
+                    amount=5,
+                    worker=worker,
+                )
+
+        client.force_login(owner)
+        url = reverse("business:finance_list")
+
+        add_rows(2)
+        client.get(url)  # wypełnia cache katalogu projektów
+        with CaptureQueriesContext(connection) as small:
+            assert client.get(url).status_code == 200
+        add_rows(5)
+        with CaptureQueriesContext(connection) as large:
+            assert client.get(url).status_code == 200
+
+        assert len(large) == len(small)
+
+
+@pytest.mark.django_db
+class TestTransactionJournalExport:
+    def get_test_data(self):
+        org = Organization.objects.create(name="Journal Org")
+        owner = User.objects.create_user(
+            username="journal_owner",
+            password="pass",
+            organization=org,
+            role=User.Role.OWNER,
+        )
+        foreman = User.objects.create_user(
+            username="journal_foreman",
+            first_name="Adam",
+            last_name="Nowak",
+            password="pass",
+            organization=org,
+            role=User.Role.FOREMAN,
+        )
+        wallet = Wallet.objects.create(user=foreman, organization=org)
+        worker = Worker.objects.create(
+            organization=org, first_name="Jan", last_name="Kowalski", hourly_rate=30
+        )
+        project = Project.objects.create(organization=org, name="Most")
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="REFILL",
+            amount="500.00",
+            date=date(2025, 1, 2),
+        )
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="EXPENSE",
+            amount="120.50",
+            category="FUEL",
+            project=project,
+            description="Orlen; stacja",
+            date=date(2025, 1, 3),
+        )
+        WalletTransaction.objects.create(
+            organization=org,
+            type="ADVANCE",
+            amount="200.00",
+            worker=worker,
+            date=date(2025, 2, 1),
+        )
+        return org, owner, foreman
+
+    async def export(self, async_client, params):
+        response = await async_client.get(
+            reverse("business:transaction_journal_export"), params
+        )
+        # Pod ASGI synchroniczny strumień zostałby zebrany w całości (z ostrzeżeniem).
+        assert response.is_async
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            chunks = [chunk async for chunk in response.streaming_content]
+        return b"".join(chunks)
+
+    @pytest.mark.django_db(transaction=True)
+    async def test_csv_export_streams_joined_rows(self, async_client):
+        _, owner, _ = await sync_to_async(self.get_test_data)()
+        await async_client.aforce_login(owner)
+
+        content = await self.export(
+            async_client, {"format": "csv", "tx_date_to": "2025-01-31"}
+        )
+
+        lines = content.decode().splitlines()
+        assert lines[0].startswith("\ufeffID;Data;Typ")
+        assert len(lines) == 3
+        assert lines[2].split(";")[1:6] == [
+            "2025-01-03",
+            "Wydatek",
+            "Paliwo",
+            "120,50",
+            "Adam Nowak",
+        ]
+        assert lines[2].endswith(';Most;"Orlen; stacja"')
+
+    @pytest.mark.django_db(transaction=True)
+    async def test_xlsx_export(self, async_client):
+        _, owner, foreman = await sync_to_async(self.get_test_data)()
+        await async_client.aforce_login(owner)
+
+        content = await self.export(async_client, {"format": "xlsx"})
+
+        workbook = load_workbook(BytesIO(content))
+        rows = list(workbook["Dziennik"].values)
+        assert len(rows) == 4
+        assert rows[3][2:8] == (
+            "Zaliczka",
+            None,
+            200,
+            "Firmowy",
+            "Jan Kowalski",
+            None,
+        )
+
+        await async_client.aforce_login(foreman)
+        response = await async_client.get(
+            reverse("business:transaction_journal_export")
+        )
+        assert response.status_code == 403
+
+    @pytest.mark.django_db(transaction=True)
+    async def test_export_escapes_formulas(self, async_client):
+        org, owner, _ = await sync_to_async(self.get_test_data)()
+        await WalletTransaction.objects.acreate(
+            organization=org,
+            type="EXPENSE",
+            amount="10.00",
+            description="=SUM(A1:A2)",
+            date=date(2025, 1, 4),
+        )
+        await async_client.aforce_login(owner)
+
+        content = await self.export(async_client, {"tx_date_to": "2025-01-31"})
+        assert content.decode().splitlines()[-1].endswith(";'=SUM(A1:A2)")
+
+        content = await self.export(
+            async_client, {"format": "xlsx", "tx_date_to": "2025-01-31"}
+        )
+        sheet = load_workbook(BytesIO(content))["Dziennik"]
+        cell = sheet.cell(row=sheet.max_row, column=9)
+        assert cell.value == "=SUM(A1:A2)"
+        assert cell.data_type == "s"
@@ -0,0 +1,178 @@
+import warnings
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from business.analytics import rebuild_expense_rollups
+from business.imports import StatementImporter, parse_amount, read_statement
+from business.models import ExpenseRollup, Wallet, WalletTransaction
+from business.views.imports import IMPORT_SESSION_KEY
+from core.models import Organization, User
+
+STATEMENT = (
+    "Data;Kwota;Opis;Kategoria\n"
+    "2026-03-01;1 000,00;Zasilenie konta;\n"
+    "02.03.2026;-120,50;Orlen stacja 12;Paliwo\n"
+    "02.03.2026;-120,50;Orlen  stacja 12;Paliwo\n"
+    "03.03.2026;-45,00;Castorama;MATERIAL\n"
+    "04.03.2026;abc;Błędna kwota;\n"
+    "05.03.2026;-10,00;Kawa;\n"
+).encode("utf-8-sig")
+
+MAPPING = {
+    "date_column": "data",
+    "amount_column": "kwota",
+    "description_column": "opis",
+    "category_column": "kategoria",
+    "default_category": "FOOD",
+}
+
+
+def rollup_rows(org):
+    return sorted(
+        ExpenseRollup.objects.filter(organization=org).values_list(
+            "year",
+            "month",
+            "wallet_id",
+            "project_id",
+            "category",
+            "type",
+            "total",
+            "count",
+        )
+    )
+
+
+@pytest.mark.django_db
+class TestStatementImport:
+    def get_test_data(self):
+        org = Organization.objects.create(name="Import Org")
+        owner = User.objects.create_user(
+            username="import_owner",
+            password="pass",
+            organization=org,
+            role=User.Role.OWNER,
+        )
+        foreman = User.objects.create_user(
+            username="import_foreman",
+            password="pass",
+            organization=org,
+            role=User.Role.FOREMAN,
+        )
+        wallet = Wallet.objects.create(user=foreman, organization=org)
+        return org, owner, wallet
+
+    def import_statement(self, org, wallet, content=STATEMENT):
+        importer = StatementImporter(org, MAPPING, wallet)
+        results = []
+        for batch in importer.commit(
+            read_statement(SimpleUploadedFile("s.csv", content))
+        ):
+            results.extend(batch)
+        return results
+
+    def test_parse_amount(self):
+        assert parse_amount("-1 234,56") == Decimal("-1234.56")
+        assert parse_amount("1.234,56 PLN") == Decimal("1234.56")
+        assert parse_amount("-12.50") == Decimal("-12.50")
+        assert parse_amount("1 234,56") == Decimal("1234.56")
+        assert parse_amount("1\xa0234,56") == Decimal("1234.56")
+        assert parse_amount("1.234,56") == Decimal("1234.56")
+        assert parse_amount("1,234.56") == Decimal("1234.56")
+        assert parse_amount("1.234.567") == Decimal(1234567)
+        with pytest.raises(ValueError):
+            parse_amount("abc")
+
+    def test_import_dedupes_and_updates_ledger(self):
+        org, _, wallet = self.get_test_data()
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="EXPENSE",
+            amount="45.00",
+            category="MATERIAL",
+            description="castorama",
+            date=date(2026, 3, 3),
+        )
+
+        results = self.import_statement(org, wallet)
+
+        assert [r["status"] for r in results] == [
+            "new",
+            "new",
+            "duplicate",
+            "duplicate",
+            "error",
+            "new",
+        ]
+        transactions = WalletTransaction.objects.filter(wallet=wallet)
+        assert transactions.count() == 4
+        fuel = transactions.get(description="Orlen stacja 12")
+        assert fuel.category == "FUEL"
+        assert transactions.get(description="Kawa").category == "FOOD"
+
+        wallet.refresh_from_db()
+        assert wallet.balance == Decimal("824.50")
+        assert wallet.calculate_ledger_totals()["balance"] == wallet.balance
+        assert wallet.expenses_total == Decimal("175.50")
+
+        imported_rollups = rollup_rows(org)
+        rebuild_expense_rollups(org)
+        assert rollup_rows(org) == imported_rollups
+
+        # Ponowny import tego samego wyciągu niczego nie dodaje.
+        results = self.import_statement(org, wallet)
+        assert not [r for r in results if r["status"] == "new"]
+        assert transactions.count() == 4
+
+    def test_refill_requires_wallet(self):
+        org, _, _ = self.get_test_data()
+        results = self.import_statement(org, None)
+        assert results[0]["status"] == "error"
+        assert WalletTransaction.objects.filter(type="REFILL").count() == 0
+        assert WalletTransaction.objects.filter(wallet=None).count() == 3
+
+    async def read_events(self, response):
+        # Pod ASGI synchroniczny strumień zostałby zebrany w całości (z ostrzeżeniem).
+        assert response.is_async
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            chunks = [chunk async for chunk in response.streaming_content]
+        return chunks
+
+    @pytest.mark.django_db(transaction=True)
+    async def test_preview_and_commit_views(self, async_client, media_root):
+        _, owner, wallet = await sync_to_async(self.get_test_data)()
+        await async_client.aforce_login(owner)
+        url = reverse("business:statement_import")
+
+        response = await async_client.post(
+            f"{url}?step=preview",
+            {
+                "file": SimpleUploadedFile("wyciag.csv", STATEMENT),
+                "wallet": wallet.pk,
+                **MAPPING,
+            },
+            headers={"datastar-request": "true"},
+        )
+        chunks = await self.read_events(response)
+        content = b"".join(chunks).decode()
+        assert len(chunks) > 2
+        assert "Orlen stacja 12" in content
+        assert '"import_duplicate":1' in content.replace(" ", "")
+        assert await WalletTransaction.objects.acount() == 0
+        session = await async_client.asession()
+        pending = await session.aget(IMPORT_SESSION_KEY)
+
+        response = await async_client.post(
+            f"{url}?step=commit", headers={"datastar-request": "true"}
+        )
+        await self.read_events(response)
+        assert await WalletTransaction.objects.acount() == 4
+        session = await async_client.asession()
+        assert not await session.ahas_key(IMPORT_SESSION_KEY)
+        assert not (media_root / pending["file"]).exists()
@@ -1,3 +1,4 @@
+import json
 from datetime import timedelta
 from decimal import Decimal
 
@@ -5,7 +6,21 @@ import pytest
 from django.urls import reverse
 from django.utils import timezone
 
-from business.models import Payroll, Project, Worker, WorkLog
+from business.models import (
+    BonusDay,
+    Payroll,
+    PayrollMonthSummary,
+    Project,
+    Wallet,
+    WalletTransaction,
+    Worker,
+    WorkLog,
+)
+from business.payrolls import (
+    generate_payrolls,
+    get_payroll_summary,
+    refresh_payroll_summary,
+)
 from core.models import Organization, User
 
 
@@ -102,3 +117,264 @@ class TestPayrollLogic:
 
         payroll.refresh_from_db()
         assert payroll.status == Payroll.Status.DRAFT
+
+
+@pytest.mark.django_db
+class TestPayrollDirtyRecalculation:
+    def get_test_data(self, status=Payroll.Status.DRAFT):
+        org = Organization.objects.create(name="Test Org")
+        owner = User.objects.create_user(
+            username="owner", password="pwd", role=User.Role.OWNER, organization=org
+        )
+        worker = Worker.objects.create(
+            organization=org, first_name="Jan", last_name="Kowalski", hourly_rate=20
+        )
+        other = Worker.objects.create(
+            organization=org, first_name="Piotr", last_name="Nowak", hourly_rate=30
+        )
+        Project.objects.create(organization=org, name="A", is_default=True)
+        today = timezone.now().date()
+        payrolls = [
+            Payroll.objects.create(
+                organization=org,
+                worker=w,
+                year=today.year,
+                month=today.month,
+                status=status,
+                hourly_rate_snapshot=w.hourly_rate,
+            )
+            for w in (worker, other)
+        ]
+        return org, owner, worker, payrolls, today
+
+    def update_hours(self, client, worker, day, hours):
+        key = f"log_{day.year}_{day.month}_{worker.id}_{day.day}"
+        return client.post(
+            reverse("business:timesheet_update") + f"?key={key}",
+            data=json.dumps({key: hours}),
+            content_type="application/json",
+            headers={"datastar-request": "true"},
+        )
+
+    def test_timesheet_write_recalculates_only_touched_draft(self, client):
+        _, owner, worker, (payroll, other_payroll), today = self.get_test_data()
+        client.force_login(owner)
+        other_updated_at = other_payroll.updated_at
+
+        self.update_hours(client, worker, today, "8")
+
+        payroll.refresh_from_db()
+        other_payroll.refresh_from_db()
+        assert payroll.total_hours == 8
+        assert payroll.gross_pay == Decimal("160.00")
+        assert other_payroll.updated_at == other_updated_at
+
+        self.update_hours(client, worker, today, "")
+        payroll.refresh_from_db()
+        assert payroll.total_hours == 0
+        assert payroll.net_pay == 0
+
+    def test_advance_create_recalculates_draft(self, client):
+        _, owner, worker, (payroll, _), today = self.get_test_data()
+        client.force_login(owner)
+
+        client.post(
+            reverse("business:advance_create"),
+            data={"worker": worker.id, "amount": "50.00", "date": today.isoformat()},
+            headers={"datastar-request": "true"},
+        )
+
+        payroll.refresh_from_db()
+        assert payroll.advances_deducted == Decimal("50.00")
+        assert payroll.net_pay == Decimal("-50.00")
+
+    def test_advance_delete_recalculates_draft(self, client):
+        org, owner, worker, (payroll, _), today = self.get_test_data()
+        client.force_login(owner)
+        wallet = Wallet.objects.create(user=owner, organization=org)
+        advance = WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            worker=worker,
+            type=WalletTransaction.Type.ADVANCE,
+            amount=40,
+            date=today,
+        )
+        payroll.advances_deducted = 40
+        payroll.save()
+
+        client.post(
+            reverse("business:transaction_delete", args=[advance.pk]),
+            headers={"datastar-request": "true"},
+        )
+
+        payroll.refresh_from_db()
+        assert payroll.advances_deducted == 0
+
+    def test_bonus_day_recalculates_month(self, client):
+        org, owner, worker, (payroll, _), today = self.get_test_data()
+        client.force_login(owner)
+        WorkLog.objects.create(
+            organization=org, worker=worker, date=today, hours=8, created_by=owner
+        )
+
+        client.post(
+            reverse("business:bonus_day_manage")
+            + f"?year={today.year}&month={today.month}",
+            data={"action": "add", "date": today.isoformat(), "amount": "25"},
+            headers={"datastar-request": "true"},
+        )
+
+        assert BonusDay.objects.filter(organization=org, date=today).exists()
+        payroll.refresh_from_db()
+        assert payroll.bonuses == 25
+        assert payroll.gross_pay == Decimal("185.00")
+
+    def test_closed_payroll_is_not_recalculated(self, client):
+        org, owner, worker, (payroll, _), today = self.get_test_data(
+            status=Payroll.Status.CLOSED
+        )
+        client.force_login(owner)
+        WorkLog.objects.create(
+            organization=org, worker=worker, date=today, hours=8, created_by=owner
+        )
+
+        client.post(
+            reverse("business:bonus_day_manage")
+            + f"?year={today.year}&month={today.month}",
+            data={"action": "delete", "bonus_id": "0"},
+            headers={"datastar-request": "true"},
+        )
+
+        payroll.refresh_from_db()
+        assert payroll.total_hours == 0
+
+
+@pytest.mark.django_db
+class TestPayrollMonthSummary:
+    def get_test_data(self):
+        org = Organization.objects.create(name="Test Org")
+        owner = User.objects.create_user(
+            username="owner", password="pwd", role=User.Role.OWNER, organization=org
+        )
+        workers = [
+            Worker.objects.create(
+                organization=org, first_name="Jan", last_name=name, hourly_rate=20
+            )
+            for name in ("Kowalski", "Nowak")
+        ]
+        return org, owner, workers
+
+    def create_payroll(self, org, worker, today, status, net_pay):
+        return Payroll.objects.create(
+            organization=org,
+            worker=worker,
+            year=today.year,
+            month=today.month,
+            status=status,
+            gross_pay=net_pay + 10,
+            bonuses=5,
+            advances_deducted=10,
+            net_pay=net_pay,
+        )
+
+    def test_summary_aggregates_month(self):
+        org, _, (w1, w2) = self.get_test_data()
+        today = timezone.now().date()
+        self.create_payroll(org, w1, today, Payroll.Status.CLOSED, 100)
+        self.create_payroll(org, w2, today, Payroll.Status.DRAFT, 50)
+
+        summary = refresh_payroll_summary(org, today.year, today.month)
+
+        assert summary["total_payout"] == Decimal("150.00")
+        assert summary["total_earned"] == Decimal("170.00")
+        assert summary["total_bonuses"] == Decimal("10.00")
+        assert summary["total_advances"] == Decimal("20.00")
+        assert summary["status"] == "DRAFT"
+        assert get_payroll_summary(org, 1999, 1)["status"] == "EMPTY"
+
+    def test_summary_refreshed_on_close_and_reopen(self, client):
+        org, owner, (w1, _) = self.get_test_data()
+        client.force_login(owner)
+        today = timezone.now().date()
+        self.create_payroll(org, w1, today, Payroll.Status.DRAFT, 100)
+        refresh_payroll_summary(org, today.year, today.month)
+        query = f"?year={today.year}&month={today.month}"
+
+        client.post(
+            reverse("business:payroll_close") + query,
+            headers={"datastar-request": "true"},
+        )
+        summary = PayrollMonthSummary.objects.get(
+            organization=org, year=today.year, month=today.month
+        )
+        assert summary.status == PayrollMonthSummary.Status.CLOSED
+
+        client.post(
+            reverse("business:payroll_reopen") + query,
+            headers={"datastar-request": "true"},
+        )
+        summary.refresh_from_db()
+        assert summary.status == PayrollMonthSummary.Status.DRAFT
+
+    def test_summary_refreshed_after_worker_delete(self, client):
+        org, owner, (w1, w2) = self.get_test_data()
+        client.force_login(owner)
+        today = timezone.now().date()
+        self.create_payroll(org, w1, today, Payroll.Status.CLOSED, 100)
+        self.create_payroll(org, w2, today, Payroll.Status.DRAFT, 50)
+        refresh_payroll_summary(org, today.year, today.month)
+
+        client.post(
+            reverse("business:worker_delete", args=[w2.pk]),
+            headers={"datastar-request": "true"},
+        )
+
+        summary = get_payroll_summary(org, today.year, today.month)
+        assert summary["total_payout"] == Decimal("100.00")
+        assert summary["status"] == "CLOSED"
+
+    def test_foreman_delete_recalculates_cascaded_advances(self, client):
+        org, owner, (w1, w2) = self.get_test_data()
+        w2.user = User.objects.create_user(
+            username="foreman", password="pwd", role=User.Role.FOREMAN, organization=org
+        )
+        w2.save()
+        wallet = Wallet.objects.create(user=w2.user, organization=org)
+        today = timezone.now().date()
+        WorkLog.objects.create(organization=org, worker=w1, date=today, hours=10)
+        WalletTransaction.objects.create(
+            organization=org,
+            wallet=wallet,
+            worker=w1,
+            type=WalletTransaction.Type.ADVANCE,
+            amount=30,
+            date=today,
+        )
+        generate_payrolls(org, today.year, today.month)
+        payroll = Payroll.objects.get(worker=w1)
+        assert payroll.advances_deducted == 30
+        client.force_login(owner)
+
+        client.post(
+            reverse("business:worker_delete", args=[w2.pk]),
+            headers={"datastar-request": "true"},
+        )
+
+        payroll.refresh_from_db()
+        assert payroll.advances_deducted == 0
+        assert payroll.net_pay == payroll.gross_pay
+        summary = get_payroll_summary(org, today.year, today.month)
+        assert summary["total_advances"] == 0
+
+    def test_dashboard_reads_stored_summary(self, client):
+        org, owner, (w1, _) = self.get_test_data()
+        client.force_login(owner)
+        today = timezone.now().date()
+        self.create_payroll(org, w1, today, Payroll.Status.DRAFT, 123)
+        refresh_payroll_summary(org, today.year, today.month)
+
+        response = client.get(reverse("core:dashboard"))
+
+        content = response.content.decode()
+        assert "123,00" in content or "123.00" in content
@@ -1,10 +1,29 @@
+import io
+import warnings
+import zipfile
 import pytest
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 from decimal import Decimal
+from functools import partial
+from multiprocessing import get_context
+from asgiref.sync import sync_to_async
 from django.urls import reverse
-from business.models import Payroll, Project, Worker, WorkLog, BonusDay
+from business.models import (
+    BonusDay,
+    Payroll,
+    Project,
+    Wallet,
+    WalletTransaction,
+    Worker,
+    WorkLog,
+)
+from business.payrolls import get_payslips
+from business.pdf import PayslipRenderError, render_payslip
+from business.views.payroll import PAYSLIP_ERRORS_FILENAME, get_payslip_executor
 from core.models import Organization, User
 
+
 @pytest.mark.django_db
 class TestPayrollBonusExport:
     def setup_method(self):
@@ -144,3 +163,121 @@ class TestPayrollBonusExport:
         content = b"".join(response.streaming_content).decode().replace("\ndata: elements ", "")
         assert "Nie można edytować bonusów w zamkniętym miesiącu" in content
         assert not BonusDay.objects.filter(date="2026-02-15").exists()
+
+    def create_closed_month(self):
+        second = Worker.objects.create(
+            organization=self.org, first_name="Łukasz", last_name="Żak", hourly_rate=25
+        )
+        wallet = Wallet.objects.create(user=self.owner, organization=self.org)
+        WorkLog.objects.create(
+            organization=self.org,
+            worker=self.worker,
+            date=self.test_date,
+            hours=8,
+            project=self.project,
+        )
+        BonusDay.objects.create(organization=self.org, date=self.test_date, amount=50)
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=self.org,
+            worker=self.worker,
+            type=WalletTransaction.Type.ADVANCE,
+            amount=30,
+            date=self.test_date,
+            description="Zaliczka na paliwo",
+        )
+        for worker in (self.worker, second):
+            Payroll.objects.create(
+                organization=self.org,
+                worker=worker,
+                year=2026,
+                month=2,
+                status=Payroll.Status.CLOSED,
+                total_hours=8,
+                hourly_rate_snapshot=worker.hourly_rate,
+                bonuses=50,
+                gross_pay=210,
+                advances_deducted=30,
+                net_pay=180,
+            )
+
+    def test_payslips_data(self):
+        self.create_closed_month()
+
+        payslips = {p["worker_name"]: p for p in get_payslips(self.org, 2026, 2)}
+
+        assert len(payslips) == 2
+        jan = payslips["Jan Kowalski"]
+        assert jan["bonus_days"] == [("10.02.2026", Decimal(50))]
+        assert jan["advances"] == [("10.02.2026", Decimal("30.00"), "Zaliczka na paliwo")]
+        assert payslips["Łukasz Żak"]["bonus_days"] == []
+
+    async def get_payslips_zip(self, async_client):
+        await async_client.aforce_login(self.owner)
+        url = reverse("business:payroll_export_payslips") + "?year=2026&month=2"
+        response = await async_client.get(url)
+        # Synchroniczny iterator zostałby pod ASGI zebrany w całości (z ostrzeżeniem).
+        assert response.is_async
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            chunks = [chunk async for chunk in response.streaming_content]
+        return response, chunks
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize("processes", [0, 2])
+    async def test_export_payslips_zip(
+        self, async_client, settings, monkeypatch, pdf_fonts, processes
+    ):
+        settings.PAYSLIP_EXPORT_PROCESSES = processes
+        # forkserver (domyślny od Pythona 3.14) nie dziedziczy podmienionych czcionek
+        monkeypatch.setattr(
+            "business.views.payroll.ProcessPoolExecutor",
+            partial(ProcessPoolExecutor, mp_context=get_context("forkserver")),
+        )
+        get_payslip_executor.cache_clear()
+        await sync_to_async(self.create_closed_month)()
+
+        try:
+            response, chunks = await self.get_payslips_zip(async_client)
+        finally:
+            if processes:
+                get_payslip_executor().shutdown()
+                get_payslip_executor.cache_clear()
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/zip"
+        assert "paski_02_2026.zip" in response["Content-Disposition"]
+        assert len(chunks) > 1
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            names = sorted(archive.namelist())
+            assert len(names) == 2
+            assert all(name.endswith("_02_2026.pdf") for name in names)
+            assert all(archive.read(name).startswith(b"%PDF") for name in names)
+
+    @pytest.mark.django_db(transaction=True)
+    async def test_export_payslips_reports_render_errors(
+        self, async_client, settings, monkeypatch, pdf_fonts
+    ):
+        settings.PAYSLIP_EXPORT_PROCESSES = 0
+
+        def render(payslip):
+            if payslip["worker_name"] == "Łukasz Żak":
+                raise PayslipRenderError(f"{payslip['filename']}: brak glifu")
+            return render_payslip(payslip)
+
+        monkeypatch.setattr("business.views.payroll.render_payslip", render)
+        await sync_to_async(self.create_closed_month)()
+
+        response, chunks = await self.get_payslips_zip(async_client)
+
+        assert response.status_code == 200
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+            assert archive.testzip() is None
+            names = archive.namelist()
+            assert len(names) == 2
+            assert "brak glifu" in archive.read(PAYSLIP_ERRORS_FILENAME).decode()
+
+    def test_export_payslips_not_found_if_not_closed(self, client):
+        client.force_login(self.owner)
+        url = reverse("business:payroll_export_payslips") + "?year=2026&month=2"
+        assert client.get(url).status_code == 404
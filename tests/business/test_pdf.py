@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+
+from business.pdf import (
+    FONT_FILES,
+    FontRegistry,
+    PayrollPDF,
+    PayslipRenderError,
+    get_font_registry,
+    render_payslip,
+)
+
+
+class TestFontRegistry:
+    def test_registry_is_shared_per_process(self):
+        assert get_font_registry() is get_font_registry()
+
+    def test_fallback_without_fonts(self, tmp_path):
+        pdf = PayrollPDF("Firma", "01/2026", font_registry=FontRegistry(tmp_path))
+        assert pdf.font_name == "helvetica"
+
+    def test_parsed_fonts_reused_across_documents(self, font_dir):
+        registry = FontRegistry(font_dir)
+
+        outputs = []
+        for name in ["Jan Kowalski", "Łukasz Żółć"]:
+            pdf = PayrollPDF("Firma Ślęża", "02/2026", font_registry=registry)
+            pdf.add_page()
+            pdf.set_font(pdf.font_name, "", 10)
+            pdf.cell(50, 10, name)
+            outputs.append(bytes(pdf.output()))
+
+        assert registry.family == "Liberation"
+        assert all(out.startswith(b"%PDF") for out in outputs)
+        assert len(registry._fonts) == len(FONT_FILES)
+
+
+class TestRenderPayslip:
+    def test_render_error_survives_pickling(self, tmp_path):
+        payslip = {
+            "filename": "zak_02_2026.pdf",
+            "org_name": "Firma",
+            "period": "02/2026",
+            "worker_name": "Łukasz Żak",
+        }
+
+        with pytest.raises(PayslipRenderError) as excinfo:
+            render_payslip(payslip, font_dir=tmp_path)
+
+        error = pickle.loads(pickle.dumps(excinfo.value))
+        assert str(error).startswith("zak_02_2026.pdf: ")
@@ -3,7 +3,17 @@ from decimal import Decimal
 import pytest
 from django.urls import reverse
 
-from business.models import Project, Wallet, WalletTransaction, Worker, WorkLog
+from business.models import (
+    Payroll,
+    Project,
+    ProjectLabourCost,
+    Wallet,
+    WalletTransaction,
+    Worker,
+    WorkLog,
+)
+from business.payrolls import refresh_project_labour_costs
+from business.views.project import annotate_project_costs
 from core.models import Organization, User
 
 
@@ -71,3 +81,93 @@ class TestProjectDetailView:
         assert b"8" in content
         assert b"500.00" in content or b"500,00" in content
         assert b"100.00" not in content
+
+    def test_labour_cost_allocated_on_payroll_generation(self, client):
+        client.force_login(self.owner)
+        url = reverse("business:payroll_generate") + "?year=2024&month=1"
+        client.post(url, headers={"datastar-request": "true"})
+
+        cost = ProjectLabourCost.objects.get(project=self.project, year=2024, month=1)
+        assert cost.hours == Decimal("8.5")
+        assert cost.labour_cost == Decimal("255.00")
+
+        project = annotate_project_costs(
+            Project.objects.filter(pk=self.project.pk)
+        ).get()
+        assert project.total_labour_cost == Decimal("255.00")
+        assert project.total_project_cost == Decimal("755.00")
+
+        url = reverse("business:project_detail", kwargs={"pk": self.project.pk})
+        content = b"".join(client.get(url).streaming_content).decode()
+        assert "255,00" in content or "255.00" in content
+
+    def test_labour_cost_uses_payroll_rate_snapshot(self):
+        Payroll.objects.create(
+            organization=self.org,
+            worker=self.worker,
+            year=2024,
+            month=1,
+            status=Payroll.Status.CLOSED,
+            hourly_rate_snapshot=20,
+        )
+        Worker.objects.filter(pk=self.worker.pk).update(hourly_rate=50)
+
+        refresh_project_labour_costs(self.org, 2024, 1)
+
+        cost = ProjectLabourCost.objects.get(project=self.project, year=2024, month=1)
+        assert cost.labour_cost == Decimal("170.00")
+
+    def test_detail_shows_aggregates_without_raw_entries(self, client):
+        client.force_login(self.owner)
+        url = reverse("business:project_detail", kwargs={"pk": self.project.pk})
+        content = b"".join(client.get(url).streaming_content).decode()
+
+        assert "<span>Jan Kowalski</span>" in content  # godziny wg pracowników
+        assert "Materiały" in content
+        assert "Cement" not in content
+        assert reverse("business:project_entries", args=[self.project.pk, "logs"]) in (
+            content
+        )
+
+    def test_entries_are_keyset_paginated(self, client):
+        for day in range(2, 32):
+            WorkLog.objects.create(
+                organization=self.org,
+                worker=Worker.objects.create(
+                    organization=self.org,
+                    first_name="P",
+                    last_name=f"W{day}",
+                    hourly_rate=30,
+                ),
+                project=self.project,
+                date=f"2024-01-{day:02d}",
+                hours=8,
+            )
+        client.force_login(self.owner)
+        url = reverse("business:project_entries", args=[self.project.pk, "logs"])
+
+        first = b"".join(
+            client.get(url, headers={"datastar-request": "true"}).streaming_content
+        ).decode()
+        assert "mode inner" in first
+        assert "31.01.2024" in first
+        assert "01.01.2024" not in first
+        cursor = first.split("cursor=")[1].split("'")[0]
+
+        second = b"".join(
+            client.get(
+                url, {"cursor": cursor}, headers={"datastar-request": "true"}
+            ).streaming_content
+        ).decode()
+        assert "mode append" in second
+        assert "01.01.2024" in second
+        assert "project-logs-more" in second  # usunięcie starego wskaźnika
+        assert "cursor=" not in second
+
+        expenses = b"".join(
+            client.get(
+                reverse("business:project_entries", args=[self.project.pk, "expenses"]),
+                headers={"datastar-request": "true"},
+            ).streaming_content
+        ).decode()
+        assert "Cement" in expenses
@@ -1,12 +1,48 @@
 import json
+from datetime import date
+from decimal import Decimal
+from urllib.parse import urlencode
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from business.models import Project, WalletTransaction, Worker, WorkLog
+from business.budgets import attach_budget_forecasts
+from business.forms import ExpenseForm
+from business.models import (
+    Project,
+    ProjectCostRollup,
+    ProjectDailyCost,
+    Wallet,
+    WalletTransaction,
+    Worker,
+    WorkLog,
+)
+from business.payrolls import refresh_project_labour_costs
+from business.projects import get_project_catalog, rebuild_project_costs
 from core.models import Organization, User
 
 
+def cost_state(org):
+    projects = sorted(
+        Project.objects.filter(organization=org).values_list(
+            "pk", "hours_total", "expenses_total", "labour_cost_total"
+        )
+    )
+    rollups = sorted(
+        (r.project_id, r.year, r.month, r.hours, r.expenses, r.labour_cost)
+        for r in ProjectCostRollup.objects.filter(project__organization=org)
+        if r.hours or r.expenses or r.labour_cost
+    )
+    daily = sorted(
+        (r.project_id, r.date, r.hours, r.expenses)
+        for r in ProjectDailyCost.objects.filter(project__organization=org)
+        if r.hours or r.expenses
+    )
+    return projects, rollups, daily
+
+
 @pytest.mark.django_db
 class TestProjectViews:
     @pytest.fixture(autouse=True)
@@ -88,6 +124,255 @@ class TestProjectViews:
         assert "300" in content
         assert "15" in content
 
+    def test_cost_rollups_follow_writes_and_match_rebuild(self):
+        log = WorkLog.objects.create(
+            organization=self.org,
+            worker=self.worker1,
+            project=self.project1,
+            date=date(2026, 1, 5),
+            hours=8,
+        )
+        WorkLog.objects.create(
+            organization=self.org,
+            worker=self.worker2,
+            project=self.project1,
+            date=date(2026, 2, 2),
+            hours=6,
+        )
+        expense = WalletTransaction.objects.create(
+            organization=self.org,
+            project=self.project1,
+            type="EXPENSE",
+            amount="120.00",
+            date=date(2026, 1, 7),
+        )
+        refresh_project_labour_costs(self.org, 2026, 1)
+
+        log.hours = 10
+        log.project = self.project2
+        log.save()
+        expense.project = self.project2
+        expense.save()
+        WorkLog.reassign_project(
+            WorkLog.objects.filter(worker=self.worker2), self.project2
+        )
+        refresh_project_labour_costs(self.org, 2026, 1)
+
+        self.project2.refresh_from_db()
+        assert self.project2.hours_total == 16
+        assert self.project2.expenses_total == 120
+        assert self.project2.labour_cost_total == 500
+        self.project1.refresh_from_db()
+        assert (self.project1.hours_total, self.project1.labour_cost_total) == (0, 0)
+
+        incremental = cost_state(self.org)
+        rebuild_project_costs(self.org)
+        assert cost_state(self.org) == incremental
+
+    def test_assigning_project_moves_labour_cost(self, client):
+        for day in (5, 6):
+            WorkLog.objects.create(
+                organization=self.org,
+                worker=self.worker1,
+                project=self.project1,
+                date=date(2026, 1, day),
+                hours=8,
+            )
+        refresh_project_labour_costs(self.org, 2026, 1)
+        client.force_login(self.owner)
+
+        client.post(
+            reverse("business:timesheet_assign_project_post"),
+            urlencode(
+                {
+                    "project_id": self.project2.pk,
+                    "start_date": "2026-01-06",
+                    "end_date": "2026-01-31",
+                    "worker_ids": self.worker1.pk,
+                }
+            ),
+            content_type="application/x-www-form-urlencoded",
+            headers={"datastar-request": "true"},
+        )
+
+        self.project1.refresh_from_db()
+        self.project2.refresh_from_db()
+        assert (self.project1.hours_total, self.project1.labour_cost_total) == (8, 400)
+        assert (self.project2.hours_total, self.project2.labour_cost_total) == (8, 400)
+        incremental = cost_state(self.org)
+        rebuild_project_costs(self.org)
+        assert cost_state(self.org) == incremental
+
+    def test_worker_delete_withdraws_cascaded_costs(self, client):
+        self.worker1.user = self.foreman
+        self.worker1.save()
+        wallet = Wallet.objects.create(organization=self.org, user=self.foreman)
+        for worker, hours in ((self.worker1, 8), (self.worker2, 6)):
+            WorkLog.objects.create(
+                organization=self.org,
+                worker=worker,
+                project=self.project1,
+                date=date(2026, 1, 5),
+                hours=hours,
+            )
+        WalletTransaction.objects.create(
+            organization=self.org,
+            wallet=wallet,
+            project=self.project1,
+            type="EXPENSE",
+            amount="120.00",
+            date=date(2026, 1, 7),
+        )
+        client.force_login(self.owner)
+
+        client.post(
+            reverse("business:worker_delete", args=[self.worker1.pk]),
+            headers={"datastar-request": "true"},
+        )
+
+        self.project1.refresh_from_db()
+        assert not WalletTransaction.objects.filter(organization=self.org).exists()
+        assert (self.project1.hours_total, self.project1.expenses_total) == (6, 0)
+        incremental = cost_state(self.org)
+        rebuild_project_costs(self.org)
+        assert cost_state(self.org) == incremental
+
+    def test_budget_forecast_from_daily_burn_rate(self):
+        self.project1.start_date = date(2026, 3, 1)
+        self.project1.end_date = date(2026, 3, 31)
+        self.project1.budget_hours = 300
+        self.project1.budget_amount = 5000
+        self.project1.save()
+        for day in range(1, 11):
+            WorkLog.objects.create(
+                organization=self.org,
+                worker=self.worker1,
+                project=self.project1,
+                date=date(2026, 3, day),
+                hours=8,
+            )
+        WalletTransaction.objects.create(
+            organization=self.org,
+            project=self.project1,
+            type="EXPENSE",
+            amount="1000.00",
+            date=date(2026, 3, 4),
+        )
+        self.project1.refresh_from_db()
+
+        attach_budget_forecasts([self.project1, self.project2], today=date(2026, 3, 10))
+
+        budget = self.project1.budget
+        assert self.project2.budget is None
+        assert budget["hours_rate"] == 8
+        assert budget["amount_rate"] == 100
+        assert budget["remaining_days"] == 21
+        assert budget["forecast_hours"] == 80 + 8 * 21
+        assert budget["forecast_amount"] == 1000 + 100 * 21
+        assert budget["hours_percent"] == 26
+        assert budget["status"] == "ok"
+
+        self.project1.budget_hours = 200
+        attach_budget_forecasts([self.project1], today=date(2026, 3, 10))
+        assert self.project1.budget["status"] == "at_risk"
+
+        self.project1.budget_amount = Decimal(900)
+        attach_budget_forecasts([self.project1], today=date(2026, 3, 10))
+        assert self.project1.budget["status"] == "over"
+
+    def test_open_ended_budget_forecasts_exhaustion(self):
+        self.project1.start_date = date(2026, 3, 1)
+        self.project1.end_date = None
+        self.project1.budget_hours = 300
+        self.project1.save()
+        for day in range(1, 11):
+            WorkLog.objects.create(
+                organization=self.org,
+                worker=self.worker1,
+                project=self.project1,
+                date=date(2026, 3, day),
+                hours=8,
+            )
+        self.project1.refresh_from_db()
+
+        attach_budget_forecasts([self.project1], today=date(2026, 3, 10))
+
+        budget = self.project1.budget
+        assert budget["remaining_days"] == 0
+        assert budget["hours_exhausted_on"] == date(2026, 4, 7)
+        assert budget["status"] == "at_risk"
+
+        self.project1.end_date = date(2026, 4, 30)
+        attach_budget_forecasts([self.project1], today=date(2026, 3, 10))
+        assert self.project1.budget["status"] == "at_risk"
+
+        self.project1.end_date = date(2026, 3, 31)
+        attach_budget_forecasts([self.project1], today=date(2026, 3, 10))
+        assert self.project1.budget["status"] == "ok"
+
+    def test_project_list_query_count_does_not_grow(self, client):
+        client.force_login(self.owner)
+        url = reverse("business:project_list")
+        self.project1.budget_hours = 100
+        self.project1.save()
+        with CaptureQueriesContext(connection) as small:
+            client.get(url)
+        for i in range(5):
+            project = Project.objects.create(
+                organization=self.org, name=f"P{i}", budget_hours=4
+            )
+            WorkLog.objects.create(
+                organization=self.org,
+                worker=self.worker1,
+                project=project,
+                date=date(2026, 3, i + 1),
+                hours=8,
+            )
+        with CaptureQueriesContext(connection) as large:
+            client.get(url)
+        assert len(large) == len(small)
+
+    def test_project_catalog_is_cached_and_invalidated(self, client):
+        catalog = get_project_catalog(self.org)
+        assert [p["name"] for p in catalog] == [
+            "Projekt Default",
+            "Projekt A",
+            "Projekt B",
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            assert get_project_catalog(self.org) == catalog
+        assert len(queries) == 0
+
+        client.force_login(self.owner)
+        client.post(
+            reverse("business:project_create"),
+            {"name": "Projekt C", "status": "ACTIVE"},
+        )
+        names = [p["name"] for p in get_project_catalog(self.org)]
+        assert names == ["Projekt Default", "Projekt A", "Projekt C", "Projekt B"]
+
+        client.post(reverse("business:project_delete", kwargs={"pk": self.project1.pk}))
+        assert "Projekt A" not in [p["name"] for p in get_project_catalog(self.org)]
+
+    def test_expense_form_offers_only_organization_projects(self):
+        other = Organization.objects.create(name="Inna Firma")
+        foreign = Project.objects.create(organization=other, name="Obcy projekt")
+
+        form = ExpenseForm(organization=self.org)
+        choices = [label for _, label in form.fields["project"].choices]
+        assert "Projekt A" in choices and "Obcy projekt" not in choices
+
+        form = ExpenseForm(
+            {
+                "amount": "10",
+                "category": "OTHER",
+                "date": "2026-01-01",
+                "project": foreign.pk,
+            },
+            organization=self.org,
+        )
+        assert not form.is_valid() and "project" in form.errors
+
     def test_project_list_access(self, client):
         client.force_login(self.owner)
         url = reverse("business:project_list")
@@ -0,0 +1,238 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+
+from business import receipts
+from business.models import Wallet, WalletTransaction
+from business.receipts import (
+    THUMBNAIL_SIZE,
+    ReceiptHashIndex,
+    compute_receipt_hash,
+    process_receipt,
+)
+from core.models import Organization, User
+
+
+def make_photo(size=(400, 200), orientation=6):
+    image = Image.new("RGB", size, "white")
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x010F] = "Telefon"
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", exif=exif)
+    return SimpleUploadedFile("paragon.jpg", buffer.getvalue(), "image/jpeg")
+
+
+def make_receipt(seed, size=(300, 600), quality=90):
+    """Zdjęcie "paragonu" z poziomymi pasami zależnymi od ``seed``."""
+    image = Image.new("L", (30, 60))
+    image.putdata(
+        [((y * seed * 37) % 251 + x) % 256 for y in range(60) for x in range(30)]
+    )
+    buffer = BytesIO()
+    image.resize(size).convert("RGB").save(buffer, format="JPEG", quality=quality)
+    return SimpleUploadedFile("paragon.jpg", buffer.getvalue(), "image/jpeg")
+
+
+@pytest.mark.django_db
+class TestReceiptPipeline:
+    def get_test_data(self):
+        org = Organization.objects.create(name="Receipt Org")
+        user = User.objects.create_user(
+            username="receipt_foreman",
+            password="pass",
+            organization=org,
+            role=User.Role.FOREMAN,
+        )
+        wallet = Wallet.objects.create(user=user, organization=org)
+        return org, user, wallet
+
+    def test_process_receipt_normalizes_and_builds_derivatives(self, media_root):
+        org, _, wallet = self.get_test_data()
+        expense = WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="EXPENSE",
+            amount=10,
+            receipt_image=make_photo(),
+        )
+
+        assert process_receipt(expense.pk)
+        expense.refresh_from_db()
+
+        assert (expense.receipt_width, expense.receipt_height) == (200, 400)
+        with Image.open(expense.receipt_image.path) as original:
+            assert original.size == (200, 400)
+            assert not original.getexif()
+        with Image.open(expense.receipt_thumbnail.path) as thumbnail:
+            assert thumbnail.format == "WEBP"
+            assert max(thumbnail.size) <= max(THUMBNAIL_SIZE)
+        assert expense.receipt_preview.name.endswith(".webp")
+
+    def test_expense_upload_schedules_processing(
+        self, client, media_root, settings, django_capture_on_commit_callbacks
+    ):
+        settings.RECEIPT_PROCESSING_THREADS = 0
+        _, user, wallet = self.get_test_data()
+        client.force_login(user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                reverse("business:expense_create"),
+                data={
+                    "amount": "25.00",
+                    "category": WalletTransaction.Category.FUEL,
+                    "date": "2026-01-10",
+                    "receipt_image": make_photo(),
+                },
+                headers={"datastar-request": "true"},
+            )
+
+        expense = WalletTransaction.objects.get(wallet=wallet)
+        assert expense.receipt_thumbnail
+        response = client.get(
+            reverse("business:transaction_receipt", args=[expense.pk]),
+            {"variant": "thumbnail"},
+        )
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content).startswith(b"RIFF")
+
+
+@pytest.mark.django_db
+class TestReceiptServing:
+    @pytest.fixture
+    def receipt(self, client, media_root):
+        org, user, wallet = TestReceiptPipeline().get_test_data()
+        expense = WalletTransaction.objects.create(
+            wallet=wallet,
+            organization=org,
+            type="EXPENSE",
+            amount=10,
+            receipt_image=make_photo(),
+        )
+        client.force_login(user)
+        return expense, reverse("business:transaction_receipt", args=[expense.pk])
+
+    def test_conditional_get_returns_304(self, client, receipt):
+        _, url = receipt
+        response = client.get(url)
+        assert response.status_code == 200
+        assert "private" in response["Cache-Control"]
+        assert response["Accept-Ranges"] == "bytes"
+
+        response = client.get(url, headers={"If-None-Match": response["ETag"]})
+        assert response.status_code == 304
+
+    def test_byte_ranges(self, client, receipt):
+        expense, url = receipt
+        size = expense.receipt_image.size
+
+        response = client.get(url, headers={"Range": "bytes=0-9"})
+        assert response.status_code == 206
+        assert response["Content-Range"] == f"bytes 0-9/{size}"
+        assert b"".join(response.streaming_content) == expense.receipt_image.read()[:10]
+
+        response = client.get(url, headers={"Range": f"bytes={size}-"})
+        assert response.status_code == 416
+
+    def test_offload_to_front_server(self, client, receipt, settings):
+        expense, url = receipt
+        settings.RECEIPT_SENDFILE_BACKEND = "x-accel-redirect"
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response["X-Accel-Redirect"] == (
+            f"/protected-media/{expense.receipt_image.name}"
+        )
+        assert response.content == b""
+
+
+@pytest.mark.django_db
+class TestDuplicateReceipts:
+    @pytest.fixture(autouse=True)
+    def clear_indexes(self, monkeypatch, settings):
+        settings.RECEIPT_PROCESSING_THREADS = 0
+        monkeypatch.setattr(receipts, "_hash_indexes", {})
+
+    def post_expense(self, client, photo, amount="25.00"):
+        client.post(
+            reverse("business:expense_create"),
+            data={
+                "amount": amount,
+                "category": WalletTransaction.Category.MATERIAL,
+                "date": "2026-02-10",
+                "receipt_image": photo,
+            },
+            headers={"datastar-request": "true"},
+        )
+        return WalletTransaction.objects.latest("pk")
+
+    def test_index_finds_only_close_hashes(self):
+        index = ReceiptHashIndex()
+        index.add(1, "ffff0000ffff0000")
+        index.add(2, "ffff0000ffff0007")
+        index.add(3, "0000ffff0000ffff")
+
+        assert index.nearest("ffff0000ffff0001") == [(1, 1), (2, 2)]
+        assert index.nearest("00ff00ff00ff00ff") == []
+
+    def test_similar_upload_is_flagged(self, client, media_root):
+        org = Organization.objects.create(name="Duplicate Org")
+        user = User.objects.create_user(
+            username="duplicate_foreman",
+            password="pass",
+            organization=org,
+            role=User.Role.FOREMAN,
+        )
+        Wallet.objects.create(user=user, organization=org)
+        client.force_login(user)
+
+        first = self.post_expense(client, make_receipt(3))
+        assert first.receipt_hash == compute_receipt_hash(make_receipt(3).read())
+        assert first.receipt_duplicate_of is None
+
+        other = self.post_expense(client, make_receipt(11))
+        assert other.receipt_duplicate_of is None
+
+        response = client.post(
+            reverse("business:expense_create"),
+            data={
+                "amount": "25.00",
+                "category": WalletTransaction.Category.MATERIAL,
+                "date": "2026-02-11",
+                "receipt_image": make_receipt(3, size=(500, 1000), quality=60),
+            },
+            headers={"datastar-request": "true"},
+        )
+        second = WalletTransaction.objects.latest("pk")
+        assert second.receipt_duplicate_of == first
+        assert "już rozliczony" in b"".join(response.streaming_content).decode()
+
+    def test_processing_keeps_hash_and_indexes_replaced_photo(self, media_root):
+        org = Organization.objects.create(name="Hash Org")
+        older, newer = (
+            WalletTransaction.objects.create(
+                organization=org,
+                type="EXPENSE",
+                amount=10,
+                receipt_image=make_receipt(seed),
+            )
+            for seed in (3, 11)
+        )
+        WalletTransaction.objects.filter(pk=newer.pk).update(receipt_hash="ab" * 8)
+        index = receipts.get_receipt_hash_index(org.pk)
+        assert index.last_id == newer.pk
+
+        assert process_receipt(newer.pk)
+        newer.refresh_from_db()
+        assert newer.receipt_hash == "ab" * 8
+
+        assert process_receipt(older.pk)
+        older.refresh_from_db()
+        assert older.receipt_hash
+        assert (0, older.pk) in receipts.get_receipt_hash_index(org.pk).nearest(
+            older.receipt_hash
+        )
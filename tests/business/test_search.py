@@ -0,0 +1,139 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+from business.models import Project, Wallet, WalletTransaction, Worker
+from business.search import build_match_query, global_search
+from business.views.project import get_projects
+from business.views.worker import get_workers
+from core.models import Organization, User
+
+
+@pytest.mark.django_db
+class TestGlobalSearch:
+    @pytest.fixture(autouse=True)
+    def setup_data(self):
+        self.org = Organization.objects.create(name="Search Org")
+        self.owner = User.objects.create_user(
+            username="search_owner",
+            password="pass",
+            organization=self.org,
+            role=User.Role.OWNER,
+        )
+        self.foreman = User.objects.create_user(
+            username="search_foreman",
+            password="pass",
+            organization=self.org,
+            role=User.Role.FOREMAN,
+        )
+        self.wallet = Wallet.objects.create(user=self.foreman, organization=self.org)
+        self.project = Project.objects.create(
+            organization=self.org, name="Osiedle Zielone", address="ul. Łąkowa 5, Łódź"
+        )
+        self.worker = Worker.objects.create(
+            organization=self.org,
+            first_name="Łukasz",
+            last_name="Żółtowski",
+            hourly_rate=30,
+            notes="Uprawnienia na wózek widłowy",
+        )
+        self.expense = WalletTransaction.objects.create(
+            organization=self.org,
+            wallet=self.wallet,
+            type="EXPENSE",
+            amount=120,
+            description="Cement na fundamenty Łódź",
+        )
+
+    def kinds(self, user, text):
+        return [(r["kind"], r["object"].pk) for r in global_search(user, text)]
+
+    def test_build_match_query(self):
+        assert build_match_query("Łódź  ul.") == '"Lódź"* "ul"*'
+        assert build_match_query('"*) OR') == '"OR"*'
+        assert build_match_query("--") == ""
+
+    def test_diacritics_and_prefixes_are_folded(self):
+        assert self.kinds(self.owner, "lukasz zolt") == [("worker", self.worker.pk)]
+        assert self.kinds(self.owner, "Żółtowski") == [("worker", self.worker.pk)]
+        assert self.kinds(self.owner, "widlowy") == [("worker", self.worker.pk)]
+        assert sorted(self.kinds(self.owner, "lodz")) == [
+            ("project", self.project.pk),
+            ("transaction", self.expense.pk),
+        ]
+
+    def test_index_follows_writes(self):
+        self.project.name = "Hala Magazynowa"
+        self.project.save()
+        Worker.objects.filter(pk=self.worker.pk).update(last_name="Nowak")
+        WalletTransaction.objects.bulk_create(
+            [
+                WalletTransaction(
+                    organization=self.org,
+                    wallet=self.wallet,
+                    type="EXPENSE",
+                    amount=10,
+                    description="Magazynowa folia",
+                )
+            ]
+        )
+
+        assert self.kinds(self.owner, "osiedle") == []
+        assert self.kinds(self.owner, "zoltowski") == []
+        assert self.kinds(self.owner, "nowak") == [("worker", self.worker.pk)]
+        assert {kind for kind, _ in self.kinds(self.owner, "magazyn")} == {
+            "project",
+            "transaction",
+        }
+
+        self.expense.delete()
+        assert self.kinds(self.owner, "cement") == []
+
+    def test_scoped_to_organization_and_role(self):
+        other = Organization.objects.create(name="Other Org")
+        Project.objects.create(organization=other, name="Osiedle Obce")
+        other_wallet = Wallet.objects.create(
+            organization=self.org,
+            user=User.objects.create_user(
+                username="other_foreman",
+                password="pass",
+                organization=self.org,
+                role=User.Role.FOREMAN,
+            ),
+        )
+        WalletTransaction.objects.create(
+            organization=self.org,
+            wallet=other_wallet,
+            type="EXPENSE",
+            amount=5,
+            description="Cement drugi",
+        )
+
+        assert self.kinds(self.owner, "osiedle") == [("project", self.project.pk)]
+        assert len(self.kinds(self.owner, "cement")) == 2
+        assert self.kinds(self.foreman, "cement") == [("transaction", self.expense.pk)]
+        assert self.kinds(self.foreman, "lukasz") == []
+
+    def test_list_filters_use_index(self):
+        assert get_projects(self.org, "lakowa") == [self.project]
+        assert get_workers(self.org, "zoltowski lukasz") == [self.worker]
+        assert get_workers(self.org, "!!!") == []
+
+    def test_search_view(self, client):
+        client.force_login(self.owner)
+        url = reverse("business:global_search")
+
+        response = client.get(
+            url,
+            {"datastar": json.dumps({"global_query": "lodz"})},
+            HTTP_DATASTAR_REQUEST="true",
+        )
+        content = b"".join(response.streaming_content).decode()
+        assert "#global-search-results" in content
+        assert "Osiedle Zielone" in content
+        assert "Cement na fundamenty" in content
+
+        response = client.get(url, {"q": "zoltowski"})
+        assert response.status_code == 200
+        assert "Żółtowski" in response.content.decode()
@@ -1,9 +1,15 @@
-from datetime import timedelta
+import random
+from datetime import date, timedelta
 
 import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
 
 from business.models import Vacation, Worker
+from business.vacations import VacationIndex, build_vacation_calendar
 from core.models import Organization, User
 
 
@@ -54,3 +60,109 @@ class TestVacationViews:
         response = client.post(url, headers={"datastar-request": "true"})
         assert response.status_code == 200
         assert Vacation.objects.filter(worker=worker).count() == 0
+
+
+def test_coverage_matches_day_by_day_count():
+    rng = random.Random(3)
+    base = date(2026, 1, 1)
+    vacations = [
+        Vacation(
+            pk=i,
+            worker_id=i % 15,
+            start_date=(start := base + timedelta(days=rng.randrange(120))),
+            end_date=start + timedelta(days=rng.randrange(14)),
+        )
+        for i in range(60)
+    ]
+    index = VacationIndex(vacations)
+    start, end = date(2026, 2, 1), date(2026, 3, 31)
+
+    expected = [
+        sum(v.start_date <= start + timedelta(days=d) <= v.end_date for v in vacations)
+        for d in range((end - start).days + 1)
+    ]
+    assert [absent for _, absent in index.coverage(start, end)] == expected
+
+
+@pytest.mark.django_db
+class TestVacationCalendar:
+    @pytest.fixture(autouse=True)
+    def setup_data(self):
+        self.org = Organization.objects.create(name="Calendar Org")
+        self.owner = User.objects.create_user(
+            username="calendar_owner",
+            password="pwd",
+            role=User.Role.OWNER,
+            organization=self.org,
+        )
+        self.workers = [
+            Worker.objects.create(
+                organization=self.org,
+                first_name="Jan",
+                last_name=f"Urlopowy {i}",
+                hourly_rate=20,
+                hired_at=date(2026, 1, 1),
+            )
+            for i in range(4)
+        ]
+
+    def add(self, worker, start, end):
+        return Vacation.objects.create(
+            organization=self.org, worker=worker, start_date=start, end_date=end
+        )
+
+    def test_overlap_validation_uses_index(self):
+        existing = self.add(self.workers[0], date(2026, 7, 6), date(2026, 7, 10))
+        clash = Vacation(
+            organization=self.org,
+            worker=self.workers[0],
+            start_date=date(2026, 7, 10),
+            end_date=date(2026, 7, 12),
+        )
+        with pytest.raises(ValidationError):
+            clash.clean()
+
+        existing.end_date = date(2026, 7, 8)
+        existing.clean()
+
+        index = VacationIndex.load(self.org, date(2026, 7, 1), date(2026, 7, 31))
+        clash.vacation_index = index
+        with (
+            CaptureQueriesContext(connection) as queries,
+            pytest.raises(ValidationError),
+        ):
+            clash.clean()
+        assert len(queries) == 0
+
+    def test_calendar_flags_days_with_too_many_absent(self, client):
+        self.add(self.workers[0], date(2026, 7, 6), date(2026, 7, 10))
+        self.add(self.workers[1], date(2026, 7, 9), date(2026, 7, 20))
+        self.add(self.workers[2], date(2026, 6, 25), date(2026, 7, 2))
+
+        data = build_vacation_calendar(
+            self.org, date(2026, 7, 1), date(2026, 7, 31), team_size=4
+        )
+        assert data["absence_limit"] == 1
+        assert [d["date"].day for d in data["days"] if d["over_limit"]] == [9, 10]
+        assert len(data["rows"]) == 3
+
+        client.force_login(self.owner)
+        response = client.get(
+            reverse("business:vacation_calendar"),
+            {"year": 2026, "month": 8, "span": "quarter"},
+        )
+        content = response.content.decode()
+        assert response.status_code == 200
+        assert "01.07.2026" in content and "30.09.2026" in content
+        assert "Urlopowy 1" in content and "Urlopowy 3" not in content
+
+    @pytest.mark.parametrize(
+        ("year", "month"), [(0, 1), (10000, 1), (9999, 12), (1, 1), (9998, 12)]
+    )
+    def test_calendar_handles_out_of_range_years(self, client, year, month):
+        client.force_login(self.owner)
+        response = client.get(
+            reverse("business:vacation_calendar"),
+            {"year": year, "month": month, "span": "quarter"},
+        )
+        assert response.status_code == 200
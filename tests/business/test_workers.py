@@ -0,0 +1,358 @@
+import json
+from datetime import date
+
+import pytest
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from business.imports import read_statement
+from business.models import (
+    EmploymentPeriod,
+    Payroll,
+    Project,
+    Wallet,
+    WalletTransaction,
+    Worker,
+    WorkLog,
+)
+from business.payrolls import (
+    generate_payrolls,
+    get_payroll_summary,
+    refresh_payroll_summary,
+)
+from business.projects import rebuild_project_costs
+from business.workers import (
+    delete_workers,
+    get_worker_summaries,
+    onboard_workers,
+    set_workers_active,
+)
+from core.models import Organization, User
+
+WORKERS_CSV = (
+    "Imię;Nazwisko;Stawka;Data zatrudnienia;Telefon\n"
+    "Jan;Kowalski;35;01.04.2026;600 100 200\n"
+    "Anna;Nowak;40;;\n"
+)
+
+
+def csv_file(content):
+    return SimpleUploadedFile("pracownicy.csv", content.encode())
+
+
+def seasonal_csv(count):
+    rows = "".join(f"Jan;Sezonowy {i};30;2026-04-01;\n" for i in range(count))
+    return "imię;nazwisko;stawka;data zatrudnienia;telefon\n" + rows
+
+
+@pytest.mark.django_db
+class TestWorkerOnboarding:
+    @pytest.fixture(autouse=True)
+    def setup_data(self):
+        self.org = Organization.objects.create(name="Onboarding Org")
+        self.owner = User.objects.create_user(
+            username="onboarding_owner",
+            password="pass",
+            organization=self.org,
+            role=User.Role.OWNER,
+        )
+
+    def test_onboard_creates_workers_and_periods(self):
+        result = onboard_workers(
+            self.org, read_statement(csv_file(WORKERS_CSV)), today=date(2026, 5, 4)
+        )
+
+        assert result["errors"] == [] and result["duplicates"] == 0
+        jan = Worker.objects.get(organization=self.org, last_name="Kowalski")
+        assert (jan.hourly_rate, jan.hired_at, jan.phone) == (
+            35,
+            date(2026, 4, 1),
+            "600 100 200",
+        )
+        anna = Worker.objects.get(organization=self.org, last_name="Nowak")
+        assert anna.hired_at == date(2026, 5, 4)
+        assert list(
+            EmploymentPeriod.objects.filter(worker__organization=self.org)
+            .order_by("start_date")
+            .values_list("worker__last_name", "start_date", "end_date")
+        ) == [
+            ("Kowalski", date(2026, 4, 1), None),
+            ("Nowak", date(2026, 5, 4), None),
+        ]
+
+        again = onboard_workers(self.org, read_statement(csv_file(WORKERS_CSV)))
+        assert (len(again["created"]), again["duplicates"]) == (0, 2)
+
+    def test_onboarding_query_count_does_not_grow(self):
+        with CaptureQueriesContext(connection) as small:
+            onboard_workers(self.org, read_statement(csv_file(seasonal_csv(3))))
+        Worker.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            result = onboard_workers(
+                self.org, read_statement(csv_file(seasonal_csv(300)))
+            )
+
+        assert len(result["created"]) == 300
+        assert EmploymentPeriod.objects.filter(organization=self.org).count() == 300
+        assert len(large) == len(small)
+
+    def test_invalid_row_rejects_whole_file(self):
+        content = WORKERS_CSV + "Piotr;;30;;\nEwa;Zielińska;abc;;\n"
+        result = onboard_workers(self.org, read_statement(csv_file(content)))
+
+        assert [line for line, _ in result["errors"]] == [4, 5]
+        assert not Worker.objects.filter(organization=self.org).exists()
+
+    def test_set_workers_active_matches_single_save(self):
+        user = User.objects.create_user(
+            username="seasonal", password="pass", organization=self.org
+        )
+        bulk = Worker.objects.create(
+            organization=self.org,
+            user=user,
+            first_name="Jan",
+            last_name="Zbiorczy",
+            hourly_rate=30,
+            hired_at=date(2026, 1, 1),
+        )
+        single = Worker.objects.create(
+            organization=self.org,
+            first_name="Jan",
+            last_name="Pojedynczy",
+            hourly_rate=30,
+            hired_at=date(2026, 1, 1),
+        )
+
+        def periods(worker):
+            return list(
+                worker.employment_periods.order_by("start_date", "pk").values_list(
+                    "start_date", "end_date"
+                )
+            )
+
+        assert set_workers_active(Worker.objects.filter(pk=bulk.pk), False) == 1
+        single.is_active = False
+        single.save()
+        user.refresh_from_db()
+        assert user.is_active is False
+        assert periods(bulk) == periods(single)
+
+        assert set_workers_active(Worker.objects.filter(pk=bulk.pk), True) == 1
+        single.is_active = True
+        single.save()
+        bulk.refresh_from_db()
+        assert bulk.is_active is True
+        assert periods(bulk) == periods(single)
+        assert set_workers_active(Worker.objects.filter(pk=bulk.pk), True) == 0
+
+    def test_import_view_and_command(self, client, tmp_path):
+        client.force_login(self.owner)
+        url = reverse("business:worker_import")
+
+        response = client.post(
+            url, {"file": csv_file("imię;nazwisko;stawka\nJan;;30\n")}
+        )
+        content = b"".join(response.streaming_content).decode()
+        assert "Nie zapisano" in content
+
+        response = client.post(url, {"file": csv_file(WORKERS_CSV)})
+        content = b"".join(response.streaming_content).decode()
+        assert "Dodano pracowników: 2" in content
+        assert "Kowalski" in content
+
+        path = tmp_path / "sezon.csv"
+        path.write_text(seasonal_csv(4), encoding="utf-8")
+        call_command("import_workers", str(path), organization=self.org.pk)
+        assert Worker.objects.filter(organization=self.org).count() == 6
+
+        path.write_text("imię;nazwisko;stawka\nJan;Zły;-5\n", encoding="utf-8")
+        with pytest.raises(CommandError):
+            call_command("import_workers", str(path), organization=self.org.pk)
+
+
+@pytest.mark.django_db
+class TestWorkerSummaries:
+    @pytest.fixture(autouse=True)
+    def setup_data(self):
+        self.org = Organization.objects.create(name="Summary Org")
+        self.owner = User.objects.create_user(
+            username="summary_owner",
+            password="pass",
+            organization=self.org,
+            role=User.Role.OWNER,
+        )
+        self.wallet = Wallet.objects.create(user=self.owner, organization=self.org)
+        self.today = date.today()
+
+    def add_worker(self, last_name):
+        worker = Worker.objects.create(
+            organization=self.org,
+            first_name="Jan",
+            last_name=last_name,
+            hourly_rate=30,
+            hired_at=date(2025, 1, 1),
+        )
+        WorkLog.objects.create(
+            organization=self.org, worker=worker, date=self.today, hours=8
+        )
+        WalletTransaction.objects.create(
+            organization=self.org,
+            wallet=self.wallet,
+            worker=worker,
+            type=WalletTransaction.Type.ADVANCE,
+            amount=100,
+            date=self.today,
+        )
+        return worker
+
+    def test_summaries_and_invalidation(self):
+        worker = self.add_worker("Podsumowany")
+        Payroll.objects.create(
+            organization=self.org,
+            worker=worker,
+            year=2025,
+            month=5,
+            status=Payroll.Status.CLOSED,
+            advances_deducted=40,
+            net_pay=1000,
+        )
+        refresh_payroll_summary(self.org, 2025, 5)
+
+        summary = get_worker_summaries(self.org)[worker.pk]
+        assert summary["month_hours"] == 8
+        assert summary["outstanding_advances"] == 60
+        assert (
+            summary["last_payroll"]["month"],
+            summary["last_payroll"]["net_pay"],
+        ) == (
+            5,
+            1000,
+        )
+        with CaptureQueriesContext(connection) as queries:
+            get_worker_summaries(self.org)
+        assert len(queries) == 0
+
+        log = WorkLog.objects.get(worker=worker)
+        log.hours = 6
+        log.save()
+        assert get_worker_summaries(self.org)[worker.pk]["month_hours"] == 6
+
+        WalletTransaction.objects.create(
+            organization=self.org,
+            wallet=self.wallet,
+            worker=worker,
+            type=WalletTransaction.Type.ADVANCE,
+            amount=50,
+            date=self.today,
+        )
+        assert get_worker_summaries(self.org)[worker.pk]["outstanding_advances"] == 110
+
+    def test_worker_list_query_count_does_not_grow(self, client):
+        client.force_login(self.owner)
+        url = reverse("business:worker_list")
+        self.add_worker("Pierwszy")
+        cache.clear()
+        with CaptureQueriesContext(connection) as small:
+            client.get(url)
+
+        for i in range(5):
+            self.add_worker(f"Kolejny {i}")
+        cache.clear()
+        with CaptureQueriesContext(connection) as large:
+            response = client.get(url)
+
+        assert "Kolejny 4" in response.content.decode()
+        assert len(large) == len(small)
+
+    def test_bulk_lifecycle_actions(self, client):
+        foreman = User.objects.create_user(
+            username="season_foreman", password="pass", organization=self.org
+        )
+        workers = [self.add_worker(f"Sezon {i}") for i in range(3)]
+        workers[0].user = foreman
+        workers[0].save()
+        other_org = Organization.objects.create(name="Other Org")
+        outsider = Worker.objects.create(
+            organization=other_org,
+            first_name="Obcy",
+            last_name="Pracownik",
+            hourly_rate=30,
+        )
+        client.force_login(self.owner)
+        url = reverse("business:worker_bulk_action")
+
+        def post(action, selected):
+            signals = {f"workerSelected_{w.pk}": True for w in selected}
+            signals[f"workerSelected_{workers[2].pk}"] = False
+            response = client.post(
+                f"{url}?action={action}&search=&show_inactive=true",
+                data=json.dumps(signals),
+                content_type="application/json",
+                headers={"datastar-request": "true"},
+            )
+            return b"".join(response.streaming_content).decode()
+
+        content = post("deactivate", [workers[0], workers[1], outsider])
+        assert "Dezaktywowano pracowników: 2" in content
+        assert "worker-list-body" in content
+        assert set(
+            Worker.objects.filter(is_active=True).values_list("last_name", flat=True)
+        ) == {"Pracownik", "Sezon 2"}
+        foreman.refresh_from_db()
+        assert foreman.is_active is False
+        assert not EmploymentPeriod.objects.filter(
+            worker=workers[1], end_date__isnull=True
+        ).exists()
+
+        assert "Aktywowano pracowników: 1" in post("activate", [workers[1]])
+        assert Worker.objects.get(pk=workers[1].pk).is_active
+
+        assert "Usunięto pracowników: 2" in post("delete", [workers[0], workers[1]])
+        assert set(Worker.objects.values_list("pk", flat=True)) == {
+            workers[2].pk,
+            outsider.pk,
+        }
+        assert not User.objects.filter(pk=foreman.pk).exists()
+
+    def test_bulk_delete_keeps_project_and_payroll_totals(self):
+        project = Project.objects.create(organization=self.org, name="Sezon")
+        foreman = User.objects.create_user(
+            username="bulk_foreman", password="pass", organization=self.org
+        )
+        workers = [self.add_worker(f"Usuwany {i}") for i in range(3)]
+        workers[0].user = foreman
+        workers[0].save()
+        foreman_wallet = Wallet.objects.create(user=foreman, organization=self.org)
+        WorkLog.objects.filter(worker__in=workers).update(project=project)
+        rebuild_project_costs(self.org)
+        WalletTransaction.objects.create(
+            organization=self.org,
+            wallet=foreman_wallet,
+            project=project,
+            type=WalletTransaction.Type.EXPENSE,
+            amount=200,
+            date=self.today,
+        )
+        generate_payrolls(self.org, self.today.year, self.today.month)
+
+        delete_workers(Worker.objects.filter(pk__in=[w.pk for w in workers[:2]]))
+
+        project.refresh_from_db()
+        assert (project.hours_total, project.expenses_total) == (8, 0)
+        assert project.labour_cost_total == 8 * 30
+        summary = get_payroll_summary(self.org, self.today.year, self.today.month)
+        assert summary["total_earned"] == 8 * 30
+        incremental = Project.objects.values_list(
+            "hours_total", "expenses_total", "labour_cost_total"
+        ).get(pk=project.pk)
+        rebuild_project_costs(self.org)
+        assert (
+            Project.objects.values_list(
+                "hours_total", "expenses_total", "labour_cost_total"
+            ).get(pk=project.pk)
+            == incremental
+        )